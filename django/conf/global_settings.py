@@ -183,6 +183,10 @@ TEMPLATE_LOADERS = (
 #     'django.template.loaders.eggs.Loader',
 )
 
+# Whether the cached template loader reloads the templates whose files were
+# modified since they were cached.
+TEMPLATE_CACHE_AUTO_RELOAD = False
+
 # List of processors used by RequestContext to populate the context.
 # Each one should be a callable that takes the request object as its
 # only parameter and returns a dictionary to add to the context.
@@ -199,6 +203,18 @@ TEMPLATE_CONTEXT_PROCESSORS = (
 # Output to use in template system for invalid (e.g. misspelled) variables.
 TEMPLATE_STRING_IF_INVALID = ''
 
+# Whether to compile templates to Python code, which renders them faster.
+# Ignored when TEMPLATE_DEBUG is True.
+TEMPLATE_COMPILE = False
+
+# Whether to optimize the parsed templates, computing constant expressions
+# and removing unused branches. Ignored when TEMPLATE_DEBUG is True.
+TEMPLATE_OPTIMIZE = False
+
+# Whether to record the time taken to render templates, blocks and tags, in
+# django.template.profiling.stats. Ignored when TEMPLATE_DEBUG is True.
+TEMPLATE_PROFILE = False
+
 # Default email address to use for various automated correspondence from
 # the site managers.
 DEFAULT_FROM_EMAIL = 'webmaster@localhost'
@@ -294,6 +310,21 @@ FILE_UPLOAD_TEMP_DIR = None
 # you'd pass directly to os.chmod; see http://docs.python.org/lib/os-file-dir.html.
 FILE_UPLOAD_PERMISSIONS = None
 
+# The header used by django.http.SendfileResponse to let the front-end Web
+# server deliver files, e.g. 'X-Sendfile' (Apache, lighttpd) or
+# 'X-Accel-Redirect' (nginx). A value of `None` streams files through Django.
+SENDFILE_HEADER = None
+
+# Absolute filesystem path to the directory containing the files delivered
+# using X-Accel-Redirect.
+# Example: "/home/media/media.lawrence.com/protected/"
+SENDFILE_ROOT = ''
+
+# URL of the (internal) location that serves the files from SENDFILE_ROOT when
+# using X-Accel-Redirect.
+# Example: "/protected/"
+SENDFILE_URL = None
+
 # Python module path where user will place custom format definition.
 # The directory where this setting is pointing should contain subdirectories
 # named as the locales, containing a formats.py file
@@ -458,6 +489,7 @@ CACHES = {
 CACHE_MIDDLEWARE_KEY_PREFIX = ''
 CACHE_MIDDLEWARE_SECONDS = 600
 CACHE_MIDDLEWARE_ALIAS = 'default'
+CACHE_MIDDLEWARE_LOCK_TIMEOUT = 0
 
 ####################
 # COMMENTS         #
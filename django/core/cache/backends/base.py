@@ -1,5 +1,7 @@
 "Base Cache class."
 
+import random
+import time
 import warnings
 
 from django.core.exceptions import ImproperlyConfigured, DjangoRuntimeWarning
@@ -15,6 +17,47 @@ class CacheKeyWarning(DjangoRuntimeWarning):
 # Memcached does not accept keys longer than this.
 MEMCACHE_MAX_KEY_LENGTH = 250
 
+# How often, in seconds, to check whether a value being computed by another
+# process has been stored.
+LOCK_POLL_INTERVAL = 0.05
+
+def get_tag_key(tag):
+    """
+    Returns the key under which the generation counter of a tag is stored.
+    """
+    return 'tag.%s' % smart_str(tag)
+
+def _unique_tags(tags):
+    """
+    Returns the tags as bytestrings, without duplicates, in their order.
+    """
+    seen = set()
+    unique = []
+    for tag in tags:
+        tag = smart_str(tag)
+        if tag not in seen:
+            seen.add(tag)
+            unique.append(tag)
+    return unique
+
+def check_tag_generations(data, tags, generations):
+    """
+    Returns the value stored by set_tagged() in data, or None if any of the
+    given tags has been invalidated since. generations is a dictionary
+    mapping the tag keys to their current generation.
+    """
+    tags = _unique_tags(tags)
+    try:
+        stored_generations, value = data
+        if len(stored_generations) != len(tags):
+            return None
+        for tag in tags:
+            if stored_generations[tag] != generations.get(get_tag_key(tag)):
+                return None
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return None
+    return value
+
 def default_key_func(key, key_prefix, version):
     """
     Default function to generate keys.
@@ -62,6 +105,12 @@ class BaseCache(object):
         except (ValueError, TypeError):
             self._cull_frequency = 3
 
+        tag_timeout = params.get('tag_timeout', options.get('TAG_TIMEOUT', 86400))
+        try:
+            self._tag_timeout = int(tag_timeout)
+        except (ValueError, TypeError):
+            self._tag_timeout = 86400
+
         self.key_prefix = smart_str(params.get('KEY_PREFIX', ''))
         self.version = params.get('VERSION', 1)
         self.key_func = get_key_func(params.get('KEY_FUNCTION', None))
@@ -125,6 +174,101 @@ class BaseCache(object):
                 d[k] = val
         return d
 
+    def get_or_set(self, key, default, timeout=None, version=None, lock_timeout=10,
+                   tags=None):
+        """
+        Fetch a given key from the cache. If the key does not exist, store
+        default in the cache and return it. If default is callable, it's
+        called to compute the value.
+
+        Only one caller computes a missing value at a time: the others wait
+        up to lock_timeout seconds for it to be stored, so that an expired
+        key doesn't make every process recompute it at once. A lock_timeout
+        of 0 disables the locking.
+
+        If tags are given, the value is stored with set_tagged() and read
+        with get_tagged().
+        """
+        value = self._get_maybe_tagged(key, version, tags)
+        if value is not None:
+            return value
+        lock_key = '%s.lock' % key
+        deadline = time.time() + lock_timeout
+        while lock_timeout:
+            if self.add(lock_key, True, lock_timeout, version=version):
+                try:
+                    return self._compute_and_set(key, default, timeout, version, tags)
+                finally:
+                    self.delete(lock_key, version=version)
+            if time.time() >= deadline:
+                break
+            time.sleep(LOCK_POLL_INTERVAL)
+            value = self._get_maybe_tagged(key, version, tags)
+            if value is not None:
+                return value
+        return self._compute_and_set(key, default, timeout, version, tags)
+
+    def _get_maybe_tagged(self, key, version, tags):
+        if tags:
+            return self.get_tagged(key, tags, version=version)
+        return self.get(key, version=version)
+
+    def _compute_and_set(self, key, default, timeout, version, tags=None):
+        if callable(default):
+            default = default()
+        if tags:
+            self.set_tagged(key, default, tags, timeout=timeout, version=version)
+        else:
+            self.set(key, default, timeout=timeout, version=version)
+        return default
+
+    def get_tagged(self, key, tags, default=None, version=None):
+        """
+        Fetch a value stored by set_tagged(), unless one of the given tags
+        has been invalidated since. The value and the generations of the tags
+        are fetched with a single get_many().
+        """
+        tags = _unique_tags(tags)
+        values = self.get_many([key] + [get_tag_key(tag) for tag in tags],
+                               version=version)
+        value = check_tag_generations(values.get(key), tags, values)
+        if value is None:
+            return default
+        return value
+
+    def set_tagged(self, key, value, tags, timeout=None, version=None):
+        """
+        Set a value in the cache, along with the current generation of each
+        of the tags, so that invalidate_tags() can expire it.
+        """
+        tags = _unique_tags(tags)
+        tag_keys = [get_tag_key(tag) for tag in tags]
+        generations = self.get_many(tag_keys, version=version)
+        for tag_key in tag_keys:
+            if tag_key not in generations:
+                # A random start makes it unlikely that the values stored
+                # before the tag was evicted become valid again.
+                generation = random.randint(1, 2 ** 31)
+                if not self.add(tag_key, generation, self._tag_timeout, version=version):
+                    generation = self.get(tag_key, version=version)
+                generations[tag_key] = generation
+        stored_generations = {}
+        for tag, tag_key in zip(tags, tag_keys):
+            stored_generations[tag] = generations[tag_key]
+        self.set(key, (stored_generations, value), timeout=timeout, version=version)
+
+    def invalidate_tags(self, tags, version=None):
+        """
+        Expire all the values stored with any of the given tags, by
+        incrementing the generation counter of each tag.
+        """
+        for tag in tags:
+            try:
+                self.incr(get_tag_key(tag), version=version)
+            except ValueError:
+                # The values stored with a missing tag are already invalid.
+                pass
+
     def has_key(self, key, version=None):
         """
         Returns True if the key is in the cache and has not expired.
@@ -221,3 +365,73 @@ class BaseCache(object):
         the new version.
         """
         return self.incr_version(key, -delta, version)
+
+class CacheWrapper(BaseCache):
+    """
+    Base class for the backends wrapping the cache named by LOCATION, to
+    which every operation is delegated.
+
+    Keys are passed through unchanged, so that they are made once, by the
+    wrapped cache: values are stored under the same keys as when the wrapped
+    cache is used directly. The KEY_PREFIX, VERSION and KEY_FUNCTION given to
+    the wrapper, if any, override those of the wrapped cache.
+    """
+    key_params = ('KEY_PREFIX', 'VERSION', 'KEY_FUNCTION')
+
+    def __init__(self, location, params):
+        BaseCache.__init__(self, params)
+        if not location:
+            raise InvalidCacheBackendError(
+                "The %s backend requires a LOCATION naming the cache to "
+                "wrap." % self.__class__.__name__)
+        # Imported here to avoid a circular import with django.core.cache.
+        from django.core.cache import get_cache
+        overrides = dict([(name, params[name]) for name in self.key_params
+                          if name in params])
+        self._cache = get_cache(location, **overrides)
+        self.key_prefix = self._cache.key_prefix
+        self.version = self._cache.version
+        self.key_func = self._cache.key_func
+
+    def _delegate(self, operation, *args, **kwargs):
+        return getattr(self._cache, operation)(*args, **kwargs)
+
+    def make_key(self, key, version=None):
+        return self._cache.make_key(key, version=version)
+
+    def add(self, key, value, timeout=None, version=None):
+        return self._delegate('add', key, value, timeout, version=version)
+
+    def get(self, key, default=None, version=None):
+        return self._delegate('get', key, default, version=version)
+
+    def set(self, key, value, timeout=None, version=None):
+        self._delegate('set', key, value, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._delegate('delete', key, version=version)
+
+    def get_many(self, keys, version=None):
+        return self._delegate('get_many', keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._delegate('has_key', key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._delegate('incr', key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self._delegate('decr', key, delta, version=version)
+
+    def set_many(self, data, timeout=None, version=None):
+        self._delegate('set_many', data, timeout, version=version)
+
+    def delete_many(self, keys, version=None):
+        self._delegate('delete_many', keys, version=version)
+
+    def clear(self):
+        self._delegate('clear')
+
+    def close(self, **kwargs):
+        if hasattr(self._cache, 'close'):
+            self._cache.close(**kwargs)
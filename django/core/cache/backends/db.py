@@ -3,12 +3,8 @@ import base64
 import time
 from datetime import datetime
 
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle
-
 from django.core.cache.backends.base import BaseCache
+from django.core.cache.serializers import get_serializer
 from django.db import connections, router, transaction, DatabaseError
 
 
@@ -32,12 +28,25 @@ class BaseDatabaseCache(BaseCache):
     def __init__(self, table, params):
         BaseCache.__init__(self, params)
         self._table = table
+        self.serializer = get_serializer(params.get('OPTIONS', {}))
 
         class CacheEntry(object):
             _meta = Options(table)
         self.cache_model_class = CacheEntry
+        # An upper bound of the number of entries in the table, used to avoid
+        # counting them on every write.
+        self._num_entries = None
 
 class DatabaseCache(BaseDatabaseCache):
+    # The largest number of keys used in a single "IN" clause.
+    max_batch_size = 100
+
+    def _batches(self, connection, keys):
+        size = connection.ops.max_in_list_size() or self.max_batch_size
+        size = min(size, self.max_batch_size)
+        for i in xrange(0, len(keys), size):
+            yield keys[i:i + size]
+
     def get(self, key, default=None, version=None):
         key = self.make_key(key, version=version)
         self.validate_key(key)
@@ -57,7 +66,37 @@ class DatabaseCache(BaseDatabaseCache):
             transaction.commit_unless_managed(using=db)
             return default
         value = connections[db].ops.process_clob(row[1])
-        return pickle.loads(base64.decodestring(value))
+        return self.serializer.loads(base64.decodestring(value))
+
+    def get_many(self, keys, version=None):
+        new_keys = {}
+        for key in keys:
+            new_key = self.make_key(key, version=version)
+            self.validate_key(new_key)
+            new_keys[new_key] = key
+
+        db = router.db_for_read(self.cache_model_class)
+        connection = connections[db]
+        table = connection.ops.quote_name(self._table)
+        cursor = connection.cursor()
+
+        rows = []
+        for batch in self._batches(connection, new_keys.keys()):
+            cursor.execute("SELECT cache_key, value, expires FROM %s WHERE cache_key IN (%s)" %
+                           (table, ', '.join(['%s'] * len(batch))), batch)
+            rows.extend(cursor.fetchall())
+        now = datetime.now()
+        d = {}
+        expired = []
+        for key, value, expires in rows:
+            if expires < now:
+                expired.append(key)
+            else:
+                value = connection.ops.process_clob(value)
+                d[new_keys[key]] = self.serializer.loads(base64.decodestring(value))
+        if expired:
+            self._delete_many(expired)
+        return d
 
     def set(self, key, value, timeout=None, version=None):
         key = self.make_key(key, version=version)
@@ -76,13 +115,10 @@ class DatabaseCache(BaseDatabaseCache):
         table = connections[db].ops.quote_name(self._table)
         cursor = connections[db].cursor()
 
-        cursor.execute("SELECT COUNT(*) FROM %s" % table)
-        num = cursor.fetchone()[0]
         now = datetime.now().replace(microsecond=0)
         exp = datetime.fromtimestamp(time.time() + timeout).replace(microsecond=0)
-        if num > self._max_entries:
-            self._cull(db, cursor, now)
-        encoded = base64.encodestring(pickle.dumps(value, 2)).strip()
+        self._maybe_cull(db, cursor, now)
+        encoded = base64.encodestring(self.serializer.dumps(value)).strip()
         cursor.execute("SELECT cache_key, expires FROM %s WHERE cache_key = %%s" % table, [key])
         try:
             result = cursor.fetchone()
@@ -101,6 +137,49 @@ class DatabaseCache(BaseDatabaseCache):
             transaction.commit_unless_managed(using=db)
             return True
 
+    def set_many(self, data, timeout=None, version=None):
+        safe_data = {}
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            safe_data[key] = base64.encodestring(self.serializer.dumps(value)).strip()
+
+        if timeout is None:
+            timeout = self.default_timeout
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        table = connection.ops.quote_name(self._table)
+        cursor = connection.cursor()
+
+        now = datetime.now().replace(microsecond=0)
+        exp = datetime.fromtimestamp(time.time() + timeout).replace(microsecond=0)
+        exp = connection.ops.value_to_db_datetime(exp)
+        self._maybe_cull(db, cursor, now, len(safe_data))
+        try:
+            existing = set()
+            for batch in self._batches(connection, safe_data.keys()):
+                cursor.execute("SELECT cache_key FROM %s WHERE cache_key IN (%s)" %
+                               (table, ', '.join(['%s'] * len(batch))), batch)
+                existing.update([row[0] for row in cursor.fetchall()])
+            updates = []
+            inserts = []
+            for key, encoded in safe_data.items():
+                if key in existing:
+                    updates.append([encoded, exp, key])
+                else:
+                    inserts.append([key, encoded, exp])
+            if updates:
+                cursor.executemany("UPDATE %s SET value = %%s, expires = %%s WHERE cache_key = %%s" % table,
+                                   updates)
+            if inserts:
+                cursor.executemany("INSERT INTO %s (cache_key, value, expires) VALUES (%%s, %%s, %%s)" % table,
+                                   inserts)
+        except DatabaseError:
+            # To be threadsafe, updates/inserts are allowed to fail silently
+            transaction.rollback_unless_managed(using=db)
+        else:
+            transaction.commit_unless_managed(using=db)
+
     def delete(self, key, version=None):
         key = self.make_key(key, version=version)
         self.validate_key(key)
@@ -112,6 +191,25 @@ class DatabaseCache(BaseDatabaseCache):
         cursor.execute("DELETE FROM %s WHERE cache_key = %%s" % table, [key])
         transaction.commit_unless_managed(using=db)
 
+    def delete_many(self, keys, version=None):
+        safe_keys = []
+        for key in keys:
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            safe_keys.append(key)
+        self._delete_many(safe_keys)
+
+    def _delete_many(self, keys):
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        table = connection.ops.quote_name(self._table)
+        cursor = connection.cursor()
+
+        for batch in self._batches(connection, keys):
+            cursor.execute("DELETE FROM %s WHERE cache_key IN (%s)" %
+                           (table, ', '.join(['%s'] * len(batch))), batch)
+        transaction.commit_unless_managed(using=db)
+
     def has_key(self, key, version=None):
         key = self.make_key(key, version=version)
         self.validate_key(key)
@@ -125,9 +223,32 @@ class DatabaseCache(BaseDatabaseCache):
                        [key, connections[db].ops.value_to_db_datetime(now)])
         return cursor.fetchone() is not None
 
+    def _maybe_cull(self, db, cursor, now, count=1):
+        """
+        Culls the table, if needed, before ``count`` entries are written.
+
+        The entries are only counted when the estimate kept since the last
+        count shows the table may have grown past MAX_ENTRIES, rather than on
+        every write. Entries written by other processes aren't part of the
+        estimate, so the table can temporarily grow past the limit.
+        """
+        if self._num_entries is None or self._num_entries > self._max_entries:
+            table = connections[db].ops.quote_name(self._table)
+            cursor.execute("SELECT COUNT(*) FROM %s" % table)
+            num = cursor.fetchone()[0]
+            if num > self._max_entries:
+                num = self._cull(db, cursor, now)
+            self._num_entries = num
+        self._num_entries += count
+
     def _cull(self, db, cursor, now):
+        """
+        Deletes expired entries and, if there are still more than MAX_ENTRIES,
+        1/CULL_FREQUENCY of the rest. Returns the number of entries left.
+        """
         if self._cull_frequency == 0:
             self.clear()
+            return 0
         else:
             table = connections[db].ops.quote_name(self._table)
             cursor.execute("DELETE FROM %s WHERE expires < %%s" % table,
@@ -143,12 +264,15 @@ class DatabaseCache(BaseDatabaseCache):
                     # This isn't standard SQL, it's likely to break with some non officially supported databases             
                     cursor.execute("SELECT cache_key FROM %s ORDER BY cache_key LIMIT 1 OFFSET %%s" % table, [cull_num])
                 cursor.execute("DELETE FROM %s WHERE cache_key < %%s" % table, [cursor.fetchone()[0]])
+                num -= cull_num
+            return num
 
     def clear(self):
         db = router.db_for_write(self.cache_model_class)
         table = connections[db].ops.quote_name(self._table)
         cursor = connections[db].cursor()
         cursor.execute('DELETE FROM %s' % table)
+        self._num_entries = 0
 
 # For backwards compatibility
 class CacheClass(DatabaseCache):
@@ -3,6 +3,7 @@
 import hashlib
 import os
 import shutil
+import tempfile
 import time
 try:
     import cPickle as pickle
@@ -10,13 +11,30 @@ except ImportError:
     import pickle
 
 from django.core.cache.backends.base import BaseCache
+from django.core.cache.serializers import get_serializer
+from django.core.files.move import file_move_safe
+
+# The permissions of the cache files are those of files created with open(),
+# unlike the 0600 of temporary files. The umask can only be read by changing
+# it, so this is done once.
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0666 & ~_umask
 
 class FileBasedCache(BaseCache):
     def __init__(self, dir, params):
         BaseCache.__init__(self, params)
         self._dir = dir
+        self.serializer = get_serializer(params.get('OPTIONS', {}))
         if not os.path.exists(self._dir):
             self._createdir()
+        # An estimate of the number of entries in the cache directory, used
+        # to avoid counting them on every write. It only includes the
+        # entries written by this process since they were last counted, so
+        # they're counted again after a tenth of MAX_ENTRIES writes, which
+        # bounds how far other processes can make the directory grow.
+        self._num_entries = None
+        self._writes = 0
 
     def add(self, key, value, timeout=None, version=None):
         if self.has_key(key, version=version):
@@ -38,10 +56,10 @@ class FileBasedCache(BaseCache):
                 if exp < now:
                     self._delete(fname)
                 else:
-                    return pickle.load(f)
+                    return self.serializer.loads(f.read())
             finally:
                 f.close()
-        except (IOError, OSError, EOFError, pickle.PickleError):
+        except (IOError, OSError, EOFError, ValueError, pickle.PickleError):
             pass
         return default
 
@@ -61,15 +79,29 @@ class FileBasedCache(BaseCache):
             if not os.path.exists(dirname):
                 os.makedirs(dirname)
 
-            f = open(fname, 'wb')
+            # Write to a temporary file first, so that readers never see a
+            # partially written entry.
+            fd, tmp_path = tempfile.mkstemp(dir=dirname)
+            renamed = False
             try:
-                now = time.time()
-                pickle.dump(now + timeout, f, pickle.HIGHEST_PROTOCOL)
-                pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+                os.chmod(tmp_path, FILE_MODE)
+                f = os.fdopen(fd, 'wb')
+                try:
+                    now = time.time()
+                    pickle.dump(now + timeout, f, pickle.HIGHEST_PROTOCOL)
+                    f.write(self.serializer.dumps(value))
+                finally:
+                    f.close()
+                file_move_safe(tmp_path, fname, allow_overwrite=True)
+                renamed = True
             finally:
-                f.close()
+                if not renamed:
+                    os.remove(tmp_path)
         except (IOError, OSError):
             pass
+        else:
+            self._num_entries += 1
+            self._writes += 1
 
     def delete(self, key, version=None):
         key = self.make_key(key, version=version)
@@ -81,6 +113,8 @@ class FileBasedCache(BaseCache):
 
     def _delete(self, fname):
         os.remove(fname)
+        # The estimate isn't decremented, since the file may have been
+        # written by another process and never counted by this one.
         try:
             # Remove the 2 subdirs if they're empty
             dirname = os.path.dirname(fname)
@@ -109,7 +143,14 @@ class FileBasedCache(BaseCache):
             return False
 
     def _cull(self):
-        if int(self._num_entries) < self._max_entries:
+        # The entries are only counted when the estimate kept since the last
+        # count shows there may be MAX_ENTRIES of them, or when it may have
+        # drifted too far from the entries written by other processes.
+        if (self._num_entries is None or self._num_entries >= self._max_entries or
+                self._writes >= max(self._max_entries // 10, 1)):
+            self._num_entries = self._get_num_entries()
+            self._writes = 0
+        if self._num_entries < self._max_entries:
             return
 
         try:
@@ -122,13 +163,18 @@ class FileBasedCache(BaseCache):
         else:
             doomed = [os.path.join(self._dir, k) for (i, k) in enumerate(filelist) if i % self._cull_frequency == 0]
 
+        removed = 0
         for topdir in doomed:
             try:
                 for root, _, files in os.walk(topdir):
                     for f in files:
                         self._delete(os.path.join(root, f))
+                        removed += 1
             except (IOError, OSError):
                 pass
+        # Keep the estimate below MAX_ENTRIES, so that the next write doesn't
+        # count the entries again.
+        self._num_entries -= removed
 
     def _createdir(self):
         try:
@@ -154,13 +200,14 @@ class FileBasedCache(BaseCache):
         for _,_,files in os.walk(self._dir):
             count += len(files)
         return count
-    _num_entries = property(_get_num_entries)
 
     def clear(self):
         try:
             shutil.rmtree(self._dir)
         except (IOError, OSError):
             pass
+        self._num_entries = 0
+        self._writes = 0
 
 # For backwards compatibility
 class CacheClass(FileBasedCache):
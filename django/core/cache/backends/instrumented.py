@@ -0,0 +1,127 @@
+"Cache backend recording statistics about the operations on another cache."
+
+import threading
+import time
+
+from django.core.cache.backends.base import CacheWrapper
+from django.core.cache.signals import cache_operation
+
+_missing = object()
+
+# Statistics of the instrumented caches, keyed by the name of the cache they
+# wrap, so that they are shared by the instances created by get_cache().
+_stats = {}
+_stats_lock = threading.Lock()
+
+def _new_stats():
+    return {'operations': {}, 'hits': 0, 'misses': 0, 'prefixes': {}}
+
+class InstrumentedCache(CacheWrapper):
+    """
+    Records the number and duration of the operations on the cache named by
+    LOCATION, and the hits and misses of its lookups. When the
+    PREFIX_SEPARATOR option is set, hits and misses are also counted for each
+    key prefix, which is the part of a key before the separator.
+
+    Every operation also sends the cache_operation signal.
+    """
+    def __init__(self, location, params):
+        CacheWrapper.__init__(self, location, params)
+        self._prefix_separator = params.get('OPTIONS', {}).get('PREFIX_SEPARATOR')
+        _stats_lock.acquire()
+        try:
+            self._stats = _stats.setdefault(location, _new_stats())
+        finally:
+            _stats_lock.release()
+
+    def _get_prefix(self, key):
+        return key.split(self._prefix_separator, 1)[0]
+
+    def _record(self, operation, start, hit_keys=(), missed_keys=()):
+        duration = time.time() - start
+        hits, misses = len(hit_keys), len(missed_keys)
+        _stats_lock.acquire()
+        try:
+            stats = self._stats
+            operation_stats = stats['operations'].setdefault(operation,
+                {'calls': 0, 'time': 0.0})
+            operation_stats['calls'] += 1
+            operation_stats['time'] += duration
+            stats['hits'] += hits
+            stats['misses'] += misses
+            if self._prefix_separator:
+                for keys, counter in ((hit_keys, 'hits'), (missed_keys, 'misses')):
+                    for key in keys:
+                        prefix_stats = stats['prefixes'].setdefault(
+                            self._get_prefix(key), {'hits': 0, 'misses': 0})
+                        prefix_stats[counter] += 1
+        finally:
+            _stats_lock.release()
+        cache_operation.send(sender=self.__class__, cache=self,
+                             operation=operation, duration=duration,
+                             hits=hits, misses=misses)
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of calls and the total time in
+        seconds spent in each operation, the number of hits and misses, the
+        hit ratio, and the hits and misses of each key prefix.
+        """
+        _stats_lock.acquire()
+        try:
+            stats = self._stats
+            operations = dict([(name, dict(operation_stats)) for name, operation_stats
+                               in stats['operations'].items()])
+            prefixes = dict([(prefix, dict(prefix_stats)) for prefix, prefix_stats
+                             in stats['prefixes'].items()])
+            hits, misses = stats['hits'], stats['misses']
+        finally:
+            _stats_lock.release()
+        lookups = hits + misses
+        return {
+            'operations': operations,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': lookups and float(hits) / lookups or 0.0,
+            'prefixes': prefixes,
+        }
+
+    def reset_stats(self):
+        _stats_lock.acquire()
+        try:
+            self._stats.update(_new_stats())
+        finally:
+            _stats_lock.release()
+
+    def _delegate(self, operation, *args, **kwargs):
+        start = time.time()
+        try:
+            return CacheWrapper._delegate(self, operation, *args, **kwargs)
+        finally:
+            self._record(operation, start)
+
+    def get(self, key, default=None, version=None):
+        start = time.time()
+        value = _missing
+        try:
+            value = self._cache.get(key, _missing, version=version)
+        finally:
+            if value is _missing:
+                self._record('get', start, missed_keys=[key])
+            else:
+                self._record('get', start, hit_keys=[key])
+        if value is _missing:
+            return default
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        start = time.time()
+        found = {}
+        try:
+            found = self._cache.get_many(keys, version=version)
+        finally:
+            hit_keys = [key for key in keys if key in found]
+            missed_keys = [key for key in keys if key not in found]
+            self._record('get_many', start, hit_keys, missed_keys)
+        return found
@@ -1,12 +1,10 @@
 "Thread-safe in-memory cache backend."
 
 import time
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle
 
 from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache.serializers import get_serializer, SerializationError
 from django.utils.synch import RWLock
 
 # Global in-memory store of cache data. Keyed by name, to provide
@@ -14,27 +12,105 @@ from django.utils.synch import RWLock
 _caches = {}
 _expire_info = {}
 _locks = {}
+_recency = {}
+_stats = {}
+
+class RecencyList(object):
+    """
+    Keeps track of keys in the order they were last used, with constant time
+    updates.
+
+    The keys are stored in a circular doubly linked list of ``[previous,
+    next, key]`` links, with a dictionary mapping each key to its link.
+    """
+    def __init__(self):
+        self._links = {}
+        self._root = root = []
+        root[:] = [root, root, None]
+
+    def __len__(self):
+        return len(self._links)
+
+    def touch(self, key):
+        """
+        Marks the key as the most recently used one.
+        """
+        root = self._root
+        link = self._links.get(key)
+        if link is None:
+            link = self._links[key] = [None, None, key]
+        else:
+            previous, next, key = link
+            previous[1] = next
+            next[0] = previous
+        last = root[0]
+        link[0], link[1] = last, root
+        last[1] = root[0] = link
+
+    def remove(self, key):
+        link = self._links.pop(key, None)
+        if link is not None:
+            previous, next, key = link
+            previous[1] = next
+            next[0] = previous
+
+    def oldest(self):
+        """
+        Returns the least recently used key, or None if there are no keys.
+        """
+        return self._root[1][2]
+
+    def clear(self):
+        self._links.clear()
+        root = self._root
+        root[:] = [root, root, None]
+
+def _sizeof(value):
+    # Values aren't strings when they are stored unserialized.
+    if isinstance(value, str):
+        return len(value)
+    return 0
 
 class LocMemCache(BaseCache):
+    """
+    An LRU cache: when MAX_ENTRIES is reached, the 1/CULL_FREQUENCY least
+    recently used entries are culled. The optional MAX_SIZE option limits the
+    approximate size in bytes of the stored (serialized) values.
+    """
     def __init__(self, name, params):
         BaseCache.__init__(self, params)
-        global _caches, _expire_info, _locks
+        global _caches, _expire_info, _locks, _recency, _stats
         self._cache = _caches.setdefault(name, {})
         self._expire_info = _expire_info.setdefault(name, {})
         self._lock = _locks.setdefault(name, RWLock())
+        self._recency = _recency.setdefault(name, RecencyList())
+        self._stats = _stats.setdefault(name,
+            {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0})
+
+        options = params.get('OPTIONS', {})
+        self.serializer = get_serializer(options, allow_objects=True)
+        max_size = params.get('max_size', options.get('MAX_SIZE'))
+        try:
+            self._max_size = int(max_size)
+        except (ValueError, TypeError):
+            self._max_size = None
+        if self._max_size is not None and self.serializer.stores_objects:
+            raise ImproperlyConfigured("The MAX_SIZE of local-memory caches "
+                "can't be enforced when the values aren't serialized.")
 
     def add(self, key, value, timeout=None, version=None):
         key = self.make_key(key, version=version)
         self.validate_key(key)
+        try:
+            pickled = self.serializer.dumps(value)
+        except SerializationError:
+            return False
         self._lock.writer_enters()
         try:
             exp = self._expire_info.get(key)
             if exp is None or exp <= time.time():
-                try:
-                    self._set(key, pickle.dumps(value), timeout)
-                    return True
-                except pickle.PickleError:
-                    pass
+                self._set(key, pickled, timeout)
+                return True
             return False
         finally:
             self._lock.writer_leaves()
@@ -42,45 +118,55 @@ class LocMemCache(BaseCache):
     def get(self, key, default=None, version=None):
         key = self.make_key(key, version=version)
         self.validate_key(key)
-        self._lock.reader_enters()
+        # Looking up a key updates its recency, so even reads need exclusive
+        # access to the cache.
+        self._lock.writer_enters()
         try:
             exp = self._expire_info.get(key)
             if exp is None:
-                return default
+                pickled = None
             elif exp > time.time():
-                try:
-                    return pickle.loads(self._cache[key])
-                except pickle.PickleError:
-                    return default
+                pickled = self._cache[key]
+                self._recency.touch(key)
+            else:
+                pickled = None
+                self._delete(key)
+            if pickled is None:
+                self._stats['misses'] += 1
+                return default
+            self._stats['hits'] += 1
         finally:
-            self._lock.reader_leaves()
-        self._lock.writer_enters()
+            self._lock.writer_leaves()
         try:
-            try:
-                del self._cache[key]
-                del self._expire_info[key]
-            except KeyError:
-                pass
+            return self.serializer.loads(pickled)
+        except ValueError:
             return default
-        finally:
-            self._lock.writer_leaves()
 
     def _set(self, key, value, timeout=None):
-        if len(self._cache) >= self._max_entries:
+        if key in self._cache:
+            self._delete(key)
+        elif len(self._cache) >= self._max_entries:
             self._cull()
         if timeout is None:
             timeout = self.default_timeout
         self._cache[key] = value
         self._expire_info[key] = time.time() + timeout
+        self._recency.touch(key)
+        self._stats['size'] += len(key) + _sizeof(value)
+        if self._max_size is not None:
+            while self._stats['size'] > self._max_size and len(self._cache) > 1:
+                self._evict(1)
 
     def set(self, key, value, timeout=None, version=None):
         key = self.make_key(key, version=version)
         self.validate_key(key)
+        try:
+            pickled = self.serializer.dumps(value)
+        except SerializationError:
+            return
         self._lock.writer_enters()
         try:
-            self._set(key, pickle.dumps(value), timeout)
-        except pickle.PickleError:
-            pass
+            self._set(key, pickled, timeout)
         finally:
             self._lock.writer_leaves()
 
@@ -99,32 +185,38 @@ class LocMemCache(BaseCache):
 
         self._lock.writer_enters()
         try:
-            try:
-                del self._cache[key]
-                del self._expire_info[key]
-            except KeyError:
-                pass
+            self._delete(key)
             return False
         finally:
             self._lock.writer_leaves()
 
     def _cull(self):
         if self._cull_frequency == 0:
-            self.clear()
+            self._evict(len(self._cache))
         else:
-            doomed = [k for (i, k) in enumerate(self._cache) if i % self._cull_frequency == 0]
-            for k in doomed:
-                self._delete(k)
+            self._evict(max(len(self._cache) // self._cull_frequency, 1))
+
+    def _evict(self, count):
+        """
+        Deletes the ``count`` least recently used entries.
+        """
+        for i in xrange(count):
+            key = self._recency.oldest()
+            if key is None:
+                break
+            self._delete(key)
+            self._stats['evictions'] += 1
 
     def _delete(self, key):
         try:
-            del self._cache[key]
+            self._stats['size'] -= len(key) + _sizeof(self._cache.pop(key))
         except KeyError:
             pass
         try:
             del self._expire_info[key]
         except KeyError:
             pass
+        self._recency.remove(key)
 
     def delete(self, key, version=None):
         key = self.make_key(key, version=version)
@@ -136,8 +228,27 @@ class LocMemCache(BaseCache):
             self._lock.writer_leaves()
 
     def clear(self):
-        self._cache.clear()
-        self._expire_info.clear()
+        self._lock.writer_enters()
+        try:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._recency.clear()
+            self._stats['size'] = 0
+        finally:
+            self._lock.writer_leaves()
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of hits, misses and evictions
+        since the process started, and the current number of entries and
+        their approximate size in bytes.
+        """
+        self._lock.reader_enters()
+        try:
+            stats = dict(self._stats, entries=len(self._cache))
+        finally:
+            self._lock.reader_leaves()
+        return stats
 
 # For backwards compatibility
 class CacheClass(LocMemCache):
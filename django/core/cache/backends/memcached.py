@@ -4,6 +4,10 @@ import time
 from threading import local
 
 from django.core.cache.backends.base import BaseCache, InvalidCacheBackendError
+from django.core.cache.serializers import get_serializer
+
+# Options handled by Django rather than by the memcached library.
+SERIALIZER_OPTIONS = ('SERIALIZER', 'PICKLE_PROTOCOL', 'COMPRESS_MIN_LENGTH', 'COMPRESS_LEVEL')
 
 class BaseMemcachedCache(BaseCache):
     def __init__(self, server, params, library, value_not_found_exception):
@@ -22,6 +26,16 @@ class BaseMemcachedCache(BaseCache):
         self._lib = library
         self._options = params.get('OPTIONS', None)
 
+        # Values are pickled by the memcached library unless a serializer or
+        # compression is configured.
+        self.serializer = None
+        if self._options:
+            if ('SERIALIZER' in self._options or
+                    'COMPRESS_MIN_LENGTH' in self._options):
+                self.serializer = get_serializer(self._options)
+            self._options = dict([(name, value) for name, value in self._options.items()
+                                  if name not in SERIALIZER_OPTIONS])
+
     @property
     def _cache(self):
         """
@@ -48,20 +62,31 @@ class BaseMemcachedCache(BaseCache):
             timeout += int(time.time())
         return int(timeout)
 
+    def _dumps(self, value):
+        # Integers are left to the library, so that incr() and decr() work.
+        if self.serializer is None or type(value) in (int, long):
+            return value
+        return self.serializer.dumps(value)
+
+    def _loads(self, value):
+        if self.serializer is None or not isinstance(value, str):
+            return value
+        return self.serializer.loads(value)
+
     def add(self, key, value, timeout=0, version=None):
         key = self.make_key(key, version=version)
-        return self._cache.add(key, value, self._get_memcache_timeout(timeout))
+        return self._cache.add(key, self._dumps(value), self._get_memcache_timeout(timeout))
 
     def get(self, key, default=None, version=None):
         key = self.make_key(key, version=version)
         val = self._cache.get(key)
         if val is None:
             return default
-        return val
+        return self._loads(val)
 
     def set(self, key, value, timeout=0, version=None):
         key = self.make_key(key, version=version)
-        self._cache.set(key, value, self._get_memcache_timeout(timeout))
+        self._cache.set(key, self._dumps(value), self._get_memcache_timeout(timeout))
 
     def delete(self, key, version=None):
         key = self.make_key(key, version=version)
@@ -74,7 +99,7 @@ class BaseMemcachedCache(BaseCache):
             _ = {}
             m = dict(zip(new_keys, keys))
             for k, v in ret.items():
-                _[m[k]] = v
+                _[m[k]] = self._loads(v)
             ret = _
         return ret
 
@@ -115,7 +140,7 @@ class BaseMemcachedCache(BaseCache):
         safe_data = {}
         for key, value in data.items():
             key = self.make_key(key, version=version)
-            safe_data[key] = value
+            safe_data[key] = self._dumps(value)
         self._cache.set_multi(safe_data, self._get_memcache_timeout(timeout))
 
     def delete_many(self, keys, version=None):
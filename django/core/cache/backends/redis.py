@@ -0,0 +1,381 @@
+"""
+Redis cache backend.
+
+Talks to a server speaking the Redis protocol through a pool of connections
+shared by the threads of a process. The methods acting on several keys send
+all their commands at once and then read the replies.
+"""
+import os
+import re
+import socket
+import threading
+
+from django.core.cache.backends.base import BaseCache, InvalidCacheBackendError
+from django.core.cache.serializers import get_serializer
+
+# Serialized values are prefixed with this marker, so that they can't be
+# mistaken for integers, which are stored as such for INCRBY.
+SERIALIZED_MARKER = ':'
+
+# The number of keys clear() asks the server to look at in each SCAN.
+SCAN_COUNT = 1000
+
+# Increments a key only if it exists, since INCRBY creates missing keys.
+INCR_SCRIPT = ("if redis.call('exists', KEYS[1]) == 1 then "
+               "return redis.call('incrby', KEYS[1], ARGV[1]) end")
+
+class ResponseError(Exception):
+    "An error reply from the server."
+    pass
+
+class Connection(object):
+    """
+    A connection to the server, opened when first used.
+    """
+    def __init__(self, host='localhost', port=6379, path=None, db=0,
+                 password=None, socket_timeout=None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.db = db
+        self.password = password
+        self.socket_timeout = socket_timeout
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        if self.path:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.socket_timeout)
+            sock.connect(self.path)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.settimeout(self.socket_timeout)
+            sock.connect((self.host, self.port))
+        self._sock = sock
+        self._file = sock.makefile('rb')
+        commands = []
+        if self.password:
+            commands.append(('AUTH', self.password))
+        if self.db:
+            commands.append(('SELECT', self.db))
+        if commands:
+            self.send_commands(commands)
+            for command in commands:
+                reply = self.read_reply()
+                if isinstance(reply, ResponseError):
+                    self.disconnect()
+                    raise reply
+
+    def disconnect(self):
+        if self._sock is not None:
+            try:
+                self._file.close()
+                self._sock.close()
+            except socket.error:
+                pass
+            self._sock = None
+            self._file = None
+
+    def pack_command(self, args):
+        """
+        Encodes a command in the protocol's request format.
+        """
+        output = ['*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, unicode):
+                arg = arg.encode('utf-8')
+            elif not isinstance(arg, str):
+                arg = str(arg)
+            output.append('$%d\r\n%s\r\n' % (len(arg), arg))
+        return ''.join(output)
+
+    def send_commands(self, commands):
+        """
+        Sends several commands in one write, without waiting for the replies.
+        """
+        if self._sock is None:
+            self.connect()
+        self._sock.sendall(''.join([self.pack_command(args) for args in commands]))
+
+    def read_reply(self):
+        """
+        Reads a reply. Error replies are returned as ResponseError instances
+        rather than raised, so that the following replies can still be read.
+        """
+        line = self._file.readline()
+        if not line.endswith('\r\n'):
+            raise socket.error("Connection closed by the server.")
+        kind, line = line[0], line[1:-2]
+        if kind == '+':
+            return line
+        elif kind == '-':
+            return ResponseError(line)
+        elif kind == ':':
+            return int(line)
+        elif kind == '$':
+            length = int(line)
+            if length == -1:
+                return None
+            data = self._file.read(length + 2)
+            if len(data) != length + 2:
+                raise socket.error("Connection closed by the server.")
+            return data[:-2]
+        elif kind == '*':
+            length = int(line)
+            if length == -1:
+                return None
+            return [self.read_reply() for i in xrange(length)]
+        raise socket.error("Protocol error, got %r as reply type byte." % kind)
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of connections, keeping at most max_connections idle
+    ones around.
+    """
+    def __init__(self, max_connections=10, **connection_kwargs):
+        self.max_connections = max_connections
+        self.connection_kwargs = connection_kwargs
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []
+
+    def get_connection(self):
+        self._lock.acquire()
+        try:
+            # Connections mustn't be shared with a forked process.
+            if self._pid != os.getpid():
+                self._reset()
+            if self._idle:
+                return self._idle.pop()
+        finally:
+            self._lock.release()
+        return Connection(**self.connection_kwargs)
+
+    def release(self, connection):
+        self._lock.acquire()
+        try:
+            if self._pid == os.getpid() and len(self._idle) < self.max_connections:
+                self._idle.append(connection)
+                return
+        finally:
+            self._lock.release()
+        connection.disconnect()
+
+    def disconnect(self):
+        self._lock.acquire()
+        try:
+            idle, self._idle = self._idle, []
+        finally:
+            self._lock.release()
+        for connection in idle:
+            connection.disconnect()
+
+# Connection pools, shared by the cache instances using the same server.
+_pools = {}
+_pools_lock = threading.Lock()
+
+class RedisCache(BaseCache):
+    """
+    LOCATION is either ``host:port`` or ``unix:/path/to/socket``. The DB,
+    PASSWORD, MAX_CONNECTIONS and SOCKET_TIMEOUT options configure the
+    connections.
+    """
+    def __init__(self, server, params):
+        BaseCache.__init__(self, params)
+        options = params.get('OPTIONS', {})
+        self.serializer = get_serializer(options)
+
+        kwargs = {
+            'db': int(options.get('DB', 0)),
+            'password': options.get('PASSWORD'),
+            'socket_timeout': options.get('SOCKET_TIMEOUT'),
+        }
+        if server.startswith('unix:'):
+            kwargs['path'] = server[5:]
+        else:
+            host, _, port = (server or 'localhost').partition(':')
+            try:
+                kwargs['host'], kwargs['port'] = host, int(port or 6379)
+            except ValueError:
+                raise InvalidCacheBackendError("Invalid Redis server '%s'" % server)
+        max_connections = int(options.get('MAX_CONNECTIONS', 10))
+
+        pool_key = (server, kwargs['db'], kwargs['password'], kwargs['socket_timeout'])
+        _pools_lock.acquire()
+        try:
+            if pool_key not in _pools:
+                _pools[pool_key] = ConnectionPool(max_connections, **kwargs)
+            self._pool = _pools[pool_key]
+        finally:
+            _pools_lock.release()
+
+    def _execute(self, *commands):
+        """
+        Sends the commands in a pipeline and returns their replies.
+        """
+        connection = self._pool.get_connection()
+        try:
+            connection.send_commands(commands)
+            replies = [connection.read_reply() for args in commands]
+        except:
+            # The connection is in an unknown state, don't reuse it.
+            connection.disconnect()
+            raise
+        self._pool.release(connection)
+        for reply in replies:
+            if isinstance(reply, ResponseError):
+                raise reply
+        return replies
+
+    def _get_timeout(self, timeout):
+        """
+        Returns the expiration time in seconds. Values with a timeout of zero
+        or less expire at once, and so aren't stored at all.
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        return int(timeout)
+
+    def _dumps(self, value):
+        # Integers are stored as such so that the server can increment them.
+        if type(value) in (int, long):
+            return str(value)
+        return SERIALIZED_MARKER + self.serializer.dumps(value)
+
+    def _loads(self, data):
+        if data.startswith(SERIALIZED_MARKER):
+            return self.serializer.loads(data[len(SERIALIZED_MARKER):])
+        return int(data)
+
+    def add(self, key, value, timeout=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._get_timeout(timeout)
+        if timeout <= 0:
+            exists, = self._execute(('EXISTS', key))
+            return not exists
+        reply, = self._execute(('SET', key, self._dumps(value), 'EX', timeout, 'NX'))
+        return reply is not None
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        data, = self._execute(('GET', key))
+        if data is None:
+            return default
+        try:
+            return self._loads(data)
+        except ValueError:
+            return default
+
+    def set(self, key, value, timeout=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout = self._get_timeout(timeout)
+        if timeout <= 0:
+            self._execute(('DEL', key))
+        else:
+            self._execute(('SET', key, self._dumps(value), 'EX', timeout))
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._execute(('DEL', key))
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        new_keys = []
+        for key in keys:
+            new_key = self.make_key(key, version=version)
+            self.validate_key(new_key)
+            new_keys.append(new_key)
+        values, = self._execute(('MGET',) + tuple(new_keys))
+        d = {}
+        for key, data in zip(keys, values):
+            if data is not None:
+                try:
+                    d[key] = self._loads(data)
+                except ValueError:
+                    pass
+        return d
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        exists, = self._execute(('EXISTS', key))
+        return bool(exists)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        # The script doesn't create missing keys, unlike INCRBY.
+        try:
+            value, = self._execute(('EVAL', INCR_SCRIPT, 1, key, delta))
+        except ResponseError, e:
+            raise ValueError("Key '%s' can't be incremented: %s" % (key, e))
+        if value is None:
+            raise ValueError("Key '%s' not found" % key)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def set_many(self, data, timeout=None, version=None):
+        timeout = self._get_timeout(timeout)
+        if timeout <= 0:
+            self.delete_many(data.keys(), version=version)
+            return
+        commands = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            commands.append(('SET', key, self._dumps(value), 'EX', timeout))
+        if commands:
+            self._execute(*commands)
+
+    def delete_many(self, keys, version=None):
+        new_keys = []
+        for key in keys:
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            new_keys.append(key)
+        if new_keys:
+            self._execute(('DEL',) + tuple(new_keys))
+
+    def incr_version(self, key, delta=1, version=None):
+        """
+        Renames the key to the new version on the server, which is atomic
+        and keeps its expiration time.
+        """
+        if version is None:
+            version = self.version
+        old_key = self.make_key(key, version=version)
+        new_key = self.make_key(key, version=version + delta)
+        self.validate_key(new_key)
+        try:
+            self._execute(('RENAME', old_key, new_key))
+        except ResponseError:
+            raise ValueError("Key '%s' not found" % key)
+        return version + delta
+
+    def clear(self):
+        """
+        Deletes the keys starting with KEY_PREFIX followed by a colon, the
+        keys made by the default key function, rather than the whole
+        database, which may be shared with other caches or applications.
+        """
+        pattern = re.sub(r'([\\*?[\]])', r'\\\1', self.key_prefix) + ':*'
+        cursor = '0'
+        while True:
+            (cursor, keys), = self._execute(('SCAN', cursor, 'MATCH', pattern,
+                                             'COUNT', SCAN_COUNT))
+            if keys:
+                self._execute(('DEL',) + tuple(keys))
+            if cursor == '0':
+                break
@@ -0,0 +1,123 @@
+"Two-tier cache backend: a local-memory cache in front of a shared cache."
+
+from django.core.cache.backends.base import CacheWrapper
+from django.core.cache.backends.locmem import LocMemCache
+
+_missing = object()
+
+def _local_key_func(key, key_prefix, version):
+    # Keys are already complete when they reach the local tier.
+    return key
+
+class TieredCache(CacheWrapper):
+    """
+    Keeps recently used values in a per-process local-memory cache in front of
+    the shared cache named by LOCATION.
+
+    Writes go through to both tiers. Local entries live at most LOCAL_TIMEOUT
+    seconds, which bounds how long a value changed by another process may be
+    served from the local tier. The other OPTIONS, such as MAX_ENTRIES or
+    SERIALIZER, apply to the local tier; expiration times are those of the
+    shared cache. A value read from the shared cache is kept locally for
+    LOCAL_TIMEOUT seconds, even if it expires sooner in the shared cache.
+    """
+    def __init__(self, location, params):
+        CacheWrapper.__init__(self, location, params)
+        options = params.get('OPTIONS', {})
+        local_timeout = params.get('local_timeout', options.get('LOCAL_TIMEOUT', 5))
+        try:
+            self._local_timeout = int(local_timeout)
+        except (ValueError, TypeError):
+            self._local_timeout = 5
+        local_options = dict(options)
+        local_options.update({
+            'MAX_ENTRIES': self._max_entries,
+            'CULL_FREQUENCY': self._cull_frequency,
+        })
+        self._local = LocMemCache('tiered:%s' % location, {
+            'OPTIONS': local_options,
+            'KEY_FUNCTION': _local_key_func,
+        })
+
+    def _get_local_key(self, key, version):
+        # The local tier stores the values under the keys of the shared
+        # cache, so that they're made with its prefix and version.
+        return self._cache.make_key(key, version=version)
+
+    def _get_local_timeout(self, timeout):
+        if timeout is None:
+            return self._local_timeout
+        return min(timeout, self._local_timeout)
+
+    def add(self, key, value, timeout=None, version=None):
+        local_key = self._get_local_key(key, version)
+        if self._cache.add(key, value, timeout, version=version):
+            self._local.set(local_key, value, self._get_local_timeout(timeout))
+            return True
+        # Another process holds a value we may not have seen yet.
+        self._local.delete(local_key)
+        return False
+
+    def get(self, key, default=None, version=None):
+        local_key = self._get_local_key(key, version)
+        value = self._local.get(local_key, _missing)
+        if value is _missing:
+            value = self._cache.get(key, _missing, version=version)
+            if value is _missing:
+                return default
+            self._local.set(local_key, value, self._local_timeout)
+        return value
+
+    def set(self, key, value, timeout=None, version=None):
+        self._cache.set(key, value, timeout, version=version)
+        self._local.set(self._get_local_key(key, version), value,
+                        self._get_local_timeout(timeout))
+
+    def delete(self, key, version=None):
+        self._cache.delete(key, version=version)
+        self._local.delete(self._get_local_key(key, version))
+
+    def get_many(self, keys, version=None):
+        d = {}
+        missing = {}
+        for key in keys:
+            local_key = self._get_local_key(key, version)
+            value = self._local.get(local_key, _missing)
+            if value is _missing:
+                missing[key] = local_key
+            else:
+                d[key] = value
+        if missing:
+            found = self._cache.get_many(missing.keys(), version=version)
+            for key, value in found.items():
+                self._local.set(missing[key], value, self._local_timeout)
+                d[key] = value
+        return d
+
+    def has_key(self, key, version=None):
+        return (self._local.has_key(self._get_local_key(key, version)) or
+                self._cache.has_key(key, version=version))
+
+    def incr(self, key, delta=1, version=None):
+        # The shared cache does the arithmetic so that concurrent increments
+        # from other processes aren't lost.
+        self._local.delete(self._get_local_key(key, version))
+        return self._cache.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def set_many(self, data, timeout=None, version=None):
+        self._cache.set_many(data, timeout, version=version)
+        local_timeout = self._get_local_timeout(timeout)
+        for key, value in data.items():
+            self._local.set(self._get_local_key(key, version), value, local_timeout)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._cache.delete_many(keys, version=version)
+        self._local.delete_many([self._get_local_key(key, version) for key in keys])
+
+    def clear(self):
+        self._cache.clear()
+        self._local.clear()
@@ -0,0 +1,167 @@
+"""
+Serializers turning cache values into strings, and back.
+
+A cache backend gets its serializer from the SERIALIZER option of its
+CACHES entry, which is either one of the names in SERIALIZERS or the import
+path of a BaseSerializer subclass. When the COMPRESS_MIN_LENGTH option is set,
+serialized values at least that long are compressed with zlib.
+"""
+import marshal
+import zlib
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import importlib, simplejson
+
+SERIALIZERS = {
+    'pickle': 'django.core.cache.serializers.PickleSerializer',
+    'json': 'django.core.cache.serializers.JSONSerializer',
+    'marshal': 'django.core.cache.serializers.MarshalSerializer',
+    'none': 'django.core.cache.serializers.DummySerializer',
+}
+
+class SerializationError(pickle.PicklingError):
+    """
+    Raised by the dumps() method of serializers for values they can't
+    serialize. It subclasses PicklingError, which the backends raised for
+    such values before serializers were pluggable.
+    """
+    pass
+
+class BaseSerializer(object):
+    """
+    Serializers are instantiated with the OPTIONS of the cache and must
+    implement dumps() and loads(). dumps() raises SerializationError for the
+    values it can't serialize. Errors raised by loads() are treated as cache
+    misses if they are subclasses of ValueError.
+    """
+    # Whether dumps() returns the values themselves rather than strings, in
+    # which case only the local-memory backend can use the serializer.
+    stores_objects = False
+
+    def __init__(self, options):
+        self.options = options
+
+    def dumps(self, value):
+        raise NotImplementedError
+
+    def loads(self, data):
+        raise NotImplementedError
+
+class PickleSerializer(BaseSerializer):
+    """
+    Pickles values, using the protocol given by the PICKLE_PROTOCOL option or
+    the highest one available.
+    """
+    def __init__(self, options):
+        super(PickleSerializer, self).__init__(options)
+        self.protocol = options.get('PICKLE_PROTOCOL', pickle.HIGHEST_PROTOCOL)
+
+    def dumps(self, value):
+        try:
+            return pickle.dumps(value, self.protocol)
+        except (pickle.PickleError, TypeError), e:
+            raise SerializationError(e)
+
+    def loads(self, data):
+        try:
+            return pickle.loads(data)
+        except pickle.UnpicklingError, e:
+            raise ValueError(e)
+
+class JSONSerializer(BaseSerializer):
+    """
+    Stores values as JSON. Only lists, dictionaries, strings, numbers,
+    booleans and None can be cached, and strings are returned as unicode.
+    """
+    def dumps(self, value):
+        try:
+            return simplejson.dumps(value, separators=(',', ':'))
+        except (TypeError, ValueError), e:
+            raise SerializationError(e)
+
+    def loads(self, data):
+        return simplejson.loads(data)
+
+class MarshalSerializer(BaseSerializer):
+    """
+    Uses the fast marshal module, which only handles Python's builtin types.
+    """
+    def dumps(self, value):
+        try:
+            return marshal.dumps(value)
+        except ValueError, e:
+            raise SerializationError(e)
+
+    def loads(self, data):
+        try:
+            return marshal.loads(data)
+        except (EOFError, TypeError), e:
+            raise ValueError(e)
+
+class DummySerializer(BaseSerializer):
+    """
+    Stores the values themselves, for the local-memory backend only. Values
+    read from the cache are the stored objects, not copies of them.
+    """
+    stores_objects = True
+
+    def dumps(self, value):
+        return value
+
+    def loads(self, data):
+        return data
+
+class CompressingSerializer(BaseSerializer):
+    """
+    Wraps another serializer to compress the values it serializes that are at
+    least COMPRESS_MIN_LENGTH bytes long, with zlib at COMPRESS_LEVEL.
+    """
+    def __init__(self, options, serializer):
+        super(CompressingSerializer, self).__init__(options)
+        self.serializer = serializer
+        self.min_length = int(options['COMPRESS_MIN_LENGTH'])
+        self.level = int(options.get('COMPRESS_LEVEL', 6))
+
+    def dumps(self, value):
+        data = self.serializer.dumps(value)
+        if len(data) >= self.min_length:
+            return 'z' + zlib.compress(data, self.level)
+        return 'r' + data
+
+    def loads(self, data):
+        if data[:1] == 'z':
+            try:
+                data = zlib.decompress(data[1:])
+            except zlib.error, e:
+                raise ValueError(e)
+        else:
+            data = data[1:]
+        return self.serializer.loads(data)
+
+def get_serializer(options, default='pickle', allow_objects=False):
+    """
+    Returns the serializer configured by the given cache OPTIONS. Serializers
+    storing the values themselves are only allowed if allow_objects is True.
+    """
+    path = options.get('SERIALIZER', default)
+    path = SERIALIZERS.get(path, path)
+    try:
+        module_path, class_name = path.rsplit('.', 1)
+        serializer_class = getattr(importlib.import_module(module_path), class_name)
+    except (AttributeError, ImportError, ValueError), e:
+        raise ImproperlyConfigured('Error importing cache serializer %s: "%s"' % (path, e))
+    if serializer_class.stores_objects:
+        if not allow_objects:
+            raise ImproperlyConfigured("The cache serializer %s stores the values "
+                "themselves, which only the local-memory backend can do." % path)
+        if options.get('COMPRESS_MIN_LENGTH') is not None:
+            raise ImproperlyConfigured("The values stored by the cache "
+                "serializer %s can't be compressed." % path)
+    serializer = serializer_class(options)
+    if options.get('COMPRESS_MIN_LENGTH') is not None:
+        serializer = CompressingSerializer(options, serializer)
+    return serializer
@@ -0,0 +1,3 @@
+from django.dispatch import Signal
+
+cache_operation = Signal(providing_args=["cache", "operation", "duration", "hits", "misses"])
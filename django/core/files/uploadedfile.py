@@ -58,10 +58,10 @@ class TemporaryUploadedFile(UploadedFile):
     """
     A file uploaded to a temporary location (i.e. stream-to-disk).
     """
-    def __init__(self, name, content_type, size, charset):
-        if settings.FILE_UPLOAD_TEMP_DIR:
-            file = tempfile.NamedTemporaryFile(suffix='.upload',
-                dir=settings.FILE_UPLOAD_TEMP_DIR)
+    def __init__(self, name, content_type, size, charset, temp_dir=None):
+        temp_dir = temp_dir or settings.FILE_UPLOAD_TEMP_DIR
+        if temp_dir:
+            file = tempfile.NamedTemporaryFile(suffix='.upload', dir=temp_dir)
         else:
             file = tempfile.NamedTemporaryFile(suffix='.upload')
         super(TemporaryUploadedFile, self).__init__(file, name, content_type, size, charset)
@@ -2,6 +2,8 @@
 Base file upload handler classes, and the built-in concrete subclasses
 """
 
+import errno
+import os
 try:
     from cStringIO import StringIO
 except ImportError:
@@ -14,7 +16,7 @@ from django.utils import importlib
 
 __all__ = ['UploadFileException','StopUpload', 'SkipFile', 'FileUploadHandler',
            'TemporaryFileUploadHandler', 'MemoryFileUploadHandler',
-           'load_handler', 'StopFutureHandlers']
+           'StorageFileUploadHandler', 'load_handler', 'StopFutureHandlers']
 
 class UploadFileException(Exception):
     """
@@ -142,6 +144,90 @@ class TemporaryFileUploadHandler(FileUploadHandler):
         self.file.size = file_size
         return self.file
 
+class StorageFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler that streams data into a temporary file next to the
+    directory of a storage, so that saving the file to that storage (e.g. by
+    saving a ``FileField``) is an atomic rename instead of another copy.
+
+    Uploads are left to the following handlers if the storage doesn't support
+    local filesystem paths.
+    """
+    #: The storage the uploaded files will be saved to, ``default_storage``
+    #: if ``None``.
+    storage = None
+    #: The directory holding files being uploaded. If ``None``, the
+    #: FILE_UPLOAD_TEMP_DIR setting or, if that isn't set either, a directory
+    #: named after the root of the storage with an ``.uploads`` suffix. It
+    #: must not be served by the Web server.
+    temp_dir = None
+
+    def __init__(self, request=None, storage=None):
+        super(StorageFileUploadHandler, self).__init__(request)
+        if storage is not None:
+            self.storage = storage
+        if self.storage is None:
+            from django.core.files.storage import default_storage
+            self.storage = default_storage
+        self.file = None
+
+    def get_upload_dir(self):
+        """
+        Returns the directory holding files being uploaded. It's outside the
+        root of the storage, so that partial uploads can't be downloaded.
+        """
+        root = os.path.abspath(self.storage.path(''))
+        return (self.temp_dir or settings.FILE_UPLOAD_TEMP_DIR or
+                root.rstrip(os.sep) + '.uploads')
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        try:
+            self.upload_dir = self.get_upload_dir()
+        except NotImplementedError:
+            self.activated = False
+        else:
+            self.activated = True
+
+    def new_file(self, file_name, *args, **kwargs):
+        if not self.activated:
+            return
+        FileUploadHandler.new_file(self, file_name, *args, **kwargs)
+        self.discard_file()
+        # Note that there is a race between os.path.exists and os.makedirs,
+        # see FileSystemStorage._save().
+        if not os.path.exists(self.upload_dir):
+            try:
+                os.makedirs(self.upload_dir)
+            except OSError, e:
+                if e.errno != errno.EEXIST:
+                    raise
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type,
+                0, self.charset, temp_dir=self.upload_dir)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.activated:
+            self.file.write(raw_data)
+        else:
+            return raw_data
+
+    def file_complete(self, file_size):
+        if self.activated:
+            file = super(StorageFileUploadHandler, self).file_complete(file_size)
+            self.file = None
+            return file
+
+    def upload_complete(self):
+        # Files which were skipped, or whose upload was stopped, aren't used.
+        self.discard_file()
+
+    def discard_file(self):
+        """
+        Deletes the temporary file of an incomplete upload.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
 class MemoryFileUploadHandler(FileUploadHandler):
     """
     File upload handler to stream uploads into memory (used for small files).
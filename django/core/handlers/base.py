@@ -13,6 +13,7 @@ class BaseHandler(object):
     # Changes that are always applied to a response (in this order).
     response_fixes = [
         http.fix_location_header,
+        http.serve_byte_ranges,
         http.conditional_content_removal,
         http.fix_IE_for_attach,
         http.fix_IE_for_vary,
@@ -148,6 +148,7 @@ class ModPythonHandler(BaseHandler):
 
         set_script_prefix(req.get_options().get('django.root', ''))
         signals.request_started.send(sender=self.__class__)
+        response = None
         try:
             try:
                 request = self.request_class(req)
@@ -162,7 +163,12 @@ class ModPythonHandler(BaseHandler):
             else:
                 response = self.get_response(request)
         finally:
-            signals.request_finished.send(sender=self.__class__)
+            if response is not None and getattr(response, 'streaming', False):
+                # The response is rendered while it's sent, so the request
+                # only finishes when the response is closed.
+                response._handler_class = self.__class__
+            else:
+                signals.request_finished.send(sender=self.__class__)
 
         # Convert our custom HttpResponse object back into the mod_python req.
         req.content_type = response['Content-Type']
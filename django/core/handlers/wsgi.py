@@ -227,6 +227,7 @@ class WSGIHandler(base.BaseHandler):
 
         set_script_prefix(base.get_script_name(environ))
         signals.request_started.send(sender=self.__class__)
+        response = None
         try:
             try:
                 request = self.request_class(environ)
@@ -241,7 +242,12 @@ class WSGIHandler(base.BaseHandler):
             else:
                 response = self.get_response(request)
         finally:
-            signals.request_finished.send(sender=self.__class__)
+            if response is not None and getattr(response, 'streaming', False):
+                # The response is rendered while it's sent, so the request
+                # only finishes when the response is closed.
+                response._handler_class = self.__class__
+            else:
+                signals.request_finished.send(sender=self.__class__)
 
         try:
             status_text = STATUS_CODE_TEXT[response.status_code]
@@ -252,4 +258,10 @@ class WSGIHandler(base.BaseHandler):
         for c in response.cookies.values():
             response_headers.append(('Set-Cookie', str(c.output(header=''))))
         start_response(status, response_headers)
+        if (isinstance(response, http.FileResponse) and
+                response.file is not None and response.ranges is None and
+                'wsgi.file_wrapper' in environ):
+            # Let the server send the file itself, e.g. using sendfile(2).
+            return environ['wsgi.file_wrapper'](response.file,
+                                                response.block_size)
         return response
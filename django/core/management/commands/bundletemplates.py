@@ -0,0 +1,110 @@
+import os
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.template import loader
+from django.template.loaders import app_directories, cached, filesystem
+from django.template.loaders.bundle import write_bundle
+
+BUNDLE_LOADER = 'django.template.loaders.bundle.Loader'
+
+class Command(BaseCommand):
+    option_list = BaseCommand.option_list + (
+        make_option('--extension', '-e', dest='extensions', action='append',
+            default=[], help='The file extension(s) of the templates to '
+                'bundle (default: all files). Separate multiple extensions '
+                'with commas, or use -e multiple times.'),
+    )
+    help = ("Parses the templates found by the filesystem and app directories "
+            "template loaders and writes them to a bundle file, read by the "
+            "bundle template loader.")
+    args = '[path]'
+
+    requires_model_validation = False
+
+    def handle(self, *args, **options):
+        if len(args) > 1:
+            raise CommandError("Usage is bundletemplates %s" % self.args)
+        path = args and args[0] or self.get_bundle_path()
+        if not path:
+            raise CommandError("Give the path of the bundle file, or configure "
+                               "the bundle loader in TEMPLATE_LOADERS.")
+        verbosity = int(options.get('verbosity', 1))
+        extensions = []
+        for extension in options.get('extensions'):
+            extensions.extend([e.strip() for e in extension.split(',') if e.strip()])
+        extensions = tuple(['.%s' % e.lstrip('.') for e in extensions])
+
+        # Templates are parsed with the other loaders, without debug
+        # information, which can't be serialized, nor profiling.
+        loaders = []
+        for loader_name in settings.TEMPLATE_LOADERS:
+            if self.get_loader_path(loader_name) is None:
+                template_loader = loader.find_template_loader(loader_name)
+                if template_loader is not None:
+                    loaders.append(template_loader)
+        old_loaders = loader.template_source_loaders
+        old_debug = settings.TEMPLATE_DEBUG
+        old_profile = settings.TEMPLATE_PROFILE
+        loader.template_source_loaders = tuple(loaders)
+        settings.TEMPLATE_DEBUG = False
+        settings.TEMPLATE_PROFILE = False
+        try:
+            templates = {}
+            for name in self.find_template_names(loaders, extensions):
+                try:
+                    templates[name] = loader.get_template(name)
+                except Exception, e:
+                    if verbosity >= 1:
+                        self.stderr.write("Skipped %s: %s\n" % (name, e))
+        finally:
+            loader.template_source_loaders = old_loaders
+            settings.TEMPLATE_DEBUG = old_debug
+            settings.TEMPLATE_PROFILE = old_profile
+
+        skipped = write_bundle(templates, path)
+        if verbosity >= 1:
+            for name in sorted(skipped):
+                self.stderr.write("Skipped %s: it can't be serialized.\n" % name)
+            self.stdout.write("Wrote %d templates to %s.\n"
+                              % (len(templates) - len(skipped), path))
+
+    def get_loader_path(self, loader_name):
+        """
+        Returns the path of the bundle file given to the bundle loader, or None
+        for other loaders.
+        """
+        if isinstance(loader_name, (tuple, list)) and loader_name[0] == BUNDLE_LOADER:
+            return loader_name[1]
+        return None
+
+    def get_bundle_path(self):
+        for loader_name in settings.TEMPLATE_LOADERS:
+            path = self.get_loader_path(loader_name)
+            if path is not None:
+                return path
+        return None
+
+    def get_template_dirs(self, loaders):
+        dirs = []
+        for template_loader in loaders:
+            if isinstance(template_loader, cached.Loader):
+                dirs.extend(self.get_template_dirs(template_loader.loaders))
+            elif isinstance(template_loader, filesystem.Loader):
+                dirs.extend(settings.TEMPLATE_DIRS)
+            elif isinstance(template_loader, app_directories.Loader):
+                dirs.extend(app_directories.app_template_dirs)
+        return dirs
+
+    def find_template_names(self, loaders, extensions):
+        names = set()
+        for template_dir in self.get_template_dirs(loaders):
+            template_dir = os.path.normpath(template_dir)
+            for dirpath, dirnames, filenames in os.walk(template_dir):
+                for filename in filenames:
+                    if extensions and not filename.endswith(extensions):
+                        continue
+                    name = os.path.join(dirpath, filename)[len(template_dir) + 1:]
+                    names.add(name.replace(os.sep, '/'))
+        return sorted(names)
@@ -1,9 +1,12 @@
 from __future__ import absolute_import
 
 import datetime
+import mimetypes
 import os
 import re
+import stat
 import time
+import uuid
 from pprint import pformat
 from urllib import urlencode, quote
 from urlparse import urljoin
@@ -113,12 +116,13 @@ class CompatCookie(SimpleCookie):
 
 from django.conf import settings
 from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files import uploadhandler
 from django.http.multipartparser import MultiPartParser
 from django.http.utils import *
 from django.utils.datastructures import MultiValueDict, ImmutableList
 from django.utils.encoding import smart_str, iri_to_uri, force_unicode
-from django.utils.http import cookie_date
+from django.utils.http import cookie_date, urlquote
 
 RESERVED_CHARS="!*'();:@&=+$,/?%#[]"
 
@@ -688,6 +692,177 @@ class HttpResponse(object):
             raise Exception("This %s instance cannot tell its position" % self.__class__)
         return sum([len(str(chunk)) for chunk in self._container])
 
+class FileResponse(HttpResponse):
+    """
+    An HTTP response whose content is read from a file-like object.
+
+    If the WSGI server provides ``wsgi.file_wrapper``, the file is handed to
+    it directly so that it can use platform-specific optimizations such as
+    ``sendfile(2)``. Otherwise the file is streamed in ``block_size`` chunks.
+    """
+    block_size = 8192
+    # The size of the file, if known.
+    size = None
+    # The inclusive (first, last) byte positions served in response to a
+    # Range request, or None if the whole file is served.
+    ranges = None
+
+    def __init__(self, file, mimetype=None, status=None, content_type=None,
+            block_size=None):
+        super(FileResponse, self).__init__(mimetype=mimetype, status=status,
+                content_type=content_type)
+        if block_size is not None:
+            self.block_size = block_size
+        self.file = file
+        self._container = self._read_chunks()
+        self._base_content_is_iter = True
+        try:
+            statobj = os.fstat(file.fileno())
+        except (AttributeError, OSError, IOError, ValueError):
+            pass
+        else:
+            if stat.S_ISREG(statobj.st_mode):
+                self._offset = file.tell()
+                self.size = statobj.st_size - self._offset
+                self['Content-Length'] = str(self.size)
+                self['Accept-Ranges'] = 'bytes'
+
+    def _read_chunks(self):
+        while True:
+            chunk = self.file.read(self.block_size)
+            if not chunk:
+                break
+            yield chunk
+
+    def _read_ranges(self, parts):
+        for prefix, first, last, suffix in parts:
+            if prefix:
+                yield prefix
+            self.file.seek(self._offset + first)
+            remaining = last - first + 1
+            while remaining > 0:
+                chunk = self.file.read(min(self.block_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+            if suffix:
+                yield suffix
+
+    def set_ranges(self, ranges):
+        """
+        Turns the response into a 206 (Partial Content) response containing
+        only the given inclusive ``(first, last)`` byte ranges of the file,
+        using a multipart/byteranges body for several ranges. Only these
+        parts of the file are read.
+        """
+        self.status_code = 206
+        self.ranges = ranges
+        if len(ranges) == 1:
+            first, last = ranges[0]
+            self['Content-Range'] = 'bytes %d-%d/%d' % (first, last, self.size)
+            parts = [('', first, last, '')]
+        else:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for first, last in ranges:
+                prefix = ('--%s\r\nContent-Type: %s\r\n'
+                          'Content-Range: bytes %d-%d/%d\r\n\r\n' %
+                          (boundary, self['Content-Type'], first, last,
+                           self.size))
+                parts.append((prefix, first, last, '\r\n'))
+            parts[-1] = parts[-1][:3] + ('\r\n--%s--\r\n' % boundary,)
+            self['Content-Type'] = ('multipart/byteranges; boundary=%s' %
+                                    boundary)
+        self['Content-Length'] = str(sum([
+            len(prefix) + last - first + 1 + len(suffix)
+            for prefix, first, last, suffix in parts]))
+        self._container = self._read_ranges(parts)
+
+    def _get_content(self):
+        # Middleware that inspects the content (e.g. for ETags or gzip)
+        # forces the remaining file contents into memory, so keep them
+        # around for the eventual iteration of the response.
+        if self._base_content_is_iter:
+            self._container = list(self._container)
+            self._base_content_is_iter = False
+            self.file.close()
+            self.file = None
+        return super(FileResponse, self)._get_content()
+
+    def _set_content(self, value):
+        super(FileResponse, self)._set_content(value)
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+        self.file = None
+
+    content = property(_get_content, _set_content)
+
+    def close(self):
+        super(FileResponse, self).close()
+        if self.file is not None:
+            self.file.close()
+
+class SendfileResponse(FileResponse):
+    """
+    An HTTP response for a file on the local filesystem.
+
+    If the SENDFILE_HEADER setting is set, the response carries no content and
+    only tells the front-end Web server which file to deliver (using
+    ``X-Sendfile`` or nginx's ``X-Accel-Redirect``). Otherwise the file is
+    streamed like a regular FileResponse.
+    """
+    def __init__(self, file, mimetype=None, status=None, content_type=None,
+            block_size=None):
+        if isinstance(file, basestring):
+            path = file
+        else:
+            try:
+                path = file.path
+            except (AttributeError, NotImplementedError):
+                # The file isn't stored on the local filesystem (e.g. a
+                # FieldFile using a remote storage), so it can only be
+                # streamed.
+                path = None
+        if not mimetype and not content_type:
+            name = path or getattr(file, 'name', None) or ''
+            mimetype = (mimetypes.guess_type(name)[0] or
+                        'application/octet-stream')
+        header = settings.SENDFILE_HEADER
+        if path is None or not header:
+            if isinstance(file, basestring):
+                file = open(path, 'rb')
+            super(SendfileResponse, self).__init__(file, mimetype=mimetype,
+                    status=status, content_type=content_type,
+                    block_size=block_size)
+            return
+        HttpResponse.__init__(self, mimetype=mimetype, status=status,
+                content_type=content_type)
+        if not isinstance(file, basestring):
+            # The front-end server opens the file itself.
+            file.close()
+        self.file = None
+        if header.lower() == 'x-accel-redirect':
+            self[header] = self._get_redirect_url(path)
+        else:
+            self[header] = smart_str(os.path.abspath(path))
+
+    def _get_redirect_url(self, path):
+        """
+        Maps the path of a file below SENDFILE_ROOT to its URL below
+        SENDFILE_URL (usually an ``internal`` nginx location).
+        """
+        if not settings.SENDFILE_ROOT or settings.SENDFILE_URL is None:
+            raise ImproperlyConfigured("The SENDFILE_ROOT and SENDFILE_URL "
+                "settings are required when using X-Accel-Redirect.")
+        root = os.path.join(os.path.abspath(settings.SENDFILE_ROOT), '')
+        path = os.path.abspath(path)
+        if not path.startswith(root):
+            raise ValueError("%r is not located below SENDFILE_ROOT (%r)." %
+                             (path, root))
+        relative_path = path[len(root):].replace(os.sep, '/')
+        return settings.SENDFILE_URL + urlquote(relative_path)
+
 class HttpResponseRedirect(HttpResponse):
     status_code = 302
 
@@ -7,7 +7,6 @@ file upload handlers for processing.
 
 import cgi
 from django.conf import settings
-from django.core.exceptions import SuspiciousOperation
 from django.utils.datastructures import MultiValueDict
 from django.utils.encoding import force_unicode
 from django.utils.text import unescape_entities
@@ -123,7 +122,7 @@ class MultiPartParser(object):
         self._files = MultiValueDict()
 
         # Instantiate the parser and stream:
-        stream = LazyStream(ChunkIter(self._input_data, self._chunk_size))
+        stream = ChunkIter(self._input_data, self._chunk_size)
 
         # Whether or not to signal a file-completion at the beginning of the loop.
         old_field_name = None
@@ -251,117 +250,6 @@ class MultiPartParser(object):
         """Cleanup filename from Internet Explorer full paths."""
         return filename and filename[filename.rfind("\\")+1:].strip()
 
-class LazyStream(object):
-    """
-    The LazyStream wrapper allows one to get and "unget" bytes from a stream.
-
-    Given a producer object (an iterator that yields bytestrings), the
-    LazyStream object will support iteration, reading, and keeping a "look-back"
-    variable in case you need to "unget" some bytes.
-    """
-    def __init__(self, producer, length=None):
-        """
-        Every LazyStream must have a producer when instantiated.
-
-        A producer is an iterable that returns a string each time it
-        is called.
-        """
-        self._producer = producer
-        self._empty = False
-        self._leftover = ''
-        self.length = length
-        self.position = 0
-        self._remaining = length
-        self._unget_history = []
-
-    def tell(self):
-        return self.position
-
-    def read(self, size=None):
-        def parts():
-            remaining = (size is not None and [size] or [self._remaining])[0]
-            # do the whole thing in one shot if no limit was provided.
-            if remaining is None:
-                yield ''.join(self)
-                return
-
-            # otherwise do some bookkeeping to return exactly enough
-            # of the stream and stashing any extra content we get from
-            # the producer
-            while remaining != 0:
-                assert remaining > 0, 'remaining bytes to read should never go negative'
-
-                chunk = self.next()
-
-                emitting = chunk[:remaining]
-                self.unget(chunk[remaining:])
-                remaining -= len(emitting)
-                yield emitting
-
-        out = ''.join(parts())
-        return out
-
-    def next(self):
-        """
-        Used when the exact number of bytes to read is unimportant.
-
-        This procedure just returns whatever is chunk is conveniently returned
-        from the iterator instead. Useful to avoid unnecessary bookkeeping if
-        performance is an issue.
-        """
-        if self._leftover:
-            output = self._leftover
-            self._leftover = ''
-        else:
-            output = self._producer.next()
-            self._unget_history = []
-        self.position += len(output)
-        return output
-
-    def close(self):
-        """
-        Used to invalidate/disable this lazy stream.
-
-        Replaces the producer with an empty list. Any leftover bytes that have
-        already been read will still be reported upon read() and/or next().
-        """
-        self._producer = []
-
-    def __iter__(self):
-        return self
-
-    def unget(self, bytes):
-        """
-        Places bytes back onto the front of the lazy stream.
-
-        Future calls to read() will return those bytes first. The
-        stream position and thus tell() will be rewound.
-        """
-        if not bytes:
-            return
-        self._update_unget_history(len(bytes))
-        self.position -= len(bytes)
-        self._leftover = ''.join([bytes, self._leftover])
-
-    def _update_unget_history(self, num_bytes):
-        """
-        Updates the unget history as a sanity check to see if we've pushed
-        back the same number of bytes in one chunk. If we keep ungetting the
-        same number of bytes many times (here, 50), we're mostly likely in an
-        infinite loop of some sort. This is usually caused by a
-        maliciously-malformed MIME request.
-        """
-        self._unget_history = [num_bytes] + self._unget_history[:49]
-        number_equal = len([current_number for current_number in self._unget_history
-                            if current_number == num_bytes])
-
-        if number_equal > 40:
-            raise SuspiciousOperation(
-                "The multipart parser got stuck, which shouldn't happen with"
-                " normal uploaded files. Check for malicious upload activity;"
-                " if there is none, report this to the Django developers."
-            )
-
 class ChunkIter(object):
     """
     An iterable that will yield chunks of data. Given a file-like object as the
@@ -385,121 +273,163 @@ class ChunkIter(object):
     def __iter__(self):
         return self
 
-class InterBoundaryIter(object):
+class BoundaryIter(object):
     """
-    A Producer that will iterate over boundaries.
+    An iterable over the payload of the current part of a multipart stream.
+
+    Yields the bytes of the part up to (but not including) the next boundary
+    and the line break preceding it. ``read()`` returns the whole remaining
+    payload at once.
     """
-    def __init__(self, stream, boundary):
-        self._stream = stream
-        self._boundary = boundary
+    def __init__(self, parser):
+        self._parser = parser
 
     def __iter__(self):
         return self
 
     def next(self):
-        try:
-            return LazyStream(BoundaryIter(self._stream, self._boundary))
-        except InputStreamExhausted:
+        chunk = self._parser._read_part()
+        if chunk is None:
             raise StopIteration()
+        return chunk
 
-class BoundaryIter(object):
+    def read(self):
+        return ''.join(self)
+
+class Parser(object):
     """
-    A Producer that is sensitive to boundaries.
+    Splits a multipart stream into its parts.
 
-    Will happily yield bytes until a boundary is found. Will yield the bytes
-    before the boundary, throw away the boundary bytes themselves, and push the
-    post-boundary bytes back on the stream.
+    The data produced by ``producer`` (an iterator yielding bytestrings) is
+    kept in a single buffer that is scanned for the boundary with
+    ``str.find``, starting at the current position, so that every byte of the
+    payload is copied as few times as possible no matter how many parts a
+    chunk contains.
 
-    The future calls to .next() after locating the boundary will raise a
-    StopIteration exception.
+    Iterating over the parser yields ``(item_type, meta_data, field_stream)``
+    tuples. A part's ``field_stream`` is only valid until the next part is
+    requested; any payload that hasn't been read by then is skipped.
     """
-
-    def __init__(self, stream, boundary):
-        self._stream = stream
-        self._boundary = boundary
-        self._done = False
-        # rollback an additional six bytes because the format is like
-        # this: CRLF<boundary>[--CRLF]
-        self._rollback = len(boundary) + 6
-
-        # Try to use mx fast string search if available. Otherwise
-        # use Python find. Wrap the latter for consistency.
-        unused_char = self._stream.read(1)
-        if not unused_char:
-            raise InputStreamExhausted()
-        self._stream.unget(unused_char)
+    def __init__(self, producer, boundary):
+        self._producer = iter(producer)
+        self._separator = '--' + boundary
+        # Payload bytes that can't be handed out yet because they might
+        # belong to a boundary (and the line break preceding it) that
+        # hasn't been completely read.
+        self._reserve = len(self._separator) + 1
+        self._buffer = ''
+        self._position = 0
+        self._eof = False
+        self._in_part = True
+
+    def _fill(self):
+        """
+        Reads the next chunk from the producer into the buffer, dropping the
+        bytes that have already been consumed. Returns False if the producer
+        is exhausted.
+        """
+        if self._eof:
+            return False
         try:
-            from mx.TextTools import FS
-            self._fs = FS(boundary).find
-        except ImportError:
-            self._fs = lambda data: data.find(boundary)
-
-    def __iter__(self):
-        return self
-
-    def next(self):
-        if self._done:
-            raise StopIteration()
-
-        stream = self._stream
-        rollback = self._rollback
-
-        bytes_read = 0
-        chunks = []
-        for bytes in stream:
-            bytes_read += len(bytes)
-            chunks.append(bytes)
-            if bytes_read > rollback:
-                break
-            if not bytes:
-                break
+            chunk = self._producer.next()
+        except StopIteration:
+            self._eof = True
+            return False
+        if self._position < len(self._buffer):
+            self._buffer = self._buffer[self._position:] + chunk
         else:
-            self._done = True
-
-        if not chunks:
-            raise StopIteration()
-
-        chunk = ''.join(chunks)
-        boundary = self._find_boundary(chunk, len(chunk) < self._rollback)
+            self._buffer = chunk
+        self._position = 0
+        return True
 
-        if boundary:
-            end, next = boundary
-            stream.unget(chunk[next:])
-            self._done = True
-            return chunk[:end]
-        else:
-            # make sure we dont treat a partial boundary (and
-            # its separators) as data
-            if not chunk[:-rollback]:# and len(chunk) >= (len(self._boundary) + 6):
-                # There's nothing left, we should just return and mark as done.
-                self._done = True
-                return chunk
-            else:
-                stream.unget(chunk[-rollback:])
-                return chunk[:-rollback]
-
-    def _find_boundary(self, data, eof = False):
+    def _read_part(self):
         """
-        Finds a multipart boundary in data.
-
-        Should no boundry exist in the data None is returned instead. Otherwise
-        a tuple containing the indices of the following are returned:
-
-         * the end of current encapsulation
-         * the start of the next encapsulation
+        Returns the next chunk of the payload of the current part, or None
+        once the boundary ending the part has been consumed.
         """
-        index = self._fs(data)
-        if index < 0:
-            return None
-        else:
-            end = index
-            next = index + len(self._boundary)
-            # backup over CRLF
-            if data[max(0,end-1)] == '\n':
-                end -= 1
-            if data[max(0,end-1)] == '\r':
-                end -= 1
-            return end, next
+        while self._in_part:
+            buffer, position = self._buffer, self._position
+            index = buffer.find(self._separator, position)
+            if index >= 0:
+                end = index
+                # Back up over the line break preceding the boundary.
+                if end > position and buffer[end - 1] == '\n':
+                    end -= 1
+                if end > position and buffer[end - 1] == '\r':
+                    end -= 1
+                self._position = index + len(self._separator)
+                self._in_part = False
+                return buffer[position:end]
+            safe_end = len(buffer) - self._reserve
+            if safe_end > position:
+                self._position = safe_end
+                return buffer[position:safe_end]
+            if not self._fill():
+                # The stream ended without a closing boundary.
+                self._position = len(buffer)
+                self._in_part = False
+                if position < len(buffer):
+                    return buffer[position:]
+        return None
+
+    def _parse_part(self, max_header_size):
+        """
+        Parses the headers at the start of the current part and returns its
+        ``(item_type, meta_data, field_stream)`` tuple.
+        """
+        while (len(self._buffer) - self._position < max_header_size and
+               self._fill()):
+            pass
+        position = self._position
+        # The headers must fit within ``max_header_size`` bytes and end before
+        # the next boundary.
+        header_end = self._buffer.find('\r\n\r\n', position,
+                                       position + max_header_size)
+        if (header_end == -1 or
+                self._buffer.find(self._separator, position, header_end) != -1):
+            # We find no header, so we just mark this fact and pass on
+            # the stream verbatim.
+            return (RAW, {}, BoundaryIter(self))
+
+        header = self._buffer[position:header_end]
+        # Throw away the CRLFCRLF bytes following the headers.
+        self._position = header_end + 4
+
+        TYPE = RAW
+        outdict = {}
+
+        # Eliminate blank lines
+        for line in header.split('\r\n'):
+            # This terminology ("main value" and "dictionary of
+            # parameters") is from the Python docs.
+            try:
+                name, (value, params) = _parse_header(line)
+            except:
+                continue
+
+            if name == 'content-disposition':
+                TYPE = FIELD
+                if params.get('filename'):
+                    TYPE = FILE
+
+            outdict[name] = value, params
+
+        if TYPE == RAW:
+            self._position = position
+
+        return (TYPE, outdict, BoundaryIter(self))
+
+    def __iter__(self):
+        # Skip everything up to the first boundary.
+        exhaust(BoundaryIter(self))
+        while True:
+            if self._position == len(self._buffer) and not self._fill():
+                return
+            self._in_part = True
+            item = self._parse_part(1024)
+            yield item
+            # Skip any payload the caller didn't consume.
+            exhaust(item[2])
 
 def exhaust(stream_or_iterable):
     """
@@ -519,74 +449,13 @@ def exhaust(stream_or_iterable):
     for __ in iterator:
         pass
 
-def parse_boundary_stream(stream, max_header_size):
-    """
-    Parses one and exactly one stream that encapsulates a boundary.
-    """
-    # Stream at beginning of header, look for end of header
-    # and parse it if found. The header must fit within one
-    # chunk.
-    chunk = stream.read(max_header_size)
-
-    # 'find' returns the top of these four bytes, so we'll
-    # need to munch them later to prevent them from polluting
-    # the payload.
-    header_end = chunk.find('\r\n\r\n')
-
-    def _parse_header(line):
-        main_value_pair, params = parse_header(line)
-        try:
-            name, value = main_value_pair.split(':', 1)
-        except:
-            raise ValueError("Invalid header: %r" % line)
-        return name, (value, params)
-
-    if header_end == -1:
-        # we find no header, so we just mark this fact and pass on
-        # the stream verbatim
-        stream.unget(chunk)
-        return (RAW, {}, stream)
-
-    header = chunk[:header_end]
-
-    # here we place any excess chunk back onto the stream, as
-    # well as throwing away the CRLFCRLF bytes from above.
-    stream.unget(chunk[header_end + 4:])
-
-    TYPE = RAW
-    outdict = {}
-
-    # Eliminate blank lines
-    for line in header.split('\r\n'):
-        # This terminology ("main value" and "dictionary of
-        # parameters") is from the Python docs.
-        try:
-            name, (value, params) = _parse_header(line)
-        except:
-            continue
-
-        if name == 'content-disposition':
-            TYPE = FIELD
-            if params.get('filename'):
-                TYPE = FILE
-
-        outdict[name] = value, params
-
-    if TYPE == RAW:
-        stream.unget(chunk)
-
-    return (TYPE, outdict, stream)
-
-class Parser(object):
-    def __init__(self, stream, boundary):
-        self._stream = stream
-        self._separator = '--' + boundary
-
-    def __iter__(self):
-        boundarystream = InterBoundaryIter(self._stream, self._separator)
-        for sub_stream in boundarystream:
-            # Iterate over each part
-            yield parse_boundary_stream(sub_stream, 1024)
+def _parse_header(line):
+    main_value_pair, params = parse_header(line)
+    try:
+        name, value = main_value_pair.split(':', 1)
+    except:
+        raise ValueError("Invalid header: %r" % line)
+    return name, (value, params)
 
 def parse_header(line):
     """ Parse the header into a key-value. """
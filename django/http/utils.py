@@ -20,6 +20,47 @@ def fix_location_header(request, response):
         response['Location'] = request.build_absolute_uri(response['Location'])
     return response
 
+def serve_byte_ranges(request, response):
+    """
+    Restricts a FileResponse to the parts of the file requested by the Range
+    header of a GET request, taking an If-Range header into account. Ensures
+    compliance with RFC 2616, sections 14.27 and 14.35.
+    """
+    from django.http import FileResponse
+    from django.utils.http import parse_http_date_safe, parse_range_header
+
+    if (request.method != 'GET' or 'HTTP_RANGE' not in request.META or
+            response.status_code != 200 or
+            not isinstance(response, FileResponse) or
+            response.file is None or response.size is None):
+        return response
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range:
+        if if_range.startswith('"'):
+            # Only strong entity tags match.
+            matches = if_range == response.get('ETag')
+        else:
+            if_range_date = parse_http_date_safe(if_range)
+            matches = (if_range_date is not None and if_range_date ==
+                       parse_http_date_safe(response.get('Last-Modified', '')))
+        if not matches:
+            # The entity changed, send all of it.
+            return response
+    ranges = parse_range_header(request.META['HTTP_RANGE'], response.size)
+    # Ignore malformed headers, and overlapping ranges which would make the
+    # response larger than the file itself.
+    if ranges is None or sum([last - first + 1
+                              for first, last in ranges]) > response.size:
+        return response
+    if not ranges:
+        response.status_code = 416
+        response.content = ''
+        response['Content-Length'] = 0
+        response['Content-Range'] = 'bytes */%d' % response.size
+        return response
+    response.set_ranges(ranges)
+    return response
+
 def conditional_content_removal(request, response):
     """
     Removes the content of responses for HEAD requests, 1xx, 204 and 304
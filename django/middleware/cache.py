@@ -46,11 +46,20 @@ More details about how the caching works:
 * This middleware also sets ETag, Last-Modified, Expires and Cache-Control
   headers on the response object.
 
+* If CACHE_MIDDLEWARE_LOCK_TIMEOUT is set, only one request generates a page
+  which has expired from the cache; the others wait up to that many seconds
+  for it to be cached. Pages which have never been cached aren't locked, as
+  the headers they vary on, and whether they're cacheable at all, is unknown.
+
 """
 
+import time
+
 from django.conf import settings
 from django.core.cache import get_cache, DEFAULT_CACHE_ALIAS
-from django.utils.cache import get_cache_key, learn_cache_key, patch_response_headers, get_max_age
+from django.core.cache.backends.base import LOCK_POLL_INTERVAL
+from django.utils.cache import (get_cached_response, get_cache_lock_key,
+    learn_cache_key, patch_response_headers, get_max_age)
 
 
 class UpdateCacheMiddleware(object):
@@ -68,6 +77,12 @@ class UpdateCacheMiddleware(object):
         self.cache_anonymous_only = getattr(settings, 'CACHE_MIDDLEWARE_ANONYMOUS_ONLY', False)
         self.cache_alias = settings.CACHE_MIDDLEWARE_ALIAS
         self.cache = get_cache(self.cache_alias)
+        self.tags = None
+
+    def _get_tags(self, request):
+        if callable(self.tags):
+            return self.tags(request)
+        return self.tags
 
     def _session_accessed(self, request):
         try:
@@ -88,8 +103,24 @@ class UpdateCacheMiddleware(object):
                 return False
         return True
 
+    def _release_lock(self, request):
+        lock_key = getattr(request, '_cache_lock_key', None)
+        if lock_key is not None:
+            self.cache.delete(lock_key)
+            request._cache_lock_key = None
+
+    def process_exception(self, request, exception):
+        # Let the requests waiting for this page generate it.
+        self._release_lock(request)
+
     def process_response(self, request, response):
         """Sets the cache, if needed."""
+        try:
+            return self._update_cache(request, response)
+        finally:
+            self._release_lock(request)
+
+    def _update_cache(self, request, response):
         if not self._should_update_cache(request, response):
             # We don't need to update the cache, just return.
             return response
@@ -107,12 +138,15 @@ class UpdateCacheMiddleware(object):
         patch_response_headers(response, timeout)
         if timeout:
             cache_key = learn_cache_key(request, response, timeout, self.key_prefix, cache=self.cache)
+            tags = self._get_tags(request)
+            if tags:
+                store = lambda r: self.cache.set_tagged(cache_key, r, tags, timeout)
+            else:
+                store = lambda r: self.cache.set(cache_key, r, timeout)
             if hasattr(response, 'render') and callable(response.render):
-                response.add_post_render_callback(
-                    lambda r: self.cache.set(cache_key, r, timeout)
-                )
+                response.add_post_render_callback(store)
             else:
-                self.cache.set(cache_key, response, timeout)
+                store(response)
         return response
 
 class FetchFromCacheMiddleware(object):
@@ -129,6 +163,47 @@ class FetchFromCacheMiddleware(object):
         self.cache_anonymous_only = getattr(settings, 'CACHE_MIDDLEWARE_ANONYMOUS_ONLY', False)
         self.cache_alias = settings.CACHE_MIDDLEWARE_ALIAS
         self.cache = get_cache(self.cache_alias)
+        self.lock_timeout = settings.CACHE_MIDDLEWARE_LOCK_TIMEOUT
+        self.tags = None
+        # The header lists learned for the cached pages, so that they needn't
+        # be fetched before the pages themselves.
+        self._header_lists = {}
+
+    def _get_tags(self, request):
+        if callable(self.tags):
+            return self.tags(request)
+        return self.tags
+
+    def _get_cached_response(self, request):
+        return get_cached_response(request, self.key_prefix, cache=self.cache,
+                                   header_lists=self._header_lists,
+                                   tags=self._get_tags(request))
+
+    def _wait_for_response(self, request):
+        """
+        Waits until either another request has cached the page, in which case
+        the cached response is returned, or this request holds the lock on
+        generating the page.
+        """
+        lock_key = get_cache_lock_key(request, self.key_prefix, cache=self.cache)
+        if lock_key is None:
+            return None
+        deadline = time.time() + self.lock_timeout
+        while not self.cache.add(lock_key, True, self.lock_timeout):
+            if time.time() >= deadline:
+                # The page is taking too long, generate it as well.
+                return None
+            time.sleep(LOCK_POLL_INTERVAL)
+            response = self._get_cached_response(request)
+            if response is not None:
+                return response
+        # The page may have been cached just before the lock was acquired.
+        response = self._get_cached_response(request)
+        if response is None:
+            request._cache_lock_key = lock_key
+        else:
+            self.cache.delete(lock_key)
+        return response
 
     def process_request(self, request):
         """
@@ -139,16 +214,9 @@ class FetchFromCacheMiddleware(object):
             request._cache_update_cache = False
             return None # Don't bother checking the cache.
 
-        # try and get the cached GET response
-        cache_key = get_cache_key(request, self.key_prefix, 'GET', cache=self.cache)
-        if cache_key is None:
-            request._cache_update_cache = True
-            return None # No cache information available, need to rebuild.
-        response = self.cache.get(cache_key, None)
-        # if it wasn't found and we are looking for a HEAD, try looking just for that
-        if response is None and request.method == 'HEAD':
-            cache_key = get_cache_key(request, self.key_prefix, 'HEAD', cache=self.cache)
-            response = self.cache.get(cache_key, None)
+        response = self._get_cached_response(request)
+        if response is None and self.lock_timeout:
+            response = self._wait_for_response(request)
 
         if response is None:
             request._cache_update_cache = True
@@ -165,7 +233,7 @@ class CacheMiddleware(UpdateCacheMiddleware, FetchFromCacheMiddleware):
     Also used as the hook point for the cache decorator, which is generated
     using the decorator-from-middleware utility.
     """
-    def __init__(self, cache_timeout=None, cache_anonymous_only=None, **kwargs):
+    def __init__(self, cache_timeout=None, cache_anonymous_only=None, tags=None, **kwargs):
         # We need to differentiate between "provided, but using default value",
         # and "not provided". If the value is provided using a default, then
         # we fall back to system defaults. If it is not provided at all,
@@ -203,3 +271,6 @@ class CacheMiddleware(UpdateCacheMiddleware, FetchFromCacheMiddleware):
 
         self.cache = get_cache(self.cache_alias, **cache_kwargs)
         self.cache_timeout = self.cache.default_timeout
+        self.lock_timeout = settings.CACHE_MIDDLEWARE_LOCK_TIMEOUT
+        self.tags = tags
+        self._header_lists = {}
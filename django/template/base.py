@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import re
 from functools import partial
 from inspect import getargspec
+from types import InstanceType
 
 from django.conf import settings
 from django.template.context import (Context, RequestContext,
@@ -68,6 +69,16 @@ builtins = []
 # uninitialised.
 invalid_var_format_string = None
 
+# Access paths remembered by Variable._resolve_lookup, keyed by the type of
+# the object looked into and the lookup bit. Only the lookups whose failing
+# attempts depend on the type alone are remembered, so that skipping these
+# attempts doesn't change the result.
+ATTRIBUTE_LOOKUP = 1
+INDEX_LOOKUP = 2
+lookup_strategies = {}
+# The remembered access paths are forgotten when there are more of them.
+MAX_LOOKUP_STRATEGIES = 10000
+
 class TemplateSyntaxError(Exception):
     pass
 
@@ -123,6 +134,17 @@ class Template(object):
             origin = StringOrigin(template_string)
         self.nodelist = compile_string(template_string, origin)
         self.name = name
+        if settings.TEMPLATE_OPTIMIZE and not settings.TEMPLATE_DEBUG:
+            from django.template.optimizer import optimize_nodelist
+            self.nodelist = optimize_nodelist(self.nodelist)
+        # Profiled templates aren't compiled: the compiled code would render
+        # the nodes without going through the nodelists which time them.
+        if settings.TEMPLATE_PROFILE and not settings.TEMPLATE_DEBUG:
+            from django.template.profiling import profile_nodelist
+            self.nodelist = profile_nodelist(self.nodelist, name)
+        elif settings.TEMPLATE_COMPILE and not settings.TEMPLATE_DEBUG:
+            from django.template.compiler import compile_nodelist
+            self.nodelist = compile_nodelist(self.nodelist, name)
 
     def __iter__(self):
         for node in self.nodelist:
@@ -140,6 +162,21 @@ class Template(object):
         finally:
             context.render_context.pop()
 
+    def _stream(self, context):
+        return self.nodelist.stream(context)
+
+    def stream(self, context):
+        """
+        Returns an iterator over the rendered template, yielding unicode
+        strings as the nodes are rendered.
+        """
+        context.render_context.push()
+        try:
+            for bit in self._stream(context):
+                yield bit
+        finally:
+            context.render_context.pop()
+
 def compile_string(template_string, origin):
     "Compiles template_string into NodeList ready for rendering"
     if settings.TEMPLATE_DEBUG:
@@ -576,12 +613,7 @@ class FilterExpression(object):
                     obj = None
                 else:
                     if settings.TEMPLATE_STRING_IF_INVALID:
-                        global invalid_var_format_string
-                        if invalid_var_format_string is None:
-                            invalid_var_format_string = '%s' in settings.TEMPLATE_STRING_IF_INVALID
-                        if invalid_var_format_string:
-                            return settings.TEMPLATE_STRING_IF_INVALID % self.var
-                        return settings.TEMPLATE_STRING_IF_INVALID
+                        return _string_if_invalid(self.var)
                     else:
                         obj = settings.TEMPLATE_STRING_IF_INVALID
         else:
@@ -642,6 +674,18 @@ class FilterExpression(object):
     def __str__(self):
         return self.token
 
+def _string_if_invalid(var):
+    """
+    Returns the TEMPLATE_STRING_IF_INVALID setting for a variable that failed
+    to resolve, formatted with the variable if it contains '%s'.
+    """
+    global invalid_var_format_string
+    if invalid_var_format_string is None:
+        invalid_var_format_string = '%s' in settings.TEMPLATE_STRING_IF_INVALID
+    if invalid_var_format_string:
+        return settings.TEMPLATE_STRING_IF_INVALID % var
+    return settings.TEMPLATE_STRING_IF_INVALID
+
 def resolve_variable(path, context):
     """
     Returns the resolved variable, which may contain attribute syntax, within
@@ -747,21 +791,49 @@ class Variable(object):
         current = context
         try:  # catch-all for silent variable failures
             for bit in self.lookups:
-                try:  # dictionary lookup
-                    current = current[bit]
-                except (TypeError, AttributeError, KeyError):
-                    try:  # attribute lookup
-                        current = getattr(current, bit)
-                    except (TypeError, AttributeError):
-                        try:  # list-index lookup
+                key = (type(current), bit)
+                strategy = lookup_strategies.get(key)
+                if strategy is not None:
+                    # A previous lookup found the access path for this type
+                    # and bit. If it fails, go through all of them again.
+                    try:
+                        if strategy == ATTRIBUTE_LOOKUP:
+                            current = getattr(current, bit)
+                        else:
                             current = current[int(bit)]
-                        except (IndexError,  # list index out of range
-                                ValueError,  # invalid literal for int()
-                                KeyError,    # current is a dict without `int(bit)` key
-                                TypeError):  # unsubscriptable object
-                            raise VariableDoesNotExist("Failed lookup for key "
-                                                       "[%s] in %r",
-                                                       (bit, current))  # missing attribute
+                    except (TypeError, AttributeError, IndexError):
+                        strategy = None
+                if strategy is None:
+                    try:  # dictionary lookup
+                        current = current[bit]
+                    except (TypeError, AttributeError, KeyError):
+                        try:  # attribute lookup
+                            new = getattr(current, bit)
+                        except (TypeError, AttributeError):
+                            try:  # list-index lookup
+                                new = current[int(bit)]
+                            except (IndexError,  # list index out of range
+                                    ValueError,  # invalid literal for int()
+                                    KeyError,    # current is a dict without `int(bit)` key
+                                    TypeError):  # unsubscriptable object
+                                raise VariableDoesNotExist("Failed lookup for key "
+                                                           "[%s] in %r",
+                                                           (bit, current))  # missing attribute
+                            # Lists and tuples have no attributes named after
+                            # numbers.
+                            if key[0] is list or key[0] is tuple:
+                                strategy = INDEX_LOOKUP
+                        else:
+                            # The dictionary lookup fails for all the objects
+                            # of a type that isn't subscriptable.
+                            if (not hasattr(key[0], '__getitem__') and
+                                    key[0] is not InstanceType):
+                                strategy = ATTRIBUTE_LOOKUP
+                        current = new
+                        if strategy is not None:
+                            if len(lookup_strategies) >= MAX_LOOKUP_STRATEGIES:
+                                lookup_strategies.clear()
+                            lookup_strategies[key] = strategy
                 if callable(current):
                     if getattr(current, 'do_not_call_in_templates', False):
                         pass
@@ -794,6 +866,13 @@ class Node(object):
         """
         pass
 
+    def stream(self, context):
+        """
+        Return an iterator over the node rendered as strings. Nodes rendering
+        nodelists override it to stream them.
+        """
+        return iter([self.render(context)])
+
     def __iter__(self):
         yield self
 
@@ -826,6 +905,14 @@ class NodeList(list):
             bits.append(force_unicode(bit))
         return mark_safe(u''.join(bits))
 
+    def stream(self, context):
+        for node in self:
+            if isinstance(node, Node):
+                for bit in self.stream_node(node, context):
+                    yield force_unicode(bit)
+            else:
+                yield force_unicode(node)
+
     def get_nodes_by_type(self, nodetype):
         "Return a list of all nodes of the given type"
         nodes = []
@@ -836,6 +923,9 @@ class NodeList(list):
     def render_node(self, node, context):
         return node.render(context)
 
+    def stream_node(self, node, context):
+        return node.stream(context)
+
 class TextNode(Node):
     def __init__(self, s):
         self.s = s
@@ -853,8 +943,11 @@ def _render_value_in_context(value, context):
     means escaping, if required, and conversion to a unicode object. If value
     is a string, it is expected to have already been translated.
     """
-    value = localize(value, use_l10n=context.use_l10n)
-    value = force_unicode(value)
+    if not isinstance(value, basestring):
+        # Strings aren't localized.
+        value = localize(value, use_l10n=context.use_l10n)
+    if not isinstance(value, unicode):
+        value = force_unicode(value)
     if ((context.autoescape and not isinstance(value, SafeData)) or
             isinstance(value, EscapeData)):
         return escape(value)
@@ -1007,18 +1100,38 @@ def generic_tag_compiler(parser, token, params, varargs, varkw, defaults,
                               defaults, takes_context, name)
     return node_class(takes_context, args, kwargs)
 
+# The node classes created by the Library.simple_tag, assignment_tag and
+# inclusion_tag decorators, keyed by their helper_key, for unpickling nodes.
+helper_node_classes = {}
+
+def unpickle_helper_node(helper_key, state):
+    node_class = helper_node_classes[helper_key]
+    node = node_class.__new__(node_class)
+    node.__dict__.update(state)
+    return node
+
 class TagHelperNode(Node):
     """
     Base class for tag helper nodes such as SimpleNode, InclusionNode and
     AssignmentNode. Manages the positional and keyword arguments to be passed
     to the decorated function.
     """
+    # The kind of tag, its name and its function, set by the Library
+    # decorators creating the subclasses.
+    helper_key = None
 
     def __init__(self, takes_context, args, kwargs):
         self.takes_context = takes_context
         self.args = args
         self.kwargs = kwargs
 
+    def __reduce__(self):
+        if self.helper_key is None:
+            return object.__reduce_ex__(self, 2)
+        # The subclasses are created by the decorators, pickle finds them in
+        # helper_node_classes once their function is imported.
+        return (unpickle_helper_node, (self.helper_key, self.__dict__))
+
     def get_resolved_arguments(self, context):
         resolved_args = [var.resolve(context) for var in self.args]
         if self.takes_context:
@@ -1077,7 +1190,7 @@ class Library(object):
         elif name is not None and filter_func is not None:
             # register.filter('somename', somefunc)
             self.filters[name] = filter_func
-            for attr in ('is_safe', 'needs_autoescape'):
+            for attr in ('is_safe', 'needs_autoescape', 'is_pure'):
                 if attr in flags:
                     value = flags[attr]
                     # set the flag on the filter for FilterExpression.resolve
@@ -1107,6 +1220,8 @@ class Library(object):
 
             function_name = (name or
                 getattr(func, '_decorated_function', func).__name__)
+            SimpleNode.helper_key = ('simple', function_name, func)
+            helper_node_classes[SimpleNode.helper_key] = SimpleNode
             compile_func = partial(generic_tag_compiler,
                 params=params, varargs=varargs, varkw=varkw,
                 defaults=defaults, name=function_name,
@@ -1140,6 +1255,8 @@ class Library(object):
 
             function_name = (name or
                 getattr(func, '_decorated_function', func).__name__)
+            AssignmentNode.helper_key = ('assignment', function_name, func)
+            helper_node_classes[AssignmentNode.helper_key] = AssignmentNode
 
             def compile_func(parser, token):
                 bits = token.split_contents()[1:]
@@ -1201,6 +1318,8 @@ class Library(object):
 
             function_name = (name or
                 getattr(func, '_decorated_function', func).__name__)
+            InclusionNode.helper_key = ('inclusion', function_name, func)
+            helper_node_classes[InclusionNode.helper_key] = InclusionNode
             compile_func = partial(generic_tag_compiler,
                 params=params, varargs=varargs, varkw=varkw,
                 defaults=defaults, name=function_name,
@@ -0,0 +1,230 @@
+"""
+Compiles the nodelists of parsed templates to Python functions.
+
+The text, the variables and their filters, and the {% if %} tags of a
+nodelist become the code of a single Python function. Other nodes are
+rendered by calling them, and their own nodelists are compiled in turn, so
+that, for instance, the body of a {% for %} loop is compiled as well.
+
+Compiled nodelists render exactly the same output as the nodelists they
+replace; they are only faster.
+"""
+from django.conf import settings
+from django.template.base import (FilterExpression, NodeList, TextNode,
+    Variable, VariableDoesNotExist, VariableNode, _render_value_in_context,
+    _string_if_invalid)
+from django.template.defaulttags import IfNode
+from django.utils.encoding import force_unicode
+from django.utils.safestring import (SafeData, EscapeData, mark_safe,
+    mark_for_escaping)
+
+# {% if %} tags nested deeper than this are rendered by calling them, which
+# keeps the generated code clear of the limit on nested blocks in Python.
+MAX_INLINE_DEPTH = 10
+
+class CompiledNodeList(NodeList):
+    """
+    A NodeList rendered by a function compiled from its nodes. The generated
+    Python source is kept in the source attribute.
+    """
+    def __init__(self, nodelist, render_func, source, name=None):
+        super(CompiledNodeList, self).__init__(nodelist)
+        self.contains_nontext = nodelist.contains_nontext
+        self.render_func = render_func
+        self.source = source
+        self.name = name
+
+    def render(self, context):
+        return self.render_func(context)
+
+    def __reduce__(self):
+        # The render function can't be pickled, the nodes are compiled again
+        # when unpickling.
+        return (_unpickle_nodelist, (list(self), self.contains_nontext, self.name))
+
+class NodeListCompiler(object):
+    """
+    Generates the source of the function rendering a nodelist, and the
+    namespace holding the objects it uses.
+    """
+    def __init__(self, name=None):
+        self.name = name
+        self.lines = []
+        self.indent = 0
+        self.counter = 0
+        self.namespace = {
+            'settings': settings,
+            'VariableDoesNotExist': VariableDoesNotExist,
+            'SafeData': SafeData,
+            'EscapeData': EscapeData,
+            'mark_safe': mark_safe,
+            'mark_for_escaping': mark_for_escaping,
+            'force_unicode': force_unicode,
+            '_render_value_in_context': _render_value_in_context,
+            '_string_if_invalid': _string_if_invalid,
+        }
+
+    def write(self, line):
+        self.lines.append('    ' * self.indent + line)
+
+    def new_name(self, prefix):
+        self.counter += 1
+        return '%s%d' % (prefix, self.counter)
+
+    def constant(self, value):
+        """
+        Returns the name under which value is available to the generated code.
+        """
+        name = self.new_name('_k')
+        self.namespace[name] = value
+        return name
+
+    def compile(self, nodelist):
+        """
+        Returns the function rendering the nodelist and its source.
+        """
+        self.write('def render(context):')
+        self.indent += 1
+        self.write('bits = []')
+        self.write('append = bits.append')
+        self.compile_nodes(nodelist, 0)
+        self.write("return mark_safe(u''.join(bits))")
+        self.indent -= 1
+        source = '\n'.join(self.lines) + '\n'
+        code = compile(source, '<compiled template %s>' % (self.name or ''), 'exec')
+        exec code in self.namespace
+        return self.namespace['render'], source
+
+    def compile_nodes(self, nodelist, depth):
+        for node in nodelist:
+            node_type = type(node)
+            if node_type is TextNode and isinstance(node.s, unicode):
+                self.write('append(%s)' % self.constant(node.s))
+            elif node_type is VariableNode and type(node.filter_expression) is FilterExpression:
+                self.compile_variable(node)
+            elif (node_type is IfNode and depth < MAX_INLINE_DEPTH and
+                  type(node.nodelist_true) is NodeList and
+                  type(node.nodelist_false) is NodeList):
+                self.compile_if(node, depth)
+            else:
+                self.compile_children(node)
+                self.write('append(force_unicode(%s(context)))' % self.constant(node.render))
+
+    def compile_children(self, node):
+        for attr in node.child_nodelists:
+            nodelist = getattr(node, attr, None)
+            if type(nodelist) is NodeList:
+                setattr(node, attr, compile_nodelist(nodelist, self.name))
+
+    def compile_if(self, node, depth):
+        # Mirrors IfNode.render.
+        var = self.new_name('var')
+        self.write('try:')
+        self.write('    %s = %s(context)' % (var, self.constant(node.var.eval)))
+        self.write('except VariableDoesNotExist:')
+        self.write('    %s = None' % var)
+        self.write('if %s:' % var)
+        self.compile_block(node.nodelist_true, depth + 1)
+        self.write('else:')
+        self.compile_block(node.nodelist_false, depth + 1)
+
+    def compile_block(self, nodelist, depth):
+        self.indent += 1
+        if nodelist:
+            self.compile_nodes(nodelist, depth)
+        else:
+            self.write('pass')
+        self.indent -= 1
+
+    def compile_variable(self, node):
+        """
+        Generates a function rendering a VariableNode, with the filters of
+        its expression unrolled, and calls it.
+        """
+        filter_expression = node.filter_expression
+        name = self.new_name('_v')
+        outer_lines, outer_indent = self.lines, self.indent
+        self.lines, self.indent = [], 0
+
+        # Mirrors VariableNode.render and FilterExpression.resolve.
+        self.write('def %s(context):' % name)
+        self.indent += 1
+        self.write('try:')
+        self.indent += 1
+        var = filter_expression.var
+        filters = filter_expression.filters
+        if isinstance(var, Variable):
+            if filters:
+                self.write('resolved = True')
+            self.write('try:')
+            self.write('    obj = %s(context)' % self.constant(var.resolve))
+            self.write('except VariableDoesNotExist:')
+            self.write('    if settings.TEMPLATE_STRING_IF_INVALID:')
+            self.write('        obj = _string_if_invalid(%s)' % self.constant(var))
+            if filters:
+                self.write('        resolved = False')
+            self.write('    else:')
+            self.write('        obj = settings.TEMPLATE_STRING_IF_INVALID')
+            if filters:
+                self.write('if resolved:')
+                self.indent += 1
+                self.compile_filters(filters)
+                self.indent -= 1
+        else:
+            self.write('obj = %s' % self.constant(var))
+            self.compile_filters(filters)
+        self.indent -= 1
+        self.write('except UnicodeDecodeError:')
+        self.write("    return ''")
+        self.write('return _render_value_in_context(obj, context)')
+
+        self.lines = self.lines + outer_lines
+        self.indent = outer_indent
+        self.write('append(%s(context))' % name)
+
+    def compile_filters(self, filters):
+        if not filters:
+            self.write('pass')
+        for func, args in filters:
+            arg_vals = []
+            for lookup, arg in args:
+                if lookup:
+                    arg_vals.append('%s(context)' % self.constant(arg.resolve))
+                elif isinstance(arg, basestring):
+                    arg_vals.append(self.constant(mark_safe(arg)))
+                else:
+                    # Lazy translations are marked safe at rendering time.
+                    arg_vals.append('mark_safe(%s)' % self.constant(arg))
+            if getattr(func, 'needs_autoescape', False):
+                arg_vals.append('autoescape=context.autoescape')
+            self.write('new_obj = %s(%s)' % (self.constant(func),
+                                             ', '.join(['obj'] + arg_vals)))
+            if getattr(func, 'is_safe', False):
+                self.write('if isinstance(obj, SafeData):')
+                self.write('    obj = mark_safe(new_obj)')
+                self.write('elif isinstance(obj, EscapeData):')
+            else:
+                self.write('if isinstance(obj, EscapeData):')
+            self.write('    obj = mark_for_escaping(new_obj)')
+            self.write('else:')
+            self.write('    obj = new_obj')
+
+def compile_nodelist(nodelist, name=None):
+    """
+    Returns a CompiledNodeList rendering the same output as nodelist.
+
+    The nodelists of the nodes rendered by calling them are replaced with
+    compiled ones. Lists that aren't plain NodeLists, such as the ones built
+    when TEMPLATE_DEBUG or TEMPLATE_PROFILE is True, are returned unchanged.
+    """
+    if type(nodelist) is not NodeList:
+        return nodelist
+    render, source = NodeListCompiler(name).compile(nodelist)
+    return CompiledNodeList(nodelist, render, source, name)
+
+def _unpickle_nodelist(nodes, contains_nontext, name):
+    nodelist = NodeList(nodes)
+    nodelist.contains_nontext = contains_nontext
+    if settings.TEMPLATE_COMPILE and not settings.TEMPLATE_DEBUG:
+        return compile_nodelist(nodelist, name)
+    return nodelist
@@ -48,6 +48,11 @@ class BaseContext(object):
 
     def __getitem__(self, key):
         "Get a variable's value, starting at the current context and going upward"
+        # Most lookups are for loop variables and other values of the
+        # innermost scope, check it before walking the stack.
+        d = self.dicts[-1]
+        if key in d:
+            return d[key]
         for d in reversed(self.dicts):
             if key in d:
                 return d[key]
@@ -64,9 +69,14 @@ class BaseContext(object):
         return False
 
     def __contains__(self, key):
+        if key in self.dicts[-1]:
+            return True
         return self.has_key(key)
 
     def get(self, key, otherwise=None):
+        d = self.dicts[-1]
+        if key in d:
+            return d[key]
         for d in reversed(self.dicts):
             if key in d:
                 return d[key]
@@ -63,7 +63,7 @@ def stringfilter(func):
 # STRINGS         #
 ###################
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def addslashes(value):
     """
@@ -73,19 +73,19 @@ def addslashes(value):
     """
     return value.replace('\\', '\\\\').replace('"', '\\"').replace("'", "\\'")
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def capfirst(value):
     """Capitalizes the first character of the value."""
     return value and value[0].upper() + value[1:]
 
-@register.filter("escapejs")
+@register.filter("escapejs", is_pure=True)
 @stringfilter
 def escapejs_filter(value):
     """Hex encodes characters for use in JavaScript strings."""
     return escapejs(value)
 
-@register.filter("fix_ampersands", is_safe=True)
+@register.filter("fix_ampersands", is_safe=True, is_pure=True)
 @stringfilter
 def fix_ampersands_filter(value):
     """Replaces ampersands with ``&amp;`` entities."""
@@ -180,7 +180,7 @@ def floatformat(text, arg=-1):
     except InvalidOperation:
         return input_val
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def iriencode(value):
     """Escapes an IRI value for use in a URL."""
@@ -202,7 +202,7 @@ def linenumbers(value, autoescape=None):
             lines[i] = (u"%0" + width  + u"d. %s") % (i + 1, escape(line))
     return mark_safe(u'\n'.join(lines))
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def lower(value):
     """Converts a string into all lowercase."""
@@ -219,7 +219,7 @@ def make_list(value):
     """
     return list(value)
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def slugify(value):
     """
@@ -230,7 +230,7 @@ def slugify(value):
     value = unicode(re.sub('[^\w\s-]', '', value).strip().lower())
     return mark_safe(re.sub('[-\s]+', '-', value))
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 def stringformat(value, arg):
     """
     Formats the variable according to the arg, a string formatting specifier.
@@ -246,7 +246,7 @@ def stringformat(value, arg):
     except (ValueError, TypeError):
         return u""
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def title(value):
     """Converts a string into titlecase."""
@@ -299,13 +299,13 @@ def truncatewords_html(value, arg):
         return value # Fail silently.
     return Truncator(value).words(length, html=True, truncate=' ...')
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 @stringfilter
 def upper(value):
     """Converts a string into all uppercase."""
     return value.upper()
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 @stringfilter
 def urlencode(value, safe=None):
     """
@@ -339,13 +339,13 @@ def urlizetrunc(value, limit, autoescape=None):
     return mark_safe(urlize_impl(value, trim_url_limit=int(limit), nofollow=True,
                             autoescape=autoescape))
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 @stringfilter
 def wordcount(value):
     """Returns the number of words."""
     return len(value.split())
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def wordwrap(value, arg):
     """
@@ -355,7 +355,7 @@ def wordwrap(value, arg):
     """
     return wrap(value, int(arg))
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def ljust(value, arg):
     """
@@ -365,7 +365,7 @@ def ljust(value, arg):
     """
     return value.ljust(int(arg))
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def rjust(value, arg):
     """
@@ -375,13 +375,13 @@ def rjust(value, arg):
     """
     return value.rjust(int(arg))
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def center(value, arg):
     """Centers the value in a field of a given width."""
     return value.center(int(arg))
 
-@register.filter
+@register.filter(is_pure=True)
 @stringfilter
 def cut(value, arg):
     """
@@ -397,7 +397,7 @@ def cut(value, arg):
 # HTML STRINGS    #
 ###################
 
-@register.filter("escape", is_safe=True)
+@register.filter("escape", is_safe=True, is_pure=True)
 @stringfilter
 def escape_filter(value):
     """
@@ -405,7 +405,7 @@ def escape_filter(value):
     """
     return mark_for_escaping(value)
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def force_escape(value):
     """
@@ -439,7 +439,7 @@ def linebreaksbr(value, autoescape=None):
         value = escape(value)
     return mark_safe(value.replace('\n', '<br />'))
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def safe(value):
     """
@@ -456,7 +456,7 @@ def safeseq(value):
     """
     return [mark_safe(force_unicode(obj)) for obj in value]
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def removetags(value, tags):
     """Removes a space separated list of [X]HTML tags from the output."""
@@ -468,7 +468,7 @@ def removetags(value, tags):
     value = endtag_re.sub(u'', value)
     return value
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 @stringfilter
 def striptags(value):
     """Strips all [X]HTML tags."""
@@ -524,7 +524,7 @@ def last(value):
     except IndexError:
         return u''
 
-@register.filter(is_safe=True)
+@register.filter(is_safe=True, is_pure=True)
 def length(value):
     """Returns the length of the value - useful for lists."""
     try:
@@ -532,7 +532,7 @@ def length(value):
     except (ValueError, TypeError):
         return ''
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 def length_is(value, arg):
     """Returns a boolean of whether the value's length is the argument."""
     try:
@@ -657,7 +657,7 @@ def unordered_list(value, autoescape=None):
 # INTEGERS        #
 ###################
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 def add(value, arg):
     """Adds the arg to the value."""
     try:
@@ -668,7 +668,7 @@ def add(value, arg):
         except Exception:
             return ''
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 def get_digit(value, arg):
     """
     Given a whole number, returns the requested digit of it, where 1 is the
@@ -748,19 +748,19 @@ def timeuntil_filter(value, arg=None):
 # LOGIC           #
 ###################
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 def default(value, arg):
     """If value is unavailable, use given default."""
     return value or arg
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 def default_if_none(value, arg):
     """If value is None, use given default."""
     if value is None:
         return arg
     return value
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 def divisibleby(value, arg):
     """Returns True if the value is devisible by the argument."""
     return int(value) % int(arg) == 0
@@ -826,7 +826,7 @@ def filesizeformat(bytes):
         return ugettext("%s TB") % filesize_number_format(bytes / (1024 * 1024 * 1024 * 1024))
     return ugettext("%s PB") % filesize_number_format(bytes / (1024 * 1024 * 1024 * 1024 * 1024))
 
-@register.filter(is_safe=False)
+@register.filter(is_safe=False, is_pure=True)
 def pluralize(value, arg=u's'):
     """
     Returns a plural suffix if the value is not 1. By default, 's' is used as
@@ -870,7 +870,7 @@ def pluralize(value, arg=u's'):
             pass
     return singular_suffix
 
-@register.filter("phone2numeric", is_safe=True)
+@register.filter("phone2numeric", is_safe=True, is_pure=True)
 def phone2numeric_filter(value):
     """Takes a phone number and converts it in to its numerical equivalent."""
     return phone2numeric(value)
@@ -10,7 +10,7 @@ from django.template.base import (Node, NodeList, Template, Library,
     TemplateSyntaxError, VariableDoesNotExist, InvalidTemplateLibrary,
     BLOCK_TAG_START, BLOCK_TAG_END, VARIABLE_TAG_START, VARIABLE_TAG_END,
     SINGLE_BRACE_START, SINGLE_BRACE_END, COMMENT_TAG_START, COMMENT_TAG_END,
-    get_library, token_kwargs, kwarg_re)
+    TOKEN_BLOCK, get_library, token_kwargs, kwarg_re)
 from django.template.smartif import IfParser, Literal
 from django.template.defaultfilters import date
 from django.utils.encoding import smart_str, smart_unicode
@@ -103,12 +103,126 @@ class FirstOfNode(Node):
                 return smart_unicode(value)
         return u''
 
+# The forloop values which depend on the length of the sequence.
+LENGTH_LOOP_ATTRS = ('revcounter', 'revcounter0', 'last')
+
+forloop_re = re.compile(r'\bforloop((?:\.\w+)*)')
+
+def loop_body_tokens(tokens):
+    """
+    Yields the tokens of the body of a for tag, from the tokens following
+    it up to its own {% empty %} or {% endfor %} tag. The tokens aren't
+    parsed, so the body is only found by matching the nested for tags, and
+    skipping the comment tags. Since the forloop values depending on the
+    length of the sequence are computed when they're looked up otherwise,
+    a wrong guess only makes the loop slower.
+    """
+    depth = 0
+    tokens = iter(tokens)
+    for token in tokens:
+        if token.token_type == TOKEN_BLOCK:
+            command = (token.contents.split() or [''])[0]
+            if token.contents in ('empty', 'endfor') and not depth:
+                return
+            elif token.contents == 'endfor':
+                depth -= 1
+            elif command == 'for':
+                depth += 1
+            elif command == 'comment':
+                for token in tokens:
+                    if token.token_type == TOKEN_BLOCK and token.contents == 'endcomment':
+                        break
+                continue
+        yield token
+
+def uses_loop_length(tokens):
+    """
+    Returns True if the tokens may look up the forloop values depending on
+    the length of the sequence, or pass the forloop value itself.
+    """
+    for token in tokens:
+        for match in forloop_re.finditer(token.contents):
+            attrs = match.group(1).split('.')[1:]
+            if not attrs or attrs[-1] == 'parentloop':
+                return True
+            for attr in attrs:
+                if attr in LENGTH_LOOP_ATTRS:
+                    return True
+    return False
+
+def uncached_results(values):
+    """
+    Returns an iterator over the results of a queryset which hasn't been
+    evaluated yet, which doesn't fill its result cache, or None for other
+    values. Querysets prefetching related objects are left alone, since the
+    objects are only prefetched when the cache is filled.
+    """
+    if (hasattr(values, 'iterator') and
+            getattr(values, '_result_cache', False) is None and
+            not getattr(values, '_prefetch_related_lookups', True)):
+        return values.iterator()
+    return None
+
+class ForLoop(dict):
+    """
+    The forloop value of the for tag, updated in place for each item. The
+    values depending on the length of the sequence are computed when they're
+    looked up, if the loop doesn't set them. When the length isn't known,
+    the remaining items are then fetched from the items iterator.
+    """
+    def __init__(self, parentloop, length=None, items=None):
+        super(ForLoop, self).__init__(parentloop=parentloop)
+        self.length = length
+        self.items = items
+        self.remaining = None
+
+    def __iter__(self):
+        """
+        Iterates over the items given when the length isn't known, including
+        those fetched to compute it.
+        """
+        for item in self.items:
+            yield item
+            if self.remaining is not None:
+                break
+        else:
+            return
+        for item in self.remaining:
+            yield item
+
+    def __missing__(self, key):
+        if key not in LENGTH_LOOP_ATTRS or 'counter0' not in self:
+            raise KeyError(key)
+        if self.length is None:
+            self.remaining = list(self.items)
+            self.length = self['counter0'] + 1 + len(self.remaining)
+        revcounter0 = self.length - self['counter0'] - 1
+        if key == 'revcounter':
+            return revcounter0 + 1
+        elif key == 'revcounter0':
+            return revcounter0
+        return revcounter0 == 0
+
+    def get(self, key, otherwise=None):
+        try:
+            return self[key]
+        except KeyError:
+            return otherwise
+
 class ForNode(Node):
     child_nodelists = ('nodelist_loop', 'nodelist_empty')
-
-    def __init__(self, loopvars, sequence, is_reversed, nodelist_loop, nodelist_empty=None):
+    # Whether the loop may use the forloop values depending on the length of
+    # the sequence, which are then set for each item.
+    uses_length = True
+    # Whether querysets are iterated without caching their results.
+    is_uncached = False
+
+    def __init__(self, loopvars, sequence, is_reversed, nodelist_loop, nodelist_empty=None,
+                 uses_length=True, is_uncached=False):
         self.loopvars, self.sequence = loopvars, sequence
         self.is_reversed = is_reversed
+        self.uses_length = uses_length
+        self.is_uncached = is_uncached
         self.nodelist_loop = nodelist_loop
         if nodelist_empty is None:
             self.nodelist_empty = NodeList()
@@ -127,55 +241,76 @@ class ForNode(Node):
         for node in self.nodelist_empty:
             yield node
 
-    def render(self, context):
-        if 'forloop' in context:
-            parentloop = context['forloop']
-        else:
-            parentloop = {}
-        context.push()
+    def iter_loop(self, context):
+        """
+        Sets the loop variables and the forloop value in the context, and
+        yields, for each item of the sequence.
+        """
+        parentloop = context.get('forloop', {})
+        # The loop variables and the forloop value are set in a single scope,
+        # pushed for the whole loop, and cleared for each item so that the
+        # values set by the tags of the loop body don't carry over.
+        scope = context.push()
         try:
             values = self.sequence.resolve(context, True)
         except VariableDoesNotExist:
             values = []
         if values is None:
             values = []
-        if not hasattr(values, '__len__'):
-            values = list(values)
-        len_values = len(values)
-        if len_values < 1:
-            context.pop()
-            return self.nodelist_empty.render(context)
-        nodelist = NodeList()
-        if self.is_reversed:
-            values = reversed(values)
-        unpack = len(self.loopvars) > 1
-        # Create a forloop value in the context.  We'll update counters on each
-        # iteration just below.
-        loop_dict = context['forloop'] = {'parentloop': parentloop}
+        uses_length = self.uses_length
+        results = None
+        if self.is_uncached and not uses_length:
+            # The loop asked for querysets to be iterated without caching
+            # their results, which is only done when their length isn't
+            # needed.
+            results = uncached_results(values)
+        if results is not None:
+            loop_dict = ForLoop(parentloop, items=results)
+            values = loop_dict
+        else:
+            if not hasattr(values, '__len__'):
+                values = list(values)
+            len_values = len(values)
+            loop_dict = ForLoop(parentloop, len_values)
+            if self.is_reversed:
+                values = reversed(values)
+        loopvars = self.loopvars
+        unpack = len(loopvars) > 1
         for i, item in enumerate(values):
+            scope.clear()
+            # Create a forloop value in the context.  We'll update counters on
+            # each iteration just below.
+            scope['forloop'] = loop_dict
             # Shortcuts for current loop iteration number.
             loop_dict['counter0'] = i
             loop_dict['counter'] = i+1
-            # Reverse counter iteration numbers.
-            loop_dict['revcounter'] = len_values - i
-            loop_dict['revcounter0'] = len_values - i - 1
-            # Boolean values designating first and last times through loop.
+            # Boolean value designating the first time through the loop.
             loop_dict['first'] = (i == 0)
-            loop_dict['last'] = (i == len_values - 1)
+            if uses_length:
+                # Reverse counter iteration numbers.
+                loop_dict['revcounter'] = len_values - i
+                loop_dict['revcounter0'] = len_values - i - 1
+                # Boolean value designating the last time through the loop.
+                loop_dict['last'] = (i == len_values - 1)
 
-            pop_context = False
             if unpack:
                 # If there are multiple loop variables, unpack the item into
                 # them.
                 try:
-                    unpacked_vars = dict(zip(self.loopvars, item))
+                    unpacked_vars = zip(loopvars, item)
                 except TypeError:
-                    pass
-                else:
-                    pop_context = True
-                    context.update(unpacked_vars)
+                    unpacked_vars = ()
+                scope.update(unpacked_vars)
             else:
-                context[self.loopvars[0]] = item
+                scope[loopvars[0]] = item
+            yield item
+        context.pop()
+
+    def render(self, context):
+        nodelist = NodeList()
+        empty = True
+        for item in self.iter_loop(context):
+            empty = False
             # In TEMPLATE_DEBUG mode provide source of the node which
             # actually raised the exception
             if settings.TEMPLATE_DEBUG:
@@ -187,18 +322,21 @@ class ForNode(Node):
                             e.django_template_source = node.source
                         raise
             else:
-                for node in self.nodelist_loop:
-                    nodelist.append(node.render(context))
-            if pop_context:
-                # The loop variables were pushed on to the context so pop them
-                # off again. This is necessary because the tag lets the length
-                # of loopvars differ to the length of each set of items and we
-                # don't want to leave any vars from the previous loop on the
-                # context.
-                context.pop()
-        context.pop()
+                nodelist.append(self.nodelist_loop.render(context))
+        if empty:
+            return self.nodelist_empty.render(context)
         return nodelist.render(context)
 
+    def stream(self, context):
+        empty = True
+        for item in self.iter_loop(context):
+            empty = False
+            for bit in self.nodelist_loop.stream(context):
+                yield bit
+        if empty:
+            for bit in self.nodelist_empty.stream(context):
+                yield bit
+
 class IfChangedNode(Node):
     child_nodelists = ('nodelist_true', 'nodelist_false')
 
@@ -275,6 +413,17 @@ class IfNode(Node):
         else:
             return self.nodelist_false.render(context)
 
+    def stream(self, context):
+        try:
+            var = self.var.eval(context)
+        except VariableDoesNotExist:
+            var = None
+
+        if var:
+            return self.nodelist_true.stream(context)
+        else:
+            return self.nodelist_false.stream(context)
+
 class RegroupNode(Node):
     def __init__(self, target, expression, var_name):
         self.target, self.expression = target, expression
@@ -673,6 +822,10 @@ def do_for(parser, token):
     You can loop over a list in reverse by using
     ``{% for obj in list reversed %}``.
 
+    ``{% for obj in queryset uncached %}`` iterates over a queryset which
+    hasn't been evaluated yet without caching its results, when the loop
+    doesn't use the values depending on its length.
+
     You can also unpack multiple values from a two-dimensional array::
 
         {% for key,value in dict.items %}
@@ -726,7 +879,13 @@ def do_for(parser, token):
         raise TemplateSyntaxError("'for' statements should have at least four"
                                   " words: %s" % token.contents)
 
+    is_uncached = len(bits) > 4 and bits[-1] == 'uncached'
+    if is_uncached:
+        bits = bits[:-1]
     is_reversed = bits[-1] == 'reversed'
+    if is_uncached and is_reversed:
+        raise TemplateSyntaxError("'for' statements can't be both reversed"
+                                  " and uncached: %s" % token.contents)
     in_index = is_reversed and -3 or -2
     if bits[in_index] != 'in':
         raise TemplateSyntaxError("'for' statements should use the format"
@@ -739,6 +898,8 @@ def do_for(parser, token):
                                       " %s" % token.contents)
 
     sequence = parser.compile_filter(bits[in_index+1])
+    # The tokens are looked at before they're consumed by the parser.
+    uses_length = uses_loop_length(loop_body_tokens(parser.tokens))
     nodelist_loop = parser.parse(('empty', 'endfor',))
     token = parser.next_token()
     if token.contents == 'empty':
@@ -746,7 +907,8 @@ def do_for(parser, token):
         parser.delete_first_token()
     else:
         nodelist_empty = None
-    return ForNode(loopvars, sequence, is_reversed, nodelist_loop, nodelist_empty)
+    return ForNode(loopvars, sequence, is_reversed, nodelist_loop, nodelist_empty,
+                   uses_length, is_uncached)
 
 def do_ifequal(parser, token, negate):
     bits = list(token.split_contents())
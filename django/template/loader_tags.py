@@ -65,6 +65,27 @@ class BlockNode(Node):
         context.pop()
         return result
 
+    def stream(self, context):
+        block_context = context.render_context.get(BLOCK_CONTEXT_KEY)
+        context.push()
+        if block_context is None:
+            context['block'] = self
+            for bit in self.nodelist.stream(context):
+                yield bit
+        else:
+            push = block = block_context.pop(self.name)
+            if block is None:
+                block = self
+            # Create new block so we can store context without thread-safety issues.
+            block = BlockNode(block.name, block.nodelist)
+            block.context = context
+            context['block'] = block
+            for bit in block.nodelist.stream(context):
+                yield bit
+            if push is not None:
+                block_context.push(self.name, push)
+        context.pop()
+
     def super(self):
         render_context = self.context.render_context
         if (BLOCK_CONTEXT_KEY in render_context and
@@ -101,6 +122,18 @@ class ExtendsNode(Node):
         return get_template(parent)
 
     def render(self, context):
+        # Call Template._render explicitly so the parser context stays
+        # the same.
+        return self.prepare_parent(context)._render(context)
+
+    def stream(self, context):
+        return self.prepare_parent(context)._stream(context)
+
+    def prepare_parent(self, context):
+        """
+        Returns the parent template, after adding the blocks of this template
+        to the block context.
+        """
         compiled_parent = self.get_parent(context)
 
         if BLOCK_CONTEXT_KEY not in context.render_context:
@@ -120,10 +153,7 @@ class ExtendsNode(Node):
                                    compiled_parent.nodelist.get_nodes_by_type(BlockNode)])
                     block_context.add_blocks(blocks)
                 break
-
-        # Call Template._render explicitly so the parser context stays
-        # the same.
-        return compiled_parent._render(context)
+        return compiled_parent
 
 class BaseIncludeNode(Node):
     def __init__(self, *args, **kwargs):
@@ -141,6 +171,18 @@ class BaseIncludeNode(Node):
         context.pop()
         return output
 
+    def stream_template(self, template, context):
+        values = dict([(name, var.resolve(context)) for name, var
+                       in self.extra_context.iteritems()])
+        if self.isolated_context:
+            for bit in template.stream(context.new(values)):
+                yield bit
+            return
+        context.update(values)
+        for bit in template.stream(context):
+            yield bit
+        context.pop()
+
 class ConstantIncludeNode(BaseIncludeNode):
     def __init__(self, template_path, *args, **kwargs):
         super(ConstantIncludeNode, self).__init__(*args, **kwargs)
@@ -157,21 +199,46 @@ class ConstantIncludeNode(BaseIncludeNode):
             return ''
         return self.render_template(self.template, context)
 
+    def stream(self, context):
+        if not self.template:
+            return iter([])
+        return self.stream_template(self.template, context)
+
 class IncludeNode(BaseIncludeNode):
     def __init__(self, template_name, *args, **kwargs):
         super(IncludeNode, self).__init__(*args, **kwargs)
         self.template_name = template_name
 
+    def resolve_template(self, context):
+        template_name = self.template_name.resolve(context)
+        # The templates loaded by this node while rendering the current
+        # template, so that an include in a loop loads each of them once.
+        templates = context.render_context.get(self)
+        if templates is None:
+            templates = context.render_context[self] = {}
+        template = templates.get(template_name)
+        if template is None:
+            template = templates[template_name] = get_template(template_name)
+        return template
+
     def render(self, context):
         try:
-            template_name = self.template_name.resolve(context)
-            template = get_template(template_name)
+            template = self.resolve_template(context)
             return self.render_template(template, context)
         except:
             if settings.TEMPLATE_DEBUG:
                 raise
             return ''
 
+    def stream(self, context):
+        try:
+            template = self.resolve_template(context)
+            for bit in self.stream_template(template, context):
+                yield bit
+        except:
+            if settings.TEMPLATE_DEBUG:
+                raise
+
 @register.tag('block')
 def do_block(parser, token):
     """
@@ -0,0 +1,98 @@
+"""
+Wrapper for loading templates from a bundle of parsed templates, written by
+the bundletemplates management command.
+"""
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+import warnings
+
+from django import get_version
+from django.conf import settings
+from django.template.base import TemplateDoesNotExist
+from django.template.loader import BaseLoader
+
+# Bundles written with another version of the format, or of Django, are
+# ignored.
+BUNDLE_VERSION = 1
+
+def write_bundle(templates, path):
+    """
+    Writes the templates, a dictionary of Template objects keyed by name, to
+    a bundle file. Returns the names of the templates which couldn't be
+    serialized, and were left out.
+    """
+    data, skipped = {}, []
+    for name, template in templates.items():
+        try:
+            data[name] = pickle.dumps(template, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Templates using nodes that can't be pickled, such as the ones
+            # defined by the simple_tag decorator, are left out.
+            skipped.append(name)
+    bundle = {
+        'version': BUNDLE_VERSION,
+        'django_version': get_version(),
+        'templates': data,
+    }
+    f = open(path, 'wb')
+    try:
+        pickle.dump(bundle, f, pickle.HIGHEST_PROTOCOL)
+    finally:
+        f.close()
+    return skipped
+
+def read_bundle(path):
+    """
+    Returns the templates stored in a bundle file, keyed by name.
+    """
+    f = open(path, 'rb')
+    try:
+        bundle = pickle.load(f)
+    finally:
+        f.close()
+    if (bundle.get('version') != BUNDLE_VERSION or
+            bundle.get('django_version') != get_version()):
+        raise ValueError("The template bundle %s was written by another "
+                         "version of Django." % path)
+    templates = {}
+    for name, data in bundle['templates'].items():
+        try:
+            templates[name] = pickle.loads(data)
+        except Exception:
+            # The code of the nodes may have changed since the bundle was
+            # written, leave the template to the other loaders.
+            pass
+    return templates
+
+class Loader(BaseLoader):
+    """
+    Loads the templates of the bundle file given as argument when created.
+    The templates which aren't in the bundle are left to the other loaders,
+    as are all the templates when TEMPLATE_DEBUG or TEMPLATE_PROFILE is on,
+    since the bundled ones were parsed without the source information and
+    profiling nodes these settings add.
+    """
+    is_usable = True
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self.templates = read_bundle(path)
+        except Exception, e:
+            warnings.warn("The template bundle %s can't be read: %s" % (path, e))
+            self.templates = {}
+
+    def load_template(self, template_name, template_dirs=None):
+        # The bundle holds the templates found in the default directories.
+        if not (template_dirs or settings.TEMPLATE_DEBUG or settings.TEMPLATE_PROFILE):
+            try:
+                return self.templates[template_name], None
+            except KeyError:
+                pass
+        raise TemplateDoesNotExist(template_name)
+
+    def load_template_source(self, template_name, template_dirs=None):
+        raise TemplateDoesNotExist(template_name)
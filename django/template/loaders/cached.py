@@ -4,14 +4,27 @@ to load templates from them in order, caching the result.
 """
 
 import hashlib
+import os
+
+from django.conf import settings
 from django.template.base import TemplateDoesNotExist
 from django.template.loader import BaseLoader, get_template_from_string, find_template_loader, make_origin
+from django.template.loader_tags import ConstantIncludeNode
+
+# The number of missing templates remembered. Their names may come from
+# variables, so the cache is emptied when it's full instead of growing.
+MAX_MISSING_TEMPLATES = 1000
 
 class Loader(BaseLoader):
     is_usable = True
 
     def __init__(self, loaders):
         self.template_cache = {}
+        self.missing_templates = set()
+        # The paths and modification times of the files of the cached
+        # templates and of the templates they include with a constant name,
+        # used when TEMPLATE_CACHE_AUTO_RELOAD is True.
+        self.mtimes = {}
         self._loaders = loaders
         self._cached_loaders = []
 
@@ -23,23 +36,85 @@ class Loader(BaseLoader):
                 self._cached_loaders.append(find_template_loader(loader))
         return self._cached_loaders
 
+    def cache_key(self, template_name, template_dirs):
+        if template_dirs:
+            # If template directories were specified, use a hash to differentiate
+            return '-'.join([template_name, hashlib.sha1('|'.join(template_dirs)).hexdigest()])
+        return template_name
+
     def find_template(self, name, dirs=None):
+        template, origin, loader = self._find_template(name, dirs)
+        return template, origin
+
+    def _find_template(self, name, dirs):
         for loader in self.loaders:
             try:
                 template, display_name = loader(name, dirs)
-                return (template, make_origin(display_name, loader, name, dirs))
+                return (template, make_origin(display_name, loader, name, dirs), loader)
             except TemplateDoesNotExist:
                 pass
         raise TemplateDoesNotExist(name)
 
+    def get_mtime(self, loader, name, dirs):
+        """
+        Returns the path and the modification time of the file the loader
+        loads the template from, or None for loaders that don't load
+        templates from files.
+        """
+        if not hasattr(loader, 'get_template_sources'):
+            return None
+        for filepath in loader.get_template_sources(name, dirs):
+            try:
+                return filepath, os.stat(filepath).st_mtime
+            except OSError:
+                pass
+        return None
+
+    def get_mtimes(self, template, loader, name, dirs):
+        """
+        Returns the paths and modification times of the files of the
+        template and of the templates it includes with a constant name, which
+        are compiled into it.
+        """
+        mtimes = []
+        file_mtime = self.get_mtime(loader, name, dirs)
+        if file_mtime is not None:
+            mtimes.append(file_mtime)
+        for node in template.nodelist.get_nodes_by_type(ConstantIncludeNode):
+            if node.template is not None:
+                mtimes.extend(self.mtimes.get(self.cache_key(node.template.name, None), []))
+        return mtimes
+
+    def is_stale(self, key):
+        for filepath, mtime in self.mtimes.get(key, []):
+            try:
+                if os.stat(filepath).st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
     def load_template(self, template_name, template_dirs=None):
-        key = template_name
-        if template_dirs:
-            # If template directories were specified, use a hash to differentiate
-            key = '-'.join([template_name, hashlib.sha1('|'.join(template_dirs)).hexdigest()])
+        key = self.cache_key(template_name, template_dirs)
+        if key in self.missing_templates:
+            # A previous lookup didn't find the template.
+            raise TemplateDoesNotExist(template_name)
+        template = self.template_cache.get(key)
+        auto_reload = settings.TEMPLATE_CACHE_AUTO_RELOAD
+        if auto_reload and template is not None and self.is_stale(key):
+            template = None
 
-        if key not in self.template_cache:
-            template, origin = self.find_template(template_name, template_dirs)
+        if template is None:
+            try:
+                template, origin, loader = self._find_template(template_name, template_dirs)
+            except TemplateDoesNotExist:
+                # Missing templates are only remembered when templates
+                # aren't reloaded, since they may be created later on.
+                if not auto_reload:
+                    if len(self.missing_templates) >= MAX_MISSING_TEMPLATES:
+                        self.missing_templates.clear()
+                    self.missing_templates.add(key)
+                raise
             if not hasattr(template, 'render'):
                 try:
                     template = get_template_from_string(template, origin, template_name)
@@ -49,9 +124,13 @@ class Loader(BaseLoader):
                     # we were asked to load. This allows for correct identification (later)
                     # of the actual template that does not exist.
                     return template, origin
+            if auto_reload:
+                self.mtimes[key] = self.get_mtimes(template, loader, template_name, template_dirs)
             self.template_cache[key] = template
-        return self.template_cache[key], None
+        return template, None
 
     def reset(self):
         "Empty the template cache."
         self.template_cache.clear()
+        self.missing_templates.clear()
+        self.mtimes.clear()
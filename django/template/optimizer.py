@@ -0,0 +1,162 @@
+"""
+Simplifies the nodelists of parsed templates.
+
+The filters of the variables, {% with %} values and {% if %} conditions made
+of literals and pure filters are applied once, when the template is parsed.
+The variables which then render the same text whatever the context become
+text, adjacent text nodes are merged, and the {% if %} tags whose conditions
+are made of literals are replaced by the branch they render.
+
+Optimized nodelists render exactly the same output as the nodelists they
+replace; they are only faster.
+"""
+from django.template.base import (FilterExpression, NodeList, TextNode,
+    Variable, VariableNode)
+from django.template.context import Context
+from django.template.defaulttags import IfNode, TemplateLiteral, WithNode
+from django.utils.encoding import force_unicode
+from django.utils.html import escape
+from django.utils.safestring import SafeData, EscapeData
+
+# The types of the values which may be computed once for all renderings.
+CONSTANT_TYPES = (basestring, int, long, float, bool)
+
+def is_constant(filter_expression):
+    """
+    Returns True if the filter expression is a literal without filters.
+    """
+    return (type(filter_expression) is FilterExpression and
+            not filter_expression.filters and
+            isinstance(filter_expression.var, CONSTANT_TYPES))
+
+def fold_expression(filter_expression):
+    """
+    Applies the filters of an expression whose variable is a literal, when
+    they're all pure and only take literal arguments, and stores the result
+    as the literal of the expression.
+    """
+    if type(filter_expression) is not FilterExpression:
+        return
+    var = filter_expression.var
+    if (isinstance(var, Variable) and var.lookups is None and
+            not var.translate and isinstance(var.literal, CONSTANT_TYPES)):
+        # Numbers are parsed as Variables resolving to themselves.
+        filter_expression.var = var.literal
+    if (not filter_expression.filters or
+            not isinstance(filter_expression.var, CONSTANT_TYPES)):
+        return
+    for func, args in filter_expression.filters:
+        if (not getattr(func, 'is_pure', False) or
+                getattr(func, 'needs_autoescape', False)):
+            return
+        for lookup, arg in args:
+            if lookup or not isinstance(arg, CONSTANT_TYPES):
+                return
+    try:
+        value = filter_expression.resolve(Context())
+    except Exception:
+        # The error is raised when the template is rendered.
+        return
+    if isinstance(value, CONSTANT_TYPES):
+        filter_expression.var = value
+        filter_expression.filters = []
+
+def fold_node(node):
+    """
+    Folds the filter expressions of variables and of {% with %} tags. Other
+    tags are left alone, since they may rely on the variables of their
+    expressions.
+    """
+    if type(node) is VariableNode:
+        fold_expression(node.filter_expression)
+    elif type(node) is WithNode:
+        for filter_expression in node.extra_context.values():
+            fold_expression(filter_expression)
+
+def fold_condition(condition):
+    """
+    Folds the filter expressions of the condition of an {% if %} tag, and
+    returns True if the condition is made of literals only.
+    """
+    if isinstance(condition, TemplateLiteral):
+        fold_expression(condition.value)
+        return is_constant(condition.value)
+    if condition.first is None:
+        return False
+    constant = fold_condition(condition.first)
+    if condition.second is not None:
+        constant = fold_condition(condition.second) and constant
+    return constant
+
+def render_constant(node):
+    """
+    Returns the text a variable node renders whatever the context, or None.
+    Mirrors _render_value_in_context for safe and escaped strings.
+    """
+    filter_expression = node.filter_expression
+    if not is_constant(filter_expression):
+        return None
+    value = filter_expression.var
+    try:
+        if isinstance(value, SafeData):
+            return force_unicode(value)
+        elif isinstance(value, EscapeData):
+            return escape(force_unicode(value))
+    except UnicodeDecodeError:
+        pass
+    return None
+
+def append_node(nodes, node):
+    """
+    Appends a node to a list of nodes, merging adjacent text nodes.
+    """
+    if (type(node) is TextNode and nodes and type(nodes[-1]) is TextNode and
+            isinstance(node.s, unicode) and isinstance(nodes[-1].s, unicode)):
+        node = TextNode(nodes.pop().s + node.s)
+    nodes.append(node)
+
+def optimize_nodes(nodes):
+    """
+    Returns the optimized list of nodes.
+    """
+    result = []
+    for node in nodes:
+        if type(node) is IfNode and fold_condition(node.var):
+            try:
+                condition = node.var.eval(Context())
+            except Exception:
+                pass
+            else:
+                # Only the branch the tag renders is kept.
+                if condition:
+                    branch = node.nodelist_true
+                else:
+                    branch = node.nodelist_false
+                for branch_node in optimize_nodes(branch or []):
+                    append_node(result, branch_node)
+                continue
+        fold_node(node)
+        if type(node) is VariableNode:
+            text = render_constant(node)
+            if text is not None:
+                node = TextNode(text)
+        else:
+            for attr in node.child_nodelists:
+                nodelist = getattr(node, attr, None)
+                if type(nodelist) is NodeList:
+                    setattr(node, attr, optimize_nodelist(nodelist))
+        append_node(result, node)
+    return result
+
+def optimize_nodelist(nodelist):
+    """
+    Returns a NodeList rendering the same output as nodelist, optimized.
+
+    Lists that aren't plain NodeLists, such as the ones built when
+    TEMPLATE_DEBUG is True, are returned unchanged.
+    """
+    if type(nodelist) is not NodeList:
+        return nodelist
+    optimized = NodeList(optimize_nodes(nodelist))
+    optimized.contains_nontext = getattr(nodelist, 'contains_nontext', False)
+    return optimized
@@ -0,0 +1,148 @@
+"""
+Records how long templates, blocks and tags take to render.
+
+When the TEMPLATE_PROFILE setting is True, the nodelists of the templates
+are replaced by ProfilingNodeLists when the templates are created. They add
+the time spent rendering each template, each {% block %} and each node to
+the stats collector of this module, keyed by template name, block name and
+node class. Times are cumulative: the time of a tag includes the time of the
+tags it contains, and the time of a template the time of the templates it
+includes or extends.
+
+Templates created when the setting is False aren't instrumented at all.
+"""
+import threading
+from time import time
+
+from django.template.base import NodeList, TextNode
+from django.template.loader_tags import BlockNode
+
+class RenderStats(object):
+    """
+    Collects the number of renderings and the cumulative time, in seconds,
+    of the templates, blocks and tags.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        "Forgets the recorded renderings."
+        self.lock.acquire()
+        try:
+            self.templates, self.blocks, self.tags = {}, {}, {}
+        finally:
+            self.lock.release()
+
+    def record(self, kind, name, seconds):
+        stats = getattr(self, kind)
+        self.lock.acquire()
+        try:
+            count, total = stats.get(name, (0, 0.0))
+            stats[name] = (count + 1, total + seconds)
+        finally:
+            self.lock.release()
+
+    def items(self, kind):
+        """
+        Returns a list of (name, count, seconds) tuples for the templates,
+        blocks or tags, the slowest first.
+        """
+        self.lock.acquire()
+        try:
+            items = [(name, count, total) for name, (count, total)
+                     in getattr(self, kind).items()]
+        finally:
+            self.lock.release()
+        items.sort(key=lambda item: item[2], reverse=True)
+        return items
+
+# The stats of all the profiled templates rendered by the process.
+stats = RenderStats()
+
+def node_name(node):
+    cls = node.__class__
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+class ProfilingNodeList(NodeList):
+    """
+    A NodeList recording the time taken by its nodes, and by the whole
+    template when it's the nodelist of a template.
+    """
+    def __init__(self, nodes, template_name=None):
+        super(ProfilingNodeList, self).__init__(nodes)
+        self.template_name = template_name
+
+    def render(self, context):
+        if self.template_name is None:
+            return super(ProfilingNodeList, self).render(context)
+        start = time()
+        try:
+            return super(ProfilingNodeList, self).render(context)
+        finally:
+            stats.record('templates', self.template_name, time() - start)
+
+    def stream(self, context):
+        if self.template_name is None:
+            return super(ProfilingNodeList, self).stream(context)
+        return self.profile_stream(super(ProfilingNodeList, self).stream(context),
+                                   'templates', self.template_name)
+
+    def render_node(self, node, context):
+        if isinstance(node, TextNode):
+            return node.render(context)
+        start = time()
+        try:
+            return node.render(context)
+        finally:
+            seconds = time() - start
+            stats.record('tags', node_name(node), seconds)
+            if isinstance(node, BlockNode):
+                stats.record('blocks', node.name, seconds)
+
+    def stream_node(self, node, context):
+        bits = node.stream(context)
+        if isinstance(node, TextNode):
+            return bits
+        if isinstance(node, BlockNode):
+            bits = self.profile_stream(bits, 'blocks', node.name)
+        return self.profile_stream(bits, 'tags', node_name(node))
+
+    def profile_stream(self, bits, kind, name):
+        """
+        Yields the bits, recording the time spent producing them, but not the
+        time spent by the consumer of the stream.
+        """
+        seconds = 0.0
+        bits = iter(bits)
+        try:
+            while True:
+                start = time()
+                try:
+                    bit = bits.next()
+                finally:
+                    seconds += time() - start
+                yield bit
+        finally:
+            stats.record(kind, name, seconds)
+
+def profile_nodelist(nodelist, template_name=None):
+    """
+    Returns a ProfilingNodeList rendering the same output as nodelist. The
+    nodelists of its nodes are replaced by ProfilingNodeLists as well.
+
+    Lists that aren't plain NodeLists, such as the ones built when
+    TEMPLATE_DEBUG is True, are returned unchanged.
+    """
+    if type(nodelist) is not NodeList:
+        return nodelist
+    for node in nodelist:
+        if isinstance(node, TextNode):
+            continue
+        for attr in node.child_nodelists:
+            child = getattr(node, attr, None)
+            if type(child) is NodeList:
+                setattr(node, attr, profile_nodelist(child))
+    profiled = ProfilingNodeList(nodelist, template_name)
+    profiled.contains_nontext = nodelist.contains_nontext
+    return profiled
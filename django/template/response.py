@@ -1,5 +1,9 @@
+from __future__ import with_statement
+
+from django.core import signals
 from django.http import HttpResponse
 from django.template import loader, Context, RequestContext
+from django.utils import translation
 
 
 class ContentNotRenderedError(Exception):
@@ -156,3 +160,66 @@ class TemplateResponse(SimpleTemplateResponse):
         if isinstance(context, Context):
             return context
         return RequestContext(self._request, context, current_app=self._current_app)
+
+
+class StreamingTemplateResponse(TemplateResponse):
+    """
+    A TemplateResponse sending the template while it's rendered, in chunks of
+    at least chunk_size characters, rather than once it's fully rendered.
+    """
+    chunk_size = 8192
+
+    # Set by the handler when the response is streamed, so that the
+    # request_finished signal is sent once the response was sent.
+    _handler_class = None
+
+    @property
+    def rendered_content(self):
+        """Returns an iterator over the chunks of the template rendered with
+        the context described by the response.
+        """
+        template = self.resolve_template(self.template_name)
+        context = self.resolve_context(self.context_data)
+        return self._join_chunks(template.stream(context), translation.get_language())
+
+    def _join_chunks(self, stream, language):
+        while True:
+            # The template is rendered while the response is sent, after
+            # the middleware deactivated the language of the request.
+            with translation.override(language):
+                bits, size = [], 0
+                for bit in stream:
+                    bits.append(bit)
+                    size += len(bit)
+                    if size >= self.chunk_size:
+                        break
+            if not bits:
+                return
+            yield u''.join(bits)
+
+    @property
+    def streaming(self):
+        "Whether the template is still to be rendered as it's sent."
+        return self._is_rendered and not isinstance(self._container, list)
+
+    def close(self):
+        try:
+            super(StreamingTemplateResponse, self).close()
+        finally:
+            if self._handler_class is not None:
+                handler_class, self._handler_class = self._handler_class, None
+                signals.request_finished.send(sender=handler_class)
+
+    def _get_content(self):
+        # Accessing the content renders the whole template. Keep the chunks
+        # so that the response can still be iterated over afterwards.
+        if self.streaming:
+            self._container = list(self._container)
+        return super(StreamingTemplateResponse, self)._get_content()
+
+    content = property(_get_content, SimpleTemplateResponse._set_content)
+
+    def __getstate__(self):
+        if self._is_rendered:
+            self._get_content()
+        return super(StreamingTemplateResponse, self).__getstate__()
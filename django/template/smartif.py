@@ -62,6 +62,9 @@ def infix(bp, func):
                 # %} where 'bar' does not support 'in', so default to False
                 return False
 
+        def __reduce__(self):
+            return (create_operator, (self.id,), self.__dict__)
+
     return Operator
 
 
@@ -84,6 +87,9 @@ def prefix(bp, func):
             except Exception:
                 return False
 
+        def __reduce__(self):
+            return (create_operator, (self.id,), self.__dict__)
+
     return Operator
 
 
@@ -111,6 +117,13 @@ OPERATORS = {
 for key, op in OPERATORS.items():
     op.id = key
 
+def create_operator(id):
+    """
+    Returns a new instance of the operator class, which can only be found
+    through OPERATORS, for unpickling operators.
+    """
+    return OPERATORS[id]()
+
 
 class Literal(TokenBase):
     """
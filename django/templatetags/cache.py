@@ -7,11 +7,33 @@ from django.utils.http import urlquote
 register = Library()
 
 class CacheNode(Node):
-    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on):
+    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on, tags=(),
+                 lock_timeout=None):
         self.nodelist = nodelist
         self.expire_time_var = Variable(expire_time_var)
         self.fragment_name = fragment_name
         self.vary_on = vary_on
+        self.tags = tags
+        self.lock_timeout = lock_timeout
+
+    def resolve_lock_timeout(self, context):
+        if self.lock_timeout is None:
+            return 0
+        lock_timeout = self.lock_timeout.resolve(context)
+        try:
+            return int(lock_timeout)
+        except (ValueError, TypeError):
+            raise TemplateSyntaxError('"cache" tag got a non-integer lock_timeout value: %r' % lock_timeout)
+
+    def resolve_tags(self, context):
+        tags = []
+        for tag in self.tags:
+            tag = tag.resolve(context)
+            if isinstance(tag, basestring):
+                tags.append(tag)
+            else:
+                tags.extend(tag)
+        return tags
 
     def render(self, context):
         try:
@@ -25,11 +47,10 @@ class CacheNode(Node):
         # Build a unicode key for this fragment and all vary-on's.
         args = hashlib.md5(u':'.join([urlquote(resolve_variable(var, context)) for var in self.vary_on]))
         cache_key = 'template.cache.%s.%s' % (self.fragment_name, args.hexdigest())
-        value = cache.get(cache_key)
-        if value is None:
-            value = self.nodelist.render(context)
-            cache.set(cache_key, value, expire_time)
-        return value
+        return cache.get_or_set(cache_key,
+                                lambda: self.nodelist.render(context),
+                                expire_time, tags=self.resolve_tags(context),
+                                lock_timeout=self.resolve_lock_timeout(context))
 
 @register.tag('cache')
 def do_cache(parser, token):
@@ -52,10 +73,35 @@ def do_cache(parser, token):
         {% endcache %}
 
     Each unique set of arguments will result in a unique cache entry.
+
+    The fragment can be stored with tags, given as strings or lists of
+    strings, so that it can be expired with ``cache.invalidate_tags()``::
+
+        {% load cache %}
+        {% cache [expire_time] [fragment_name] [var1] .. tags=[tag1] tags=[tag2] .. %}
+            .. some expensive processing ..
+        {% endcache %}
+
+    A ``lock_timeout`` argument makes a single request render an expired
+    fragment, while the others wait up to that many seconds for it to be
+    cached::
+
+        {% load cache %}
+        {% cache [expire_time] [fragment_name] [var1] .. lock_timeout=10 %}
+            .. some expensive processing ..
+        {% endcache %}
     """
     nodelist = parser.parse(('endcache',))
     parser.delete_first_token()
     tokens = token.contents.split()
     if len(tokens) < 3:
         raise TemplateSyntaxError(u"'%r' tag requires at least 2 arguments." % tokens[0])
-    return CacheNode(nodelist, tokens[1], tokens[2], tokens[3:])
+    vary_on, tags, lock_timeout = [], [], None
+    for bit in tokens[3:]:
+        if bit.startswith('tags='):
+            tags.append(parser.compile_filter(bit[5:]))
+        elif bit.startswith('lock_timeout='):
+            lock_timeout = parser.compile_filter(bit[13:])
+        else:
+            vary_on.append(bit)
+    return CacheNode(nodelist, tokens[1], tokens[2], vary_on, tags, lock_timeout)
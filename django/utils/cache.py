@@ -23,12 +23,16 @@ import time
 
 from django.conf import settings
 from django.core.cache import get_cache
+from django.core.cache.backends.base import get_tag_key, check_tag_generations
 from django.utils.encoding import smart_str, iri_to_uri
 from django.utils.http import http_date
 from django.utils.translation import get_language
 
 cc_delim_re = re.compile(r'\s*,\s*')
 
+# The maximum number of header lists remembered by get_cached_response.
+MAX_HEADER_LISTS = 1000
+
 def patch_cache_control(response, **kwargs):
     """
     This function patches the Cache-Control header by adding all
@@ -205,6 +209,76 @@ def get_cache_key(request, key_prefix=None, method='GET', cache=None):
     else:
         return None
 
+def get_cached_response(request, key_prefix=None, cache=None, header_lists=None,
+                        tags=None):
+    """
+    Returns the response cached for the request by ``learn_cache_key``, or
+    None. The GET response is also used for HEAD requests.
+
+    If given, ``header_lists`` is a dictionary in which the header lists
+    read from the cache are remembered. Once the header list of the request
+    path is known, it is fetched together with the page with a single
+    ``get_many``, only to check that it hasn't changed.
+
+    If ``tags`` are given, the response must have been stored with
+    ``set_tagged`` and is only returned if none of the tags has been
+    invalidated since. The generations of the tags are fetched in the same
+    ``get_many``.
+    """
+    if key_prefix is None:
+        key_prefix = settings.CACHE_MIDDLEWARE_KEY_PREFIX
+    if cache is None:
+        cache = get_cache(settings.CACHE_MIDDLEWARE_ALIAS)
+    if header_lists is None:
+        header_lists = {}
+    header_key = _generate_cache_header_key(key_prefix, request)
+    tag_keys = [get_tag_key(tag) for tag in tags or ()]
+    headerlist = header_lists.get(header_key)
+    if headerlist is None:
+        headerlist = cache.get(header_key, None)
+        if headerlist is None:
+            return None
+    methods = ['GET']
+    if request.method == 'HEAD':
+        methods.append('HEAD')
+    # The header list only changes when the Vary header of the page does, so
+    # this doesn't loop more than a couple of times.
+    while True:
+        cache_keys = [_generate_cache_key(request, method, headerlist, key_prefix)
+                      for method in methods]
+        values = cache.get_many([header_key] + cache_keys + tag_keys)
+        current = values.get(header_key)
+        if current is None:
+            header_lists.pop(header_key, None)
+            return None
+        if len(header_lists) >= MAX_HEADER_LISTS:
+            header_lists.clear()
+        header_lists[header_key] = current
+        if current == headerlist:
+            break
+        headerlist = current
+    for cache_key in cache_keys:
+        if cache_key in values:
+            if tags:
+                return check_tag_generations(values[cache_key], tags, values)
+            return values[cache_key]
+    return None
+
+def get_cache_lock_key(request, key_prefix=None, cache=None):
+    """
+    Returns the cache key of the lock held while the page for the request is
+    being generated, so that other requests for that page can wait for it to
+    be cached instead of generating it too.
+
+    The key depends on the headers the page varies on, so if no response has
+    been cached for the request path (and so the page may not be cacheable
+    at all), this function returns None.
+    """
+    cache_key = get_cache_key(request, key_prefix, request.method, cache)
+    if cache_key is None:
+        return None
+    return '%s.lock' % cache_key
+
 def learn_cache_key(request, response, cache_timeout=None, key_prefix=None, cache=None):
     """
     Learns what headers to take into account for some request path from the
@@ -170,11 +170,15 @@ def allow_lazy(func, *resultclasses):
     """
     @wraps(func)
     def wrapper(*args, **kwargs):
-        for arg in list(args) + kwargs.values():
+        for arg in args:
             if isinstance(arg, Promise):
                 break
         else:
-            return func(*args, **kwargs)
+            for arg in kwargs.itervalues():
+                if isinstance(arg, Promise):
+                    break
+            else:
+                return func(*args, **kwargs)
         return lazy(func, *resultclasses)(*args, **kwargs)
     return wrapper
 
@@ -3,7 +3,7 @@
 import re
 import string
 
-from django.utils.safestring import SafeData, mark_safe
+from django.utils.safestring import SafeData, SafeUnicode, mark_safe
 from django.utils.encoding import force_unicode
 from django.utils.functional import allow_lazy
 from django.utils.http import urlquote
@@ -32,7 +32,12 @@ def escape(html):
     """
     Returns the given HTML with ampersands, quotes and angle brackets encoded.
     """
-    return mark_safe(force_unicode(html).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&#39;'))
+    if not isinstance(html, unicode):
+        html = force_unicode(html)
+    # Chained replace() calls are faster than a translation table or a
+    # regular expression. Strings that contain none of the special characters
+    # are returned unchanged.
+    return SafeUnicode(html.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&#39;'))
 escape = allow_lazy(escape, unicode)
 
 _base_js_escapes = (
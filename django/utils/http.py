@@ -184,6 +184,45 @@ def parse_etags(etag_str):
     etags = [e.decode('string_escape') for e in etags]
     return etags
 
+def parse_range_header(header, size):
+    """
+    Parses the value of a Range header (RFC 2616, section 14.35) for an entity
+    of ``size`` bytes.
+
+    Returns a list of inclusive ``(first, last)`` byte positions of the
+    satisfiable ranges, which is empty if none of them is satisfiable, or None
+    if the header is malformed and should be ignored.
+    """
+    units, _, range_set = header.partition('=')
+    if units.strip().lower() != 'bytes':
+        return None
+    specs = [spec.strip() for spec in range_set.split(',') if spec.strip()]
+    if not specs:
+        return None
+    ranges = []
+    for spec in specs:
+        first, sep, last = spec.partition('-')
+        first, last = first.strip(), last.strip()
+        if not sep:
+            return None
+        if not first:
+            # A suffix range: the last N bytes of the entity.
+            if not last.isdigit():
+                return None
+            length = int(last)
+            if length and size:
+                ranges.append((max(size - length, 0), size - 1))
+            continue
+        if not first.isdigit() or (last and not last.isdigit()):
+            return None
+        first = int(first)
+        if last and int(last) < first:
+            return None
+        if first < size:
+            last = int(last) if last else size - 1
+            ranges.append((first, min(last, size - 1)))
+    return ranges
+
 def quote_etag(etag):
     """
     Wraps a string in double quotes escaping contents as necesary.
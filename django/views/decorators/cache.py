@@ -17,6 +17,10 @@ def cache_page(*args, **kwargs):
 
     Additionally, all headers from the response's Vary header will be taken
     into account on caching -- just like the middleware does.
+
+    The tags argument is a list of tags the page is stored with, or a function
+    taking the request and returning them, so that the page can be expired
+    with the invalidate_tags() method of the cache.
     """
     # We need backwards compatibility with code which spells it this way:
     #   def my_view(): pass
@@ -38,11 +42,12 @@ def cache_page(*args, **kwargs):
     # using other ways to call cache_page that no longer work.
     cache_alias = kwargs.pop('cache', None)
     key_prefix = kwargs.pop('key_prefix', None)
-    assert not kwargs, "The only keyword arguments are cache and key_prefix"
+    tags = kwargs.pop('tags', None)
+    assert not kwargs, "The only keyword arguments are cache, key_prefix and tags"
     def warn():
         import warnings
         warnings.warn('The cache_page decorator must be called like: '
-                      'cache_page(timeout, [cache=cache name], [key_prefix=key prefix]). '
+                      'cache_page(timeout, [cache=cache name], [key_prefix=key prefix], [tags=tags]). '
                       'All other ways are deprecated.',
                       PendingDeprecationWarning)
 
@@ -50,21 +55,21 @@ def cache_page(*args, **kwargs):
         assert len(args) == 2, "cache_page accepts at most 2 arguments"
         warn()
         if callable(args[0]):
-            return decorator_from_middleware_with_args(CacheMiddleware)(cache_timeout=args[1], cache_alias=cache_alias, key_prefix=key_prefix)(args[0])
+            return decorator_from_middleware_with_args(CacheMiddleware)(cache_timeout=args[1], cache_alias=cache_alias, key_prefix=key_prefix, tags=tags)(args[0])
         elif callable(args[1]):
-            return decorator_from_middleware_with_args(CacheMiddleware)(cache_timeout=args[0], cache_alias=cache_alias, key_prefix=key_prefix)(args[1])
+            return decorator_from_middleware_with_args(CacheMiddleware)(cache_timeout=args[0], cache_alias=cache_alias, key_prefix=key_prefix, tags=tags)(args[1])
         else:
             assert False, "cache_page must be passed a view function if called with two arguments"
     elif len(args) == 1:
         if callable(args[0]):
             warn()
-            return decorator_from_middleware_with_args(CacheMiddleware)(cache_alias=cache_alias, key_prefix=key_prefix)(args[0])
+            return decorator_from_middleware_with_args(CacheMiddleware)(cache_alias=cache_alias, key_prefix=key_prefix, tags=tags)(args[0])
         else:
             # The One True Way
-            return decorator_from_middleware_with_args(CacheMiddleware)(cache_timeout=args[0], cache_alias=cache_alias, key_prefix=key_prefix)
+            return decorator_from_middleware_with_args(CacheMiddleware)(cache_timeout=args[0], cache_alias=cache_alias, key_prefix=key_prefix, tags=tags)
     else:
         warn()
-        return decorator_from_middleware_with_args(CacheMiddleware)(cache_alias=cache_alias, key_prefix=key_prefix)
+        return decorator_from_middleware_with_args(CacheMiddleware)(cache_alias=cache_alias, key_prefix=key_prefix, tags=tags)
 
 
 def cache_control(**kwargs):
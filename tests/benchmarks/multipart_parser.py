@@ -0,0 +1,55 @@
+"""
+Measures the throughput of the multipart parser on an upload of one large
+file and on an upload of many small files.
+"""
+from django.conf import settings
+
+# Settings must be configured before importing the parser.
+settings.configure()
+
+import time
+from StringIO import StringIO
+
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParser
+
+
+class CountingUploadHandler(FileUploadHandler):
+    "Only counts the bytes of the uploaded files."
+    def new_file(self, *args, **kwargs):
+        super(CountingUploadHandler, self).new_file(*args, **kwargs)
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+
+    def file_complete(self, file_size):
+        return file_size
+
+def benchmark(files, chunk_size=64 * 2**10):
+    """
+    Returns the megabytes per second parsed from a payload holding the
+    given (name, content) files.
+    """
+    boundary = 'BoUnDaRyStRiNg'
+    parts = []
+    for name, content in files:
+        parts.append('--%s\r\nContent-Disposition: form-data; name="%s"; '
+                     'filename="%s.bin"\r\nContent-Type: application/octet-stream'
+                     '\r\n\r\n%s\r\n' % (boundary, name, name, content))
+    payload = ''.join(parts) + '--%s--\r\n' % boundary
+    handler = CountingUploadHandler()
+    handler.chunk_size = chunk_size
+    parser = MultiPartParser({
+        'CONTENT_TYPE': 'multipart/form-data; boundary=%s' % boundary,
+        'CONTENT_LENGTH': str(len(payload)),
+    }, StringIO(payload), [handler], 'utf-8')
+    start = time.time()
+    parser.parse()
+    return len(payload) / (time.time() - start) / 2**20
+
+
+if __name__ == '__main__':
+    print 'One large file:      %.1f MB/s' % benchmark([('file', 'x' * (8 * 2**20))])
+    print 'Many small files:    %.1f MB/s' % benchmark(
+        [('file%d' % i, 'x' * 500) for i in range(2000)])
@@ -0,0 +1,50 @@
+"""
+Compares looking up variables in the innermost scope of a context first
+with walking the whole stack of dictionaries, when rendering nested loops in
+a context holding the dictionaries of several context processors.
+"""
+from django.conf import settings
+
+# Settings must be configured before importing 'template'.
+settings.configure()
+
+import time
+
+from django.template import Context, Template
+
+
+class StackContext(Context):
+    """
+    A context looking up every variable by walking the stack of dictionaries
+    from the top, without checking the innermost scope first.
+    """
+    def __getitem__(self, key):
+        for d in reversed(self.dicts):
+            if key in d:
+                return d[key]
+        raise KeyError(key)
+
+TEMPLATE = (u'{% for row in rows %}{% for name, value in row %}'
+            u'{{ name }}={{ value }}{% if forloop.first %}{{ title }}'
+            u'{% endif %}{% endfor %}{% endfor %}')
+
+def benchmark(renders=20, rows=100, depth=8, context_class=Context):
+    """
+    Returns the seconds taken to render the template in a context holding
+    'depth' dictionaries.
+    """
+    t = Template(TEMPLATE)
+    context = context_class({'title': u'title'})
+    for i in range(depth):
+        context.update({'value%d' % i: i})
+    context.update({'rows': [[(u'name%d' % j, j) for j in range(10)]
+                             for i in range(rows)]})
+    start = time.time()
+    for i in xrange(renders):
+        t.render(context)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    print 'Whole stack walked:       %.3fs' % benchmark(context_class=StackContext)
+    print 'Innermost scope first:    %.3fs' % benchmark()
@@ -0,0 +1,38 @@
+"""
+Compares rendering a loop which sets the forloop values depending on the
+length of the sequence for every item with one leaving them to be computed
+when they're looked up.
+"""
+from django.conf import settings
+
+# Settings must be configured before importing 'template'.
+settings.configure()
+
+import time
+
+from django.template import Context, Template
+from django.template.defaulttags import ForNode
+
+
+TEMPLATE = (u'{% for item in items %}{{ forloop.counter }}'
+            u'{% if forloop.first %}first{% endif %}{% endfor %}')
+
+def benchmark(renders=100, items=100, uses_length=False):
+    """
+    Returns the seconds taken to render the template. With uses_length=True,
+    the values depending on the length of the sequence are set for every
+    item, like when the template uses them.
+    """
+    t = Template(TEMPLATE)
+    for node in t.nodelist.get_nodes_by_type(ForNode):
+        node.uses_length = uses_length
+    context = Context({'items': range(items)})
+    start = time.time()
+    for i in xrange(renders):
+        t.render(context)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    print 'Length dependent values set:     %.3fs' % benchmark(uses_length=True)
+    print 'Length dependent values lazy:    %.3fs' % benchmark()
@@ -0,0 +1,52 @@
+"""
+Compares rendering a template looking up the attributes of objects with and
+without remembering the access paths of the variable lookups.
+"""
+from django.conf import settings
+
+# Settings must be configured before importing 'template'.
+settings.configure()
+
+import time
+
+from django.template import Context, Template
+from django.template import base as template_base
+
+
+class Item(object):
+    def __init__(self, name, price):
+        self.name = name
+        self.price = price
+
+    def label(self):
+        return u'%s (%s)' % (self.name, self.price)
+
+class ForgetfulDict(dict):
+    def __setitem__(self, key, value):
+        pass
+
+TEMPLATE = (u'{% for item in items %}{{ item.name }} {{ item.price }} '
+            u'{{ item.label }} {{ item.name.upper }}{% endfor %}')
+
+def benchmark(renders=100, items=100, remember=True):
+    """
+    Returns the seconds taken to render the template. With remember=False,
+    the variable lookups don't remember their access paths.
+    """
+    t = Template(TEMPLATE)
+    context = Context({'items': [Item(u'item %d' % i, i) for i in range(items)]})
+    old_strategies = template_base.lookup_strategies
+    if not remember:
+        template_base.lookup_strategies = ForgetfulDict()
+    try:
+        start = time.time()
+        for i in xrange(renders):
+            t.render(context)
+        return time.time() - start
+    finally:
+        template_base.lookup_strategies = old_strategies
+
+
+if __name__ == '__main__':
+    print 'Access paths not remembered: %.3fs' % benchmark(remember=False)
+    print 'Access paths remembered:     %.3fs' % benchmark()
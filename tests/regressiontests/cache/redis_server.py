@@ -0,0 +1,184 @@
+"""
+A stand-in for a Redis server, implementing the few commands used by the
+Redis cache backend on an in-memory dictionary.
+"""
+import re
+import SocketServer
+import threading
+import time
+
+from django.core.cache.backends.redis import INCR_SCRIPT
+
+
+class Status(str):
+    pass
+
+
+class Error(str):
+    pass
+
+
+def glob_match(pattern, key):
+    """
+    Matches a key against a glob-style pattern of the SCAN command,
+    supporting *, ? and backslash escapes.
+    """
+    regex = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == '\\':
+            regex.append(re.escape(chars.next()))
+        elif char == '*':
+            regex.append('.*')
+        elif char == '?':
+            regex.append('.')
+        else:
+            regex.append(re.escape(char))
+    return re.match(''.join(regex) + '$', key, re.S) is not None
+
+
+class RedisHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            self.server.lock.acquire()
+            try:
+                reply = self.server.execute(args)
+            finally:
+                self.server.lock.release()
+            self.write_reply(reply)
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        assert line[0] == '*'
+        args = []
+        for i in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def write_reply(self, reply):
+        self.wfile.write(self.encode(reply))
+
+    def encode(self, reply):
+        if reply is None:
+            return '$-1\r\n'
+        elif isinstance(reply, bool):
+            return ':%d\r\n' % reply
+        elif isinstance(reply, (int, long)):
+            return ':%d\r\n' % reply
+        elif isinstance(reply, list):
+            return '*%d\r\n%s' % (len(reply), ''.join([self.encode(r) for r in reply]))
+        elif isinstance(reply, Status):
+            return '+%s\r\n' % reply
+        elif isinstance(reply, Error):
+            return '-%s\r\n' % reply
+        return '$%d\r\n%s\r\n' % (len(reply), reply)
+
+
+class RedisServer(SocketServer.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        SocketServer.ThreadingTCPServer.__init__(self, address, RedisHandler)
+        self.lock = threading.Lock()
+        self.data = {}
+        self.expires = {}
+        self.commands = []
+        self.cursors = {}
+
+    @property
+    def location(self):
+        return '%s:%d' % self.server_address
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, args=(0.01,))
+        thread.setDaemon(True)
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _get(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            del self.data[key]
+            del self.expires[key]
+        return self.data.get(key)
+
+    def _delete(self, key):
+        self.expires.pop(key, None)
+        return self.data.pop(key, None) is not None
+
+    def _incrby(self, key, delta):
+        value = self._get(key) or '0'
+        try:
+            value = int(value) + int(delta)
+        except ValueError:
+            return Error('ERR value is not an integer or out of range')
+        self.data[key] = str(value)
+        return value
+
+    def execute(self, args):
+        self.commands.append(args)
+        name, args = args[0].upper(), args[1:]
+        if name in ('PING',):
+            return Status('PONG')
+        elif name in ('SELECT', 'AUTH'):
+            return Status('OK')
+        elif name == 'GET':
+            return self._get(args[0])
+        elif name == 'MGET':
+            return [self._get(key) for key in args]
+        elif name == 'SET':
+            key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+            if 'NX' in options and self._get(key) is not None:
+                return None
+            self._delete(key)
+            self.data[key] = value
+            if 'EX' in options:
+                self.expires[key] = time.time() + int(args[2 + options.index('EX') + 1])
+            return Status('OK')
+        elif name == 'DEL':
+            return len([key for key in args if self._delete(key)])
+        elif name == 'EXISTS':
+            return self._get(args[0]) is not None
+        elif name == 'INCRBY':
+            return self._incrby(args[0], args[1])
+        elif name == 'EVAL':
+            # Scripts can't be run, only those of the backend are known.
+            if args[0] == INCR_SCRIPT:
+                if self._get(args[2]) is None:
+                    return None
+                return self._incrby(args[2], args[3])
+            return Error('NOSCRIPT Unknown script')
+        elif name == 'RENAME':
+            if self._get(args[0]) is None:
+                return Error('ERR no such key')
+            expires = self.expires.get(args[0])
+            self._delete(args[1])
+            self.data[args[1]] = self.data[args[0]]
+            self._delete(args[0])
+            if expires is not None:
+                self.expires[args[1]] = expires
+            return Status('OK')
+        elif name == 'SCAN':
+            # Cursors stand for the last key returned, so that the keys
+            # deleted between the calls don't make the scan skip others.
+            options = [a.upper() for a in args]
+            pattern = args[options.index('MATCH') + 1]
+            count = int(args[options.index('COUNT') + 1])
+            last_key = self.cursors.pop(args[0], None)
+            keys = [key for key in sorted(self.data) if last_key is None or key > last_key]
+            cursor = '0'
+            if len(keys) > count:
+                keys = keys[:count]
+                cursor = str(len(self.commands))
+                self.cursors[cursor] = keys[-1]
+            return [cursor, [key for key in keys if glob_match(pattern, key)]]
+        return Error("ERR unknown command '%s'" % name)
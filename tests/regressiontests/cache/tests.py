@@ -7,29 +7,43 @@ from __future__ import with_statement, absolute_import
 import hashlib
 import os
 import re
+import socket
 import tempfile
+import threading
 import time
 import warnings
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
 
 from django.conf import settings
 from django.core import management
-from django.core.cache import get_cache, DEFAULT_CACHE_ALIAS
+from django.core.cache import cache, get_cache, DEFAULT_CACHE_ALIAS
 from django.core.cache.backends.base import (CacheKeyWarning,
     InvalidCacheBackendError)
+from django.core.cache.backends import redis
+from django.core.cache.backends.redis import ResponseError
+from django.core.cache.serializers import (BaseSerializer, PickleSerializer,
+    SerializationError)
+from django.core.cache.signals import cache_operation
+from django.core.exceptions import ImproperlyConfigured
 from django.http import HttpResponse, HttpRequest, QueryDict
 from django.middleware.cache import (FetchFromCacheMiddleware,
     UpdateCacheMiddleware, CacheMiddleware)
-from django.template import Template
+from django.template import Context, Template, TemplateSyntaxError
 from django.template.response import TemplateResponse
 from django.test import TestCase, RequestFactory
 from django.test.utils import (get_warnings_state, restore_warnings_state,
     override_settings)
 from django.utils import translation, unittest
 from django.utils.cache import (patch_vary_headers, get_cache_key,
-    learn_cache_key, patch_cache_control, patch_response_headers)
+    get_cache_lock_key, learn_cache_key, patch_cache_control,
+    patch_response_headers)
 from django.views.decorators.cache import cache_page
 
 from .models import Poll, expensive_calculation
+from .redis_server import RedisServer
 
 # functions/classes for complex data type tests
 def f():
@@ -223,6 +237,47 @@ class BaseCacheTests(object):
         self.assertEqual(self.cache.get("key1"), None)
         self.assertEqual(self.cache.get("key2"), "eggs")
 
+    def test_get_or_set(self):
+        self.assertEqual(self.cache.get_or_set('projector', 42), 42)
+        self.assertEqual(self.cache.get('projector'), 42)
+        self.assertEqual(self.cache.get_or_set('projector', 43), 42)
+        self.assertEqual(self.cache.get_or_set('callable', lambda: 'value'), 'value')
+        self.assertEqual(self.cache.get('callable'), 'value')
+        self.assertEqual(self.cache.get_or_set('unlocked', 1, lock_timeout=0), 1)
+        self.assertEqual(self.cache.get('unlocked'), 1)
+
+    def test_tags(self):
+        self.cache.set_tagged('poll1', 'Poll 1', ['polls', 'poll.1'])
+        self.cache.set_tagged('poll2', 'Poll 2', ['polls', 'poll.2'])
+        self.assertEqual(self.cache.get_tagged('poll1', ['polls', 'poll.1']), 'Poll 1')
+        self.assertEqual(self.cache.get_tagged('poll2', ['polls', 'poll.2']), 'Poll 2')
+        # Values must be looked up with the tags they were stored with.
+        self.assertEqual(self.cache.get_tagged('poll1', ['polls']), None)
+        self.assertEqual(self.cache.get_tagged('missing', ['polls'], 'default'), 'default')
+
+        self.cache.invalidate_tags(['poll.1'])
+        self.assertEqual(self.cache.get_tagged('poll1', ['polls', 'poll.1']), None)
+        self.assertEqual(self.cache.get_tagged('poll2', ['polls', 'poll.2']), 'Poll 2')
+        self.cache.invalidate_tags(['polls', 'unknown'])
+        self.assertEqual(self.cache.get_tagged('poll2', ['polls', 'poll.2']), None)
+
+        self.cache.set_tagged('poll1', 'Poll 1', ['polls', 'poll.1'])
+        self.assertEqual(self.cache.get_tagged('poll1', ['polls', 'poll.1']), 'Poll 1')
+
+    def test_duplicate_tags(self):
+        self.cache.set_tagged('poll', 'Poll', ['polls', 'polls', u'polls'])
+        self.assertEqual(self.cache.get_tagged('poll', ['polls', 'polls']), 'Poll')
+        self.assertEqual(self.cache.get_tagged('poll', ['polls']), 'Poll')
+        self.assertEqual(self.cache.get_or_set('poll', 'Changed', tags=['polls', 'polls']), 'Poll')
+        self.cache.invalidate_tags(['polls'])
+        self.assertEqual(self.cache.get_tagged('poll', ['polls', 'polls']), None)
+
+    def test_tags_get_or_set(self):
+        self.assertEqual(self.cache.get_or_set('poll', 'Poll', tags=['polls']), 'Poll')
+        self.assertEqual(self.cache.get_or_set('poll', 'Changed', tags=['polls']), 'Poll')
+        self.cache.invalidate_tags(['polls'])
+        self.assertEqual(self.cache.get_or_set('poll', 'Changed', tags=['polls']), 'Changed')
+
     def test_has_key(self):
         # The cache can be inspected for cache keys
         self.cache.set("hello1", "goodbye1")
@@ -774,6 +829,45 @@ class DBCacheTests(unittest.TestCase, BaseCacheTests):
         self.cache = get_cache('db://%s?max_entries=30&cull_frequency=0' % self._table_name)
         self.perform_cull_test(50, 18)
 
+    def _capture_queries(self, func, *args):
+        from django.db import connection
+        old_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        start = len(connection.queries)
+        try:
+            func(*args)
+        finally:
+            connection.use_debug_cursor = old_debug_cursor
+        return [query['sql'] for query in connection.queries[start:]]
+
+    def test_many_methods_batch_queries(self):
+        data = dict([('key%d' % i, i) for i in range(50)])
+        self.cache.set('key0', 'old')
+        # One query to find the existing keys, one for the updates and one for
+        # the inserts.
+        self.assertEqual(len(self._capture_queries(self.cache.set_many, data)), 3)
+        self.assertEqual(len(self._capture_queries(self.cache.get_many, data.keys())), 1)
+        self.assertEqual(self.cache.get_many(data.keys()), data)
+
+        keys = ['key%d' % i for i in range(25)]
+        self.assertEqual(len(self._capture_queries(self.cache.delete_many, keys)), 1)
+        self.assertEqual(len(self.cache.get_many(data.keys())), 25)
+
+    def test_get_many_expired(self):
+        self.cache.set_many({'a': 1, 'b': 2}, 1)
+        self.cache.set('c', 3)
+        time.sleep(2)
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 3})
+        self.assertFalse(self.cache.has_key('a'))
+
+    def test_cull_counting(self):
+        "Entries are only counted when the table may have reached MAX_ENTRIES"
+        def set_keys(count):
+            for i in range(count):
+                self.cache.set('count%d' % i, i)
+        counts = [sql for sql in self._capture_queries(set_keys, 20) if 'COUNT' in sql]
+        self.assertEqual(len(counts), 1)
+
 
 class LocMemCacheTests(unittest.TestCase, BaseCacheTests):
     backend_name = 'django.core.cache.backends.locmem.LocMemCache'
@@ -822,11 +916,240 @@ class LocMemCacheTests(unittest.TestCase, BaseCacheTests):
         self.assertEqual(mirror_cache.get('value1'), 42)
         self.assertEqual(other_cache.get('value1'), None)
 
+    def test_get_or_set_waits_for_lock(self):
+        "Only one caller computes a missing value"
+        def fail():
+            self.fail("The value shouldn't be computed while locked.")
+        self.assertTrue(self.cache.add('key.lock', True))
+        timer = threading.Timer(0.2, self.cache.set, ['key', 'value'])
+        timer.start()
+        try:
+            self.assertEqual(self.cache.get_or_set('key', fail), 'value')
+        finally:
+            timer.join()
+
+    def test_get_or_set_lock_timeout(self):
+        "A caller stops waiting for the value after lock_timeout seconds"
+        self.assertTrue(self.cache.add('key.lock', True))
+        start = time.time()
+        self.assertEqual(self.cache.get_or_set('key', 'value', lock_timeout=1), 'value')
+        self.assertTrue(time.time() - start >= 1)
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_lru_cull(self):
+        "The least recently used entries are culled first"
+        for i in range(30):
+            self.cache.set('key%d' % i, i)
+        # Use the first ten keys so that they become the most recent ones.
+        for i in range(10):
+            self.assertEqual(self.cache.get('key%d' % i), i)
+        self.cache.set('key30', 30)
+        for i in range(10):
+            self.assertTrue(self.cache.has_key('key%d' % i))
+        for i in range(10, 20):
+            self.assertFalse(self.cache.has_key('key%d' % i))
+        for i in range(20, 31):
+            self.assertTrue(self.cache.has_key('key%d' % i))
+
+    def test_max_size(self):
+        cache = get_cache(self.backend_name, LOCATION='sized',
+                          OPTIONS={'MAX_SIZE': 4000})
+        cache.clear()
+        for i in range(10):
+            cache.set('key%d' % i, 'x' * 1000)
+        stats = cache.get_stats()
+        self.assertTrue(stats['size'] <= 4000)
+        self.assertEqual(stats['entries'], 3)
+        self.assertEqual(cache.get('key9'), 'x' * 1000)
+        self.assertEqual(cache.get('key6'), None)
+
+    def test_stats(self):
+        cache = get_cache(self.backend_name, LOCATION='stats',
+                          OPTIONS={'MAX_ENTRIES': 3, 'CULL_FREQUENCY': 3})
+        cache.set('key1', 'value')
+        cache.get('key1')
+        cache.get('key2')
+        for i in range(2, 5):
+            cache.set('key%d' % i, 'value')
+        stats = cache.get_stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['entries'], 3)
+
 
 # memcached backend isn't guaranteed to be available.
 # To check the memcached backend, the test settings file will
 # need to contain a cache backend setting that points at
 # your memcache server.
+class TieredCacheTests(unittest.TestCase, BaseCacheTests):
+    backend_name = 'django.core.cache.backends.tiered.TieredCache'
+    shared_name = 'locmem://tiered-tests'
+
+    def setUp(self):
+        self.cache = get_cache(self.backend_name, LOCATION=self.shared_name)
+        self.prefix_cache = get_cache(self.backend_name, LOCATION=self.shared_name, KEY_PREFIX='cacheprefix')
+        self.v2_cache = get_cache(self.backend_name, LOCATION=self.shared_name, VERSION=2)
+        self.custom_key_cache = get_cache(self.backend_name, LOCATION=self.shared_name, KEY_FUNCTION=custom_key_func)
+        self.custom_key_cache2 = get_cache(self.backend_name, LOCATION=self.shared_name, KEY_FUNCTION='regressiontests.cache.tests.custom_key_func')
+        self.shared = get_cache(self.shared_name)
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def test_missing_location(self):
+        self.assertRaises(InvalidCacheBackendError, get_cache, self.backend_name)
+
+    def test_shared_keys(self):
+        "Values are stored under the keys of the shared cache"
+        self.cache.set('key', 'value')
+        self.assertEqual(self.shared.get('key'), 'value')
+        self.assertEqual(self.cache.make_key('key'), self.shared.make_key('key'))
+        self.v2_cache.set('key', 'value2')
+        self.assertEqual(self.shared.get('key', version=2), 'value2')
+        self.prefix_cache.set('key', 'prefixed')
+        self.assertEqual(self.shared.get('key'), 'value')
+        self.assertEqual(get_cache(self.shared_name, KEY_PREFIX='cacheprefix').get('key'),
+                         'prefixed')
+
+    def test_local_hit(self):
+        "Values are served from the local tier without asking the shared cache"
+        self.cache.set('key', 'value')
+        self.shared.set('key', 'changed elsewhere')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get_many(['key']), {'key': 'value'})
+
+        self.cache.delete('key')
+        self.assertEqual(self.shared.get('key'), None)
+        self.assertEqual(self.cache.get('key'), None)
+
+    def test_local_fill(self):
+        self.shared.set('key', 'value')
+        self.shared.set('key2', 'value2')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get_many(['key', 'key2', 'key3']),
+                         {'key': 'value', 'key2': 'value2'})
+        self.shared.clear()
+        self.assertEqual(self.cache.get_many(['key', 'key2']),
+                         {'key': 'value', 'key2': 'value2'})
+
+    def test_local_timeout(self):
+        "Local values are dropped after LOCAL_TIMEOUT seconds"
+        cache = get_cache(self.backend_name, LOCATION=self.shared_name,
+                          OPTIONS={'LOCAL_TIMEOUT': 1})
+        cache.set('key', 'value')
+        self.shared.set('key', 'changed elsewhere')
+        self.assertEqual(cache.get('key'), 'value')
+        time.sleep(1.5)
+        self.assertEqual(cache.get('key'), 'changed elsewhere')
+
+    def test_versions(self):
+        "Changing the version of a key isn't hidden by the local tier"
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.cache.incr_version('key')
+        self.assertEqual(self.cache.get('key'), None)
+        self.assertEqual(self.cache.get('key', version=2), 'value')
+
+    def test_incr_in_shared_cache(self):
+        "Increments are made by the shared cache"
+        self.cache.set('answer', 41)
+        self.shared.incr('answer')
+        self.assertEqual(self.cache.incr('answer'), 43)
+        self.assertEqual(self.cache.get('answer'), 43)
+
+
+class InstrumentedCacheTests(unittest.TestCase, BaseCacheTests):
+    backend_name = 'django.core.cache.backends.instrumented.InstrumentedCache'
+    wrapped_name = 'locmem://instrumented-tests'
+
+    def setUp(self):
+        self.cache = get_cache(self.backend_name, LOCATION=self.wrapped_name)
+        self.prefix_cache = get_cache(self.backend_name, LOCATION=self.wrapped_name, KEY_PREFIX='cacheprefix')
+        self.v2_cache = get_cache(self.backend_name, LOCATION=self.wrapped_name, VERSION=2)
+        self.custom_key_cache = get_cache(self.backend_name, LOCATION=self.wrapped_name, KEY_FUNCTION=custom_key_func)
+        self.custom_key_cache2 = get_cache(self.backend_name, LOCATION=self.wrapped_name, KEY_FUNCTION='regressiontests.cache.tests.custom_key_func')
+        self.cache.reset_stats()
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def test_missing_location(self):
+        self.assertRaises(InvalidCacheBackendError, get_cache, self.backend_name)
+
+    def test_wrapped_keys(self):
+        "Values are stored under the keys of the wrapped cache"
+        wrapped = get_cache(self.wrapped_name)
+        self.cache.set('key', 'value')
+        self.assertEqual(wrapped.get('key'), 'value')
+        self.assertEqual(self.cache.make_key('key'), wrapped.make_key('key'))
+        self.v2_cache.set('key', 'value2')
+        self.assertEqual(wrapped.get('key', version=2), 'value2')
+
+    def test_stats(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), None)
+        self.assertEqual(self.cache.get('c', 'default'), 'default')
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats['hits'], 3)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['hit_ratio'], 0.5)
+        self.assertEqual(sorted(stats['operations'].keys()), ['get', 'get_many', 'set'])
+        self.assertEqual(stats['operations']['get']['calls'], 3)
+        self.assertEqual(stats['operations']['get_many']['calls'], 1)
+        self.assertTrue(stats['operations']['set']['time'] >= 0)
+        self.assertEqual(stats['prefixes'], {})
+
+        # Statistics are shared by the instances wrapping the same cache.
+        self.assertEqual(get_cache(self.backend_name, LOCATION=self.wrapped_name).get_stats(), stats)
+
+        self.cache.reset_stats()
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (0, 0, 0.0))
+        self.assertEqual(stats['operations'], {})
+
+    def test_prefixes(self):
+        cache = get_cache(self.backend_name, LOCATION=self.wrapped_name,
+                          OPTIONS={'PREFIX_SEPARATOR': ':'})
+        cache.set('user:1', 'alice')
+        cache.get('user:1')
+        cache.get('user:2')
+        cache.get_many(['page:/', 'user:1', 'orphan'])
+        self.assertEqual(cache.get_stats()['prefixes'], {
+            'user': {'hits': 2, 'misses': 1},
+            'page': {'hits': 0, 'misses': 1},
+            'orphan': {'hits': 0, 'misses': 1},
+        })
+
+    def test_signal(self):
+        operations = []
+        def receiver(sender, cache, operation, duration, hits, misses, **kwargs):
+            operations.append((cache, operation, hits, misses))
+        cache_operation.connect(receiver)
+        try:
+            self.cache.set('a', 1)
+            self.cache.get('a')
+            self.cache.get_many(['a', 'b'])
+            self.cache.delete('a')
+        finally:
+            cache_operation.disconnect(receiver)
+        self.assertEqual(operations, [
+            (self.cache, 'set', 0, 0),
+            (self.cache, 'get', 1, 0),
+            (self.cache, 'get_many', 1, 1),
+            (self.cache, 'delete', 0, 0),
+        ])
+
+    def test_errors_recorded(self):
+        "Failed operations are still counted"
+        self.assertRaises(ValueError, self.cache.incr, 'missing')
+        self.assertEqual(self.cache.get_stats()['operations']['incr']['calls'], 1)
+
+
 class MemcachedCacheTests(unittest.TestCase, BaseCacheTests):
     backend_name = 'django.core.cache.backends.memcached.MemcachedCache'
 
@@ -859,6 +1182,138 @@ class MemcachedCacheTests(unittest.TestCase, BaseCacheTests):
 MemcachedCacheTests = unittest.skipUnless(settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND'].startswith('django.core.cache.backends.memcached.'), "memcached not available")(MemcachedCacheTests)
 
 
+class RedisCacheTests(unittest.TestCase, BaseCacheTests):
+    backend_name = 'django.core.cache.backends.redis.RedisCache'
+
+    def setUp(self):
+        self.server = RedisServer()
+        self.server.start()
+        name = self.server.location
+        self.cache = get_cache(self.backend_name, LOCATION=name)
+        self.prefix_cache = get_cache(self.backend_name, LOCATION=name, KEY_PREFIX='cacheprefix')
+        self.v2_cache = get_cache(self.backend_name, LOCATION=name, VERSION=2)
+        self.custom_key_cache = get_cache(self.backend_name, LOCATION=name, KEY_FUNCTION=custom_key_func)
+        self.custom_key_cache2 = get_cache(self.backend_name, LOCATION=name, KEY_FUNCTION='regressiontests.cache.tests.custom_key_func')
+
+    def tearDown(self):
+        self.cache._pool.disconnect()
+        self.server.stop()
+
+    def test_pipelining(self):
+        "Methods acting on several keys send a single command or a pipeline"
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.server.commands = []
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c', 'd']), {'a': 1, 'b': 2, 'c': 3})
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual([args[0] for args in self.server.commands], ['MGET', 'DEL'])
+
+        connection = self.cache._pool.get_connection()
+        connection.send_commands([('SET', 'x', 'spam'), ('GET', 'x'), ('GET', 'y')])
+        replies = [connection.read_reply() for i in range(3)]
+        self.cache._pool.release(connection)
+        self.assertEqual(replies, ['OK', 'spam', None])
+
+    def test_connection_pool(self):
+        "Connections are reused, and shared by caches using the same server"
+        self.cache.set('key', 'value')
+        self.assertEqual(self.prefix_cache.get('key'), None)
+        self.assertTrue(self.cache._pool is self.prefix_cache._pool)
+        self.assertEqual(len(self.cache._pool._idle), 1)
+        other_cache = get_cache(self.backend_name, LOCATION=self.server.location,
+                                OPTIONS={'PASSWORD': 'secret'})
+        self.assertFalse(self.cache._pool is other_cache._pool)
+        other_cache = get_cache(self.backend_name, LOCATION=self.server.location,
+                                OPTIONS={'SOCKET_TIMEOUT': 1})
+        self.assertFalse(self.cache._pool is other_cache._pool)
+
+    def test_concurrent_incr(self):
+        "Increments are done atomically by the server"
+        self.cache.set('counter', 0)
+        def incr():
+            for i in range(20):
+                self.cache.incr('counter')
+        threads = [threading.Thread(target=incr) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 100)
+        self.assertTrue(len(self.cache._pool._idle) <= 5)
+
+    def test_incr_non_integer(self):
+        self.cache.set('key', 'value')
+        self.assertRaises(ValueError, self.cache.incr, 'key')
+        self.assertRaises(ValueError, self.cache.incr, 'missing')
+        self.assertFalse(self.cache.has_key('missing'))
+        self.assertEqual(self.server.data.keys(), [self.cache.make_key('key')])
+
+    def test_integer_like_values(self):
+        "Strings which look like integers are read back as strings"
+        self.cache.set('key', '42')
+        self.assertEqual(self.cache.get('key'), '42')
+        self.cache.set_many({'a': '-1', 'b': 1})
+        self.assertEqual(self.cache.get_many(['a', 'b']), {'a': '-1', 'b': 1})
+        self.server.data[self.cache.make_key('key')] = 'garbage'
+        self.assertEqual(self.cache.get('key', 'default'), 'default')
+
+    def test_non_positive_timeout(self):
+        "A value set with a timeout of zero or less isn't stored"
+        self.cache.set('key', 'value')
+        self.cache.set('key', 'value', 0)
+        self.assertFalse(self.cache.has_key('key'))
+        self.assertTrue(self.cache.add('key', 'value', -1))
+        self.assertFalse(self.cache.has_key('key'))
+        self.cache.set_many({'a': 1, 'b': 2})
+        self.cache.set_many({'a': 1, 'b': 2}, -1)
+        self.assertEqual(self.cache.get_many(['a', 'b']), {})
+
+    def test_incr_version_keeps_expiry(self):
+        self.cache.set('key', 'value', 1)
+        self.assertEqual(self.cache.incr_version('key'), 2)
+        self.assertEqual(self.cache.get('key', version=2), 'value')
+        time.sleep(2)
+        self.assertEqual(self.cache.get('key', version=2), None)
+
+    def test_clear_prefixed_keys(self):
+        "Only the keys of the cache are deleted"
+        old_count = redis.SCAN_COUNT
+        redis.SCAN_COUNT = 2
+        try:
+            self.server.data['other'] = 'value'
+            self.server.data['session:1'] = 'value'
+            for i in range(5):
+                self.cache.set('key%d' % i, i)
+                self.prefix_cache.set('key%d' % i, i)
+            self.prefix_cache.clear()
+            self.assertEqual(self.prefix_cache.get_many(['key%d' % i for i in range(5)]), {})
+            self.assertEqual(len(self.cache.get_many(['key%d' % i for i in range(5)])), 5)
+            self.cache.clear()
+            self.assertEqual(sorted(self.server.data.keys()), ['other', 'session:1'])
+        finally:
+            redis.SCAN_COUNT = old_count
+
+    def test_server_errors(self):
+        "Error replies are raised, and the connection can still be used"
+        self.assertRaises(ResponseError, self.cache._execute, ('BOGUS',))
+        self.assertEqual(self.cache._execute(('PING',)), ['PONG'])
+
+    def test_broken_connection(self):
+        "A broken connection is discarded"
+        self.cache.set('key', 'value')
+        self.cache._pool._idle[0]._sock.close()
+        self.assertRaises(socket.error, self.cache.get, 'key')
+        self.assertEqual(len(self.cache._pool._idle), 0)
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_location(self):
+        cache = get_cache(self.backend_name, LOCATION='unix:/tmp/redis.sock',
+                          OPTIONS={'DB': 2})
+        self.assertEqual(cache._pool.connection_kwargs['path'], '/tmp/redis.sock')
+        self.assertEqual(cache._pool.connection_kwargs['db'], 2)
+        self.assertRaises(InvalidCacheBackendError, get_cache, self.backend_name,
+                          LOCATION='localhost:port')
+
+
 class FileBasedCacheTests(unittest.TestCase, BaseCacheTests):
     """
     Specific test cases for the file-based cache.
@@ -906,6 +1361,192 @@ class FileBasedCacheTests(unittest.TestCase, BaseCacheTests):
         self.cache = get_cache('file://%s?max_entries=30' % self.dirname)
         self.perform_cull_test(50, 29)
 
+    def test_atomic_write(self):
+        "A failed write leaves neither a partial entry nor a temporary file"
+        self.cache.set('foo', 'bar')
+        self.assertRaises(pickle.PicklingError, self.cache.set, 'foo', lambda: None)
+        self.assertEqual(self.cache.get('foo'), 'bar')
+        keypath = self.cache._key_to_file(self.cache.make_key('foo'))
+        self.assertEqual(os.listdir(os.path.dirname(keypath)),
+                         [os.path.basename(keypath)])
+
+    def test_cull_counting(self):
+        "Entries are only counted on the first write, then every tenth of MAX_ENTRIES writes"
+        counts = []
+        get_num_entries = self.cache._get_num_entries
+        def counting_get_num_entries():
+            counts.append(1)
+            return get_num_entries()
+        self.cache._get_num_entries = counting_get_num_entries
+        for i in range(20):
+            self.cache.set('count%d' % i, i)
+        self.assertEqual(len(counts), 7)
+
+    def test_file_permissions(self):
+        "Cache files are created with the permissions allowed by the umask"
+        old_umask = os.umask(0)
+        os.umask(old_umask)
+        self.cache.set('foo', 'bar')
+        keypath = self.cache._key_to_file(self.cache.make_key('foo'))
+        self.assertEqual(os.stat(keypath).st_mode & 0777, 0666 & ~old_umask)
+
+    def test_delete_uncounted_entries(self):
+        "Deleting entries written by other processes keeps the count an upper bound"
+        other = get_cache(self.backend_name, LOCATION=self.dirname)
+        self.cache.set('mine', 1)
+        self.assertEqual(self.cache._num_entries, 1)
+        for i in range(5):
+            other.set('other%d' % i, i)
+        for i in range(5):
+            self.cache.delete('other%d' % i)
+        self.assertEqual(self.cache._num_entries, 1)
+        self.assertEqual(self.cache._get_num_entries(), 1)
+
+    def count_walks(self, cache):
+        walks = []
+        def get_num_entries():
+            walks.append(1)
+            return type(cache)._get_num_entries(cache)
+        cache._get_num_entries = get_num_entries
+        return walks
+
+    def test_count_after_cull(self):
+        "Culling updates the estimate, so that the next write doesn't count the entries"
+        for i in range(30):
+            self.cache.set('key%d' % i, i)
+        walks = self.count_walks(self.cache)
+        self.cache.set('cull', 1)
+        self.assertEqual(len(walks), 1)
+        self.assertEqual(self.cache._num_entries, self.cache._get_num_entries())
+        walks[:] = []
+        self.cache.set('other', 1)
+        self.assertEqual(walks, [])
+
+    def test_entries_written_by_other_processes(self):
+        "The entries are counted again every tenth of MAX_ENTRIES writes"
+        other = get_cache(self.backend_name, LOCATION=self.dirname)
+        self.cache.set('mine', 1)
+        for i in range(29):
+            other.set('other%d' % i, i)
+        walks = self.count_walks(self.cache)
+        self.cache.set('mine1', 1)
+        self.cache.set('mine2', 1)
+        self.assertEqual(walks, [])
+        # The third write counts the entries and culls them.
+        self.cache.set('mine3', 1)
+        self.assertEqual(len(walks), 1)
+        self.assertTrue(self.cache._get_num_entries() < 30)
+
+
+class CacheSerializerTests(unittest.TestCase):
+    backend_name = 'django.core.cache.backends.locmem.LocMemCache'
+
+    def get_cache(self, **options):
+        cache = get_cache(self.backend_name, LOCATION='serializers', OPTIONS=options)
+        cache.clear()
+        return cache
+
+    def test_default(self):
+        cache = self.get_cache()
+        self.assertTrue(isinstance(cache.serializer, PickleSerializer))
+        self.assertEqual(cache.serializer.protocol, pickle.HIGHEST_PROTOCOL)
+        cache = self.get_cache(PICKLE_PROTOCOL=0)
+        cache.set('key', C())
+        self.assertEqual(cache.get('key').m(), 24)
+
+    def test_builtin_serializers(self):
+        value = {'list': [1, 2.5, None, True], 'string': u'I\xf1t\xebrn\xe2ti\xf4n\xe0liz\xe6ti\xf8n'}
+        for name in ('pickle', 'json', 'marshal', 'none'):
+            cache = self.get_cache(SERIALIZER=name)
+            cache.set('key', value)
+            self.assertEqual(cache.get('key'), value)
+            self.assertEqual(cache.get_many(['key', 'missing']), {'key': value})
+
+    def test_custom_serializer(self):
+        cache = self.get_cache(SERIALIZER='regressiontests.cache.tests.ReversingSerializer')
+        cache.set('key', 'value')
+        self.assertEqual(cache._cache[cache.make_key('key')], 'eulav')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertRaises(ImproperlyConfigured, self.get_cache, SERIALIZER='does.not.Exist')
+
+    def test_no_serialization(self):
+        "The 'none' serializer stores the objects themselves"
+        cache = self.get_cache(SERIALIZER='none')
+        value = ['spam']
+        cache.set('key', value)
+        self.assertTrue(cache.get('key') is value)
+
+    def test_unserializable_values(self):
+        "Values the serializer can't handle aren't stored by the local-memory cache"
+        for name, value in (('pickle', lambda: None), ('json', object()),
+                            ('marshal', object())):
+            cache = self.get_cache(SERIALIZER=name)
+            self.assertRaises(SerializationError, cache.serializer.dumps, value)
+            cache.set('key', value)
+            self.assertEqual(cache.get('key'), None)
+            self.assertFalse(cache.add('key', value))
+            self.assertEqual(cache.get('key'), None)
+
+    def test_no_serialization_restrictions(self):
+        "Values which aren't serialized can only be stored in local memory"
+        self.assertRaises(ImproperlyConfigured, self.get_cache,
+                          SERIALIZER='none', MAX_SIZE=1000)
+        self.assertRaises(ImproperlyConfigured, self.get_cache,
+                          SERIALIZER='none', COMPRESS_MIN_LENGTH=100)
+        dirname = tempfile.mkdtemp()
+        try:
+            self.assertRaises(ImproperlyConfigured, get_cache,
+                              'django.core.cache.backends.filebased.FileBasedCache',
+                              LOCATION=dirname, OPTIONS={'SERIALIZER': 'none'})
+        finally:
+            os.rmdir(dirname)
+        self.assertRaises(ImproperlyConfigured, get_cache,
+                          'django.core.cache.backends.db.DatabaseCache',
+                          LOCATION='serializer_cache', OPTIONS={'SERIALIZER': 'none'})
+
+    def test_compression(self):
+        cache = self.get_cache(COMPRESS_MIN_LENGTH=100)
+        cache.set('short', 'spam')
+        cache.set('long', 'spam' * 1000)
+        self.assertTrue(len(cache._cache[cache.make_key('long')]) < 100)
+        self.assertEqual(cache.get('short'), 'spam')
+        self.assertEqual(cache.get('long'), 'spam' * 1000)
+
+    def test_filebased(self):
+        dirname = tempfile.mkdtemp()
+        cache = get_cache('django.core.cache.backends.filebased.FileBasedCache',
+                          LOCATION=dirname,
+                          OPTIONS={'SERIALIZER': 'json', 'COMPRESS_MIN_LENGTH': 0})
+        try:
+            cache.set('key', {'a': [1, 2]})
+            self.assertEqual(cache.get('key'), {'a': [1, 2]})
+        finally:
+            cache.clear()
+
+    def test_database(self):
+        management.call_command('createcachetable', 'serializer_cache', verbosity=0, interactive=False)
+        cache = get_cache('django.core.cache.backends.db.DatabaseCache',
+                          LOCATION='serializer_cache',
+                          OPTIONS={'SERIALIZER': 'marshal', 'COMPRESS_MIN_LENGTH': 10})
+        try:
+            cache.set('key', 'spam' * 100)
+            cache.set_many({'key2': [1, 2]})
+            self.assertEqual(cache.get('key'), 'spam' * 100)
+            self.assertEqual(cache.get_many(['key', 'key2']),
+                             {'key': 'spam' * 100, 'key2': [1, 2]})
+        finally:
+            from django.db import connection
+            cursor = connection.cursor()
+            cursor.execute('DROP TABLE %s' % connection.ops.quote_name('serializer_cache'))
+
+
+class ReversingSerializer(BaseSerializer):
+    def dumps(self, value):
+        return value[::-1]
+
+    def loads(self, data):
+        return data[::-1]
+
 
 class CustomCacheKeyValidationTests(unittest.TestCase):
     """
@@ -1058,6 +1699,48 @@ PrefixedCacheUtils = override_settings(
 )(CacheUtils)
 
 
+class CacheTemplateTagTest(TestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cache_tag_tags(self):
+        template = Template('{% load cache %}{% cache 60 poll poll.id tags="polls" tags=poll.tags %}{{ poll.question }}{% endcache %}')
+        poll = {'id': 1, 'question': 'Why?', 'tags': ['poll.1']}
+        self.assertEqual(template.render(Context({'poll': poll})), 'Why?')
+        poll['question'] = 'How?'
+        self.assertEqual(template.render(Context({'poll': poll})), 'Why?')
+        cache.invalidate_tags(['poll.2'])
+        self.assertEqual(template.render(Context({'poll': poll})), 'Why?')
+        cache.invalidate_tags(['poll.1'])
+        self.assertEqual(template.render(Context({'poll': poll})), 'How?')
+        poll['question'] = 'When?'
+        cache.invalidate_tags(['polls'])
+        self.assertEqual(template.render(Context({'poll': poll})), 'When?')
+
+    def test_cache_tag_lock(self):
+        added = []
+        def add(key, *args, **kwargs):
+            added.append(key)
+            return type(cache).add(cache, key, *args, **kwargs)
+        cache.add = add
+        try:
+            template = Template('{% load cache %}{% cache 60 fragment %}{{ value }}{% endcache %}')
+            self.assertEqual(template.render(Context({'value': 1})), '1')
+            self.assertEqual(added, [])
+            template = Template('{% load cache %}{% cache 60 locked lock_timeout=timeout %}'
+                                '{{ value }}{% endcache %}')
+            self.assertEqual(template.render(Context({'value': 2, 'timeout': 5})), '2')
+            self.assertEqual(len(added), 1)
+            self.assertTrue(added[0].endswith('.lock'))
+            self.assertEqual(template.render(Context({'value': 3, 'timeout': 5})), '2')
+            self.assertRaises(TemplateSyntaxError, template.render,
+                              Context({'value': 3, 'timeout': 'soon'}))
+        finally:
+            del cache.add
+
+
+
 class CacheHEADTest(TestCase):
 
     def setUp(self):
@@ -1397,6 +2080,193 @@ class CacheMiddlewareTest(TestCase):
 
         self.assertFalse("Cache-Control" in response)
 
+    def _count_cache_calls(self, cache):
+        # Only records the calls made by the middleware, not those made by a
+        # backend's get_many() falling back to get().
+        calls = []
+        depth = [0]
+        def wrap(name, method):
+            def counting(*args, **kwargs):
+                if not depth[0]:
+                    calls.append(name)
+                depth[0] += 1
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    depth[0] -= 1
+            return counting
+        for name in ('get', 'get_many'):
+            setattr(cache, name, wrap(name, getattr(cache, name)))
+        return calls
+
+    def test_single_round_trip(self):
+        "Once its header list is known, a cached page is fetched in one call"
+        middleware = CacheMiddleware()
+        request = self.factory.get('/view/')
+        middleware.process_request(request)
+        middleware.process_response(request, hello_world_view(request, '1'))
+
+        calls = self._count_cache_calls(middleware.cache)
+        self.assertEqual(middleware.process_request(self.factory.get('/view/')).content, 'Hello World 1')
+        self.assertEqual(calls, ['get', 'get_many'])
+        del calls[:]
+        self.assertEqual(middleware.process_request(self.factory.get('/view/')).content, 'Hello World 1')
+        self.assertEqual(calls, ['get_many'])
+
+    def test_header_list_change(self):
+        "Remembered header lists are checked against the cache"
+        middleware = CacheMiddleware()
+        request = self.factory.get('/view/')
+        middleware.process_request(request)
+        middleware.process_response(request, hello_world_view(request, '1'))
+        self.assertEqual(middleware.process_request(self.factory.get('/view/')).content, 'Hello World 1')
+
+        # Another process caches a version of the page varying on a header.
+        other = CacheMiddleware()
+        request = self.factory.get('/view/', HTTP_ACCEPT_ENCODING='gzip')
+        request._cache_update_cache = True
+        response = hello_world_view(request, '2')
+        patch_vary_headers(response, ('Accept-Encoding',))
+        other.process_response(request, response)
+
+        request = self.factory.get('/view/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(middleware.process_request(request).content, 'Hello World 2')
+        request = self.factory.get('/view/', HTTP_ACCEPT_ENCODING='deflate')
+        self.assertEqual(middleware.process_request(request), None)
+
+        middleware.cache.clear()
+        self.assertEqual(middleware.process_request(self.factory.get('/view/')), None)
+        self.assertEqual(middleware._header_lists, {})
+
+    def _respond_later(self, respond):
+        "Calls respond in another thread, in the active language"
+        language = translation.get_language()
+        def respond_in_language():
+            translation.activate(language)
+            try:
+                respond()
+            finally:
+                translation.deactivate()
+        timer = threading.Timer(0.2, respond_in_language)
+        timer.start()
+        return timer
+
+    def _expire_page(self, middleware, path, vary=(), **headers):
+        "Caches the page for the path, then expires it but not its header list"
+        request = self.factory.get(path, **headers)
+        request._cache_update_cache = True
+        response = hello_world_view(request, '0')
+        patch_vary_headers(response, vary)
+        middleware.process_response(request, response)
+        middleware.cache.delete(get_cache_key(request, 'middlewareprefix',
+                                              cache=middleware.cache))
+
+    @override_settings(CACHE_MIDDLEWARE_LOCK_TIMEOUT=10)
+    def test_lock(self):
+        "Generating an expired page holds a lock until its response is processed"
+        middleware = CacheMiddleware()
+        self._expire_page(middleware, '/view/')
+        request = self.factory.get('/view/')
+        lock_key = get_cache_lock_key(request, 'middlewareprefix', cache=middleware.cache)
+
+        self.assertEqual(middleware.process_request(request), None)
+        self.assertTrue(middleware.cache.has_key(lock_key))
+        middleware.process_response(request, hello_world_view(request, '1'))
+        self.assertFalse(middleware.cache.has_key(lock_key))
+
+        # The lock is released as soon as the response isn't cached.
+        self._expire_page(middleware, '/view/')
+        request = self.factory.get('/view/')
+        self.assertEqual(middleware.process_request(request), None)
+        self.assertTrue(middleware.cache.has_key(lock_key))
+        middleware.process_response(request, HttpResponse(status=404))
+        self.assertFalse(middleware.cache.has_key(lock_key))
+
+    @override_settings(CACHE_MIDDLEWARE_LOCK_TIMEOUT=10)
+    def test_wait_for_cached_page(self):
+        "Requests for a page being generated wait for it to be cached"
+        middleware = CacheMiddleware()
+        self._expire_page(middleware, '/view/')
+        request = self.factory.get('/view/')
+        self.assertEqual(middleware.process_request(request), None)
+
+        def respond():
+            middleware.process_response(request, hello_world_view(request, '1'))
+        timer = self._respond_later(respond)
+        try:
+            response = middleware.process_request(self.factory.get('/view/'))
+        finally:
+            timer.join()
+        self.assertEqual(response.content, 'Hello World 1')
+
+    @override_settings(CACHE_MIDDLEWARE_LOCK_TIMEOUT=10)
+    def test_no_lock_for_uncached_page(self):
+        "Concurrent requests for a page that has never been cached don't wait"
+        middleware = CacheMiddleware()
+        first = self.factory.get('/missing/')
+        self.assertEqual(middleware.process_request(first), None)
+        self.assertEqual(get_cache_lock_key(first, 'middlewareprefix', cache=middleware.cache), None)
+
+        start = time.time()
+        second = self.factory.get('/missing/')
+        self.assertEqual(middleware.process_request(second), None)
+        self.assertTrue(time.time() - start < 1)
+        middleware.process_response(first, HttpResponse(status=404))
+        middleware.process_response(second, HttpResponse(status=404))
+        self.assertEqual(get_cache_key(first, 'middlewareprefix', cache=middleware.cache), None)
+
+    @override_settings(CACHE_MIDDLEWARE_LOCK_TIMEOUT=10)
+    def test_lock_varies_on_headers(self):
+        "Requests for a page varying on Cookie only wait for the same cookie"
+        middleware = CacheMiddleware()
+        self._expire_page(middleware, '/view/', vary=('Cookie',), HTTP_COOKIE='a=1')
+        alice = self.factory.get('/view/', HTTP_COOKIE='a=1')
+        bob = self.factory.get('/view/', HTTP_COOKIE='b=2')
+        self.assertNotEqual(get_cache_lock_key(alice, 'middlewareprefix', cache=middleware.cache),
+                            get_cache_lock_key(bob, 'middlewareprefix', cache=middleware.cache))
+
+        self.assertEqual(middleware.process_request(alice), None)
+        start = time.time()
+        self.assertEqual(middleware.process_request(bob), None)
+        self.assertTrue(time.time() - start < 1)
+        self.assertTrue(bob._cache_update_cache)
+
+        def respond():
+            response = hello_world_view(alice, 'Alice')
+            patch_vary_headers(response, ('Cookie',))
+            middleware.process_response(alice, response)
+        timer = self._respond_later(respond)
+        try:
+            response = middleware.process_request(self.factory.get('/view/', HTTP_COOKIE='a=1'))
+        finally:
+            timer.join()
+        self.assertEqual(response.content, 'Hello World Alice')
+        middleware.process_response(bob, HttpResponse(status=404))
+
+    @override_settings(CACHE_MIDDLEWARE_LOCK_TIMEOUT=1)
+    def test_lock_timeout(self):
+        "Requests stop waiting for a page after CACHE_MIDDLEWARE_LOCK_TIMEOUT seconds"
+        middleware = CacheMiddleware()
+        self._expire_page(middleware, '/view/')
+        request = self.factory.get('/view/')
+        middleware.cache.add(get_cache_lock_key(request, 'middlewareprefix',
+                                                cache=middleware.cache), True, 60)
+
+        start = time.time()
+        self.assertEqual(middleware.process_request(request), None)
+        self.assertTrue(time.time() - start >= 1)
+        self.assertTrue(request._cache_update_cache)
+        self.assertEqual(getattr(request, '_cache_lock_key', None), None)
+
+    def test_no_lock(self):
+        "Pages aren't locked by default"
+        middleware = CacheMiddleware()
+        self._expire_page(middleware, '/view/')
+        request = self.factory.get('/view/')
+        self.assertEqual(middleware.process_request(request), None)
+        self.assertFalse(middleware.cache.has_key(
+            get_cache_lock_key(request, 'middlewareprefix', cache=middleware.cache)))
+
     def test_view_decorator(self):
         # decorate the same view with different cache decorators
         default_view = cache_page(hello_world_view)
@@ -1490,6 +2360,29 @@ class CacheMiddlewareTest(TestCase):
         response = other_with_timeout_view(request, '18')
         self.assertEqual(response.content, 'Hello World 18')
 
+    def test_view_decorator_tags(self):
+        tagged_view = cache_page(tags=['polls'])(hello_world_view)
+        request_tagged_view = cache_page(tags=lambda request: [request.path])(hello_world_view)
+        request = self.factory.get('/view/')
+
+        self.assertEqual(tagged_view(request, '1').content, 'Hello World 1')
+        self.assertEqual(tagged_view(request, '2').content, 'Hello World 1')
+        self.default_cache.invalidate_tags(['polls'])
+        self.assertEqual(tagged_view(request, '3').content, 'Hello World 3')
+        self.assertEqual(tagged_view(request, '4').content, 'Hello World 3')
+
+        duplicate_tags_view = cache_page(key_prefix='duplicates', tags=['polls', 'polls'])(hello_world_view)
+        self.assertEqual(duplicate_tags_view(request, '1').content, 'Hello World 1')
+        self.assertEqual(duplicate_tags_view(request, '2').content, 'Hello World 1')
+
+        self.default_cache.clear()
+        self.assertEqual(request_tagged_view(request, '5').content, 'Hello World 5')
+        self.assertEqual(request_tagged_view(request, '6').content, 'Hello World 5')
+        self.default_cache.invalidate_tags(['/other/'])
+        self.assertEqual(request_tagged_view(request, '7').content, 'Hello World 5')
+        self.default_cache.invalidate_tags(['/view/'])
+        self.assertEqual(request_tagged_view(request, '8').content, 'Hello World 8')
+
 CacheMiddlewareTest = override_settings(
         CACHE_MIDDLEWARE_ALIAS='other',
         CACHE_MIDDLEWARE_KEY_PREFIX='middlewareprefix',
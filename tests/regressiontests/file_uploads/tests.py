@@ -7,9 +7,11 @@ import errno
 import hashlib
 import os
 import shutil
+import tempfile as sys_tempfile
 from StringIO import StringIO
 
 from django.core.files import temp as tempfile
+from django.core.files.uploadhandler import FileUploadHandler, StorageFileUploadHandler
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.http.multipartparser import MultiPartParser
 from django.test import TestCase, client
@@ -239,6 +241,35 @@ class FileUploadTests(TestCase):
         got = simplejson.loads(response.content)
         self.assertTrue('f' not in got)
 
+    def test_storage_upload_handler(self):
+        f = tempfile.NamedTemporaryFile()
+        f.write('a' * (2 ** 21))
+        f.seek(0)
+        response = self.client.post('/file_uploads/storage/', {'file_field': f})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(temp_storage.size(response.content), 2 ** 21)
+        # The temporary file was moved into place from a directory outside
+        # the storage.
+        upload_dir = temp_storage.location.rstrip(os.sep) + '.uploads'
+        self.assertEqual(os.listdir(upload_dir), [])
+        temp_storage.delete(response.content)
+        os.rmdir(upload_dir)
+
+    def test_storage_upload_handler_discards_incomplete_files(self):
+        upload_dir = sys_tempfile.mkdtemp()
+        try:
+            handler = StorageFileUploadHandler(storage=temp_storage)
+            handler.temp_dir = upload_dir
+            handler.handle_raw_input(None, {}, 2 ** 21, 'boundary')
+            handler.new_file('file_field', 'a.txt', 'text/plain', 2 ** 21)
+            handler.receive_data_chunk('a' * 10, 0)
+            self.assertEqual(len(os.listdir(upload_dir)), 1)
+            # The upload was stopped before the file was complete.
+            handler.upload_complete()
+            self.assertEqual(os.listdir(upload_dir), [])
+        finally:
+            shutil.rmtree(upload_dir)
+
     def test_broken_custom_upload_handler(self):
         f = tempfile.NamedTemporaryFile()
         f.write('a' * (2 ** 21))
@@ -402,3 +433,63 @@ class MultiParserTests(unittest.TestCase):
             'CONTENT_TYPE':     'multipart/form-data; boundary=_foo',
             'CONTENT_LENGTH':   '1'
         }, StringIO('x'), [], 'utf-8')
+
+    def parse(self, fields, files, chunk_size):
+        boundary = 'BoUnDaRyStRiNg'
+        parts = []
+        for name, value in fields:
+            parts.append('--%s\r\nContent-Disposition: form-data; name="%s"\r\n'
+                         '\r\n%s\r\n' % (boundary, name, value))
+        for name, content in files:
+            parts.append('--%s\r\nContent-Disposition: form-data; name="%s"; '
+                         'filename="%s.bin"\r\nContent-Type: application/octet-stream'
+                         '\r\n\r\n%s\r\n' % (boundary, name, name, content))
+        payload = ''.join(parts) + '--%s--\r\n' % boundary
+        handler = CountingUploadHandler()
+        handler.chunk_size = chunk_size
+        parser = MultiPartParser({
+            'CONTENT_TYPE': 'multipart/form-data; boundary=%s' % boundary,
+            'CONTENT_LENGTH': str(len(payload)),
+        }, StringIO(payload), [handler], 'utf-8')
+        return parser.parse()
+
+    def test_boundary_across_chunks(self):
+        """
+        Payloads resembling the boundary, and boundaries split across the
+        chunks read from the input, are handled correctly.
+        """
+        content = '\r\n--BoUnDaRy\r\n-\r--BoUnDaRyStRin\n'
+        for chunk_size in (4, 7, 16, 100):
+            post, files = self.parse([('field', 'a\r\nb')],
+                                     [('file', content)], chunk_size)
+            self.assertEqual(post['field'], u'a\r\nb')
+            self.assertEqual(files['file'].read(), content)
+
+    def test_large_file(self):
+        content = 'x' * (2**20 + 1)
+        post, files = self.parse([], [('file', content)], 64 * 2**10)
+        self.assertEqual(files['file'].size, len(content))
+
+    def test_many_small_files(self):
+        files = [('file%d' % i, 'x' * 500) for i in range(200)]
+        post, files = self.parse([], files, 64 * 2**10)
+        self.assertEqual(len(files), 200)
+        self.assertEqual(files['file199'].size, 500)
+
+class CountingUploadHandler(FileUploadHandler):
+    """
+    Keeps the content of small files, and only counts the bytes of others.
+    """
+    def new_file(self, *args, **kwargs):
+        super(CountingUploadHandler, self).new_file(*args, **kwargs)
+        self.size, self.chunks = 0, []
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size < 2**10:
+            self.chunks.append(raw_data)
+
+    def file_complete(self, file_size):
+        uploaded = SimpleUploadedFile(self.file_name, ''.join(self.chunks))
+        uploaded.size = file_size
+        return uploaded
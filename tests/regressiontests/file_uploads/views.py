@@ -4,10 +4,11 @@ import hashlib
 import os
 
 from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import StorageFileUploadHandler
 from django.http import HttpResponse, HttpResponseServerError
 from django.utils import simplejson
 
-from .models import FileModel, UPLOAD_TO
+from .models import FileModel, UPLOAD_TO, temp_storage
 from .tests import UNICODE_FILENAME
 from .uploadhandler import QuotaUploadHandler, ErroringUploadHandler
 
@@ -134,3 +135,17 @@ def file_upload_filename_case_view(request):
     obj = FileModel()
     obj.testfile.save(file.name, file)
     return HttpResponse('%d' % obj.pk)
+
+def file_upload_to_storage(request):
+    """
+    Upload a file directly into the model's storage, then save it.
+    """
+    handler = StorageFileUploadHandler(request, temp_storage)
+    request.upload_handlers = [handler]
+    file = request.FILES['file_field']
+    temp_dir = os.path.dirname(file.temporary_file_path())
+    if temp_dir != handler.get_upload_dir():
+        return HttpResponseServerError()
+    obj = FileModel()
+    obj.testfile.save(file.name, file)
+    return HttpResponse(obj.testfile.name)
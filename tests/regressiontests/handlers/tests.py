@@ -1,5 +1,8 @@
+from StringIO import StringIO
+
 from django.conf import settings
 from django.core.handlers.wsgi import WSGIHandler
+from django.http import FileResponse
 from django.test import RequestFactory
 from django.utils import unittest
 
@@ -32,3 +35,28 @@ class HandlerTests(unittest.TestCase):
         handler = WSGIHandler()
         response = handler(environ, lambda *a, **k: None)
         self.assertEqual(response.status_code, 400)
+
+    def test_file_wrapper(self):
+        """
+        A FileResponse's file is handed to wsgi.file_wrapper when the server
+        provides one.
+        """
+        class FileWrapper(object):
+            def __init__(self, filelike, block_size):
+                self.filelike, self.block_size = filelike, block_size
+
+        f = StringIO('content')
+        class TestHandler(WSGIHandler):
+            def get_response(self, request):
+                return FileResponse(f, block_size=1024)
+
+        environ = RequestFactory().get('/').environ
+        handler = TestHandler()
+        response = handler(environ, lambda *a, **k: None)
+        self.assertEqual(list(response), ['content'])
+
+        environ['wsgi.file_wrapper'] = FileWrapper
+        response = handler(environ, lambda *a, **k: None)
+        self.assertTrue(isinstance(response, FileWrapper))
+        self.assertTrue(response.filelike is f)
+        self.assertEqual(response.block_size, 1024)
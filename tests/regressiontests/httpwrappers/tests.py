@@ -1,8 +1,18 @@
+from __future__ import with_statement
+
 import copy
+import os
 import pickle
-
-from django.http import (QueryDict, HttpResponse, SimpleCookie, BadHeaderError,
-        parse_cookie)
+import tempfile
+from StringIO import StringIO
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db.models.fields.files import FieldFile
+from django.http import (QueryDict, HttpResponse, FileResponse,
+        SendfileResponse, SimpleCookie, BadHeaderError, parse_cookie)
+from django.test.utils import override_settings
 from django.utils import unittest
 
 
@@ -296,6 +306,108 @@ class HttpResponseTests(unittest.TestCase):
         self.assertRaises(UnicodeEncodeError,
                           getattr, r, 'content')
 
+class FileResponseTests(unittest.TestCase):
+    def test_file_from_disk(self):
+        fd, filename = tempfile.mkstemp()
+        try:
+            os.write(fd, 'x' * 10000)
+            os.close(fd)
+            r = FileResponse(open(filename, 'rb'), block_size=4096)
+            self.assertEqual(r['Content-Length'], '10000')
+            self.assertEqual([len(chunk) for chunk in r], [4096, 4096, 1808])
+            r.close()
+            self.assertTrue(r.file.closed)
+        finally:
+            os.unlink(filename)
+
+    def test_file_like_object(self):
+        r = FileResponse(StringIO('binary content'), mimetype='application/octet-stream')
+        self.assertFalse(r.has_header('Content-Length'))
+        self.assertEqual(r['Content-Type'], 'application/octet-stream')
+        self.assertEqual(list(r), ['binary content'])
+
+    def test_content_access(self):
+        # Reading ``content`` doesn't leave the response empty.
+        r = FileResponse(StringIO('binary content'))
+        self.assertEqual(r.content, 'binary content')
+        self.assertEqual(r.file, None)
+        self.assertEqual(list(r), ['binary content'])
+
+class SendfileResponseTests(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.root)
+        self.name = self.storage.save('private/report.pdf', ContentFile('%PDF'))
+        self.path = self.storage.path(self.name)
+
+    def tearDown(self):
+        self.storage.delete(self.name)
+        os.rmdir(os.path.join(self.root, 'private'))
+        os.rmdir(self.root)
+
+    @override_settings(SENDFILE_HEADER=None)
+    def test_streaming_fallback(self):
+        r = SendfileResponse(self.path)
+        self.assertEqual(r['Content-Type'], 'application/pdf')
+        self.assertEqual(r['Content-Length'], '4')
+        self.assertEqual(r.content, '%PDF')
+
+    @override_settings(SENDFILE_HEADER='X-Sendfile')
+    def test_x_sendfile(self):
+        r = SendfileResponse(self.path)
+        self.assertEqual(r['X-Sendfile'], self.path)
+        self.assertEqual(r['Content-Type'], 'application/pdf')
+        self.assertFalse(r.has_header('Content-Length'))
+        self.assertEqual(r.content, '')
+
+    def test_x_accel_redirect(self):
+        settings = dict(SENDFILE_HEADER='X-Accel-Redirect',
+                        SENDFILE_ROOT=self.root, SENDFILE_URL='/protected/')
+        with override_settings(**settings):
+            r = SendfileResponse(self.path)
+            self.assertEqual(r['X-Accel-Redirect'], '/protected/private/report.pdf')
+            # Files outside SENDFILE_ROOT can't be offloaded.
+            self.assertRaises(ValueError, SendfileResponse, __file__)
+        with override_settings(SENDFILE_HEADER='X-Accel-Redirect',
+                               SENDFILE_ROOT='', SENDFILE_URL=None):
+            self.assertRaises(ImproperlyConfigured, SendfileResponse, self.path)
+
+    @override_settings(SENDFILE_HEADER='X-Sendfile')
+    def test_field_file(self):
+        r = SendfileResponse(FieldFile(None, self._field(self.storage), self.name))
+        self.assertEqual(r['X-Sendfile'], self.path)
+
+        # Files in storages without local paths are streamed.
+        class RemoteStorage(Storage):
+            def _open(self_, name, mode='rb'):
+                return self.storage.open(name, mode)
+        r = SendfileResponse(FieldFile(None, self._field(RemoteStorage()), self.name))
+        self.assertFalse(r.has_header('X-Sendfile'))
+        self.assertEqual(r['Content-Type'], 'application/pdf')
+        self.assertEqual(r.content, '%PDF')
+
+    def test_open_field_file(self):
+        # An open file is closed when the front-end server delivers it, and
+        # streamed rather than opened again otherwise.
+        f = FieldFile(None, self._field(self.storage), self.name)
+        f.open('rb')
+        with override_settings(SENDFILE_HEADER='X-Sendfile'):
+            r = SendfileResponse(f)
+        self.assertTrue(f.closed)
+        f.open('rb')
+        with override_settings(SENDFILE_HEADER=None):
+            r = SendfileResponse(f)
+        self.assertTrue(r.file is f)
+        self.assertEqual(r.content, '%PDF')
+        self.assertTrue(f.closed)
+
+    def _field(self, storage):
+        class Field(object):
+            pass
+        field = Field()
+        field.storage = storage
+        return field
+
 class CookieTests(unittest.TestCase):
     def test_encode(self):
         """
@@ -0,0 +1,55 @@
+from __future__ import with_statement
+
+from django.template import Context, Template
+from django.template.compiler import CompiledNodeList
+from django.template.defaulttags import ForNode
+from django.test.utils import override_settings
+from django.utils import unittest
+from django.utils.safestring import mark_safe
+
+
+class CompilerTests(unittest.TestCase):
+
+    def test_compiled(self):
+        with override_settings(TEMPLATE_COMPILE=True):
+            t = Template('{% for i in items %}{% if i %}{{ i }}{% endif %}{% endfor %}')
+        self.assertTrue(isinstance(t.nodelist, CompiledNodeList))
+        # The body of the loop is compiled too.
+        for_node = t.nodelist.get_nodes_by_type(ForNode)[0]
+        self.assertTrue(isinstance(for_node.nodelist_loop, CompiledNodeList))
+        self.assertEqual(t.render(Context({'items': [1, 0, 2]})), u'12')
+
+    def test_not_compiled(self):
+        t = Template('{{ a }}')
+        self.assertFalse(isinstance(t.nodelist, CompiledNodeList))
+        with override_settings(TEMPLATE_COMPILE=True, TEMPLATE_DEBUG=True):
+            t = Template('{{ a }}')
+        self.assertFalse(isinstance(t.nodelist, CompiledNodeList))
+        with override_settings(TEMPLATE_COMPILE=True, TEMPLATE_PROFILE=True):
+            t = Template('{{ a }}')
+        self.assertFalse(isinstance(t.nodelist, CompiledNodeList))
+
+    def test_same_output(self):
+        source = (u'{% autoescape off %}{{ a|upper }}{% endautoescape %}'
+                  u'{{ a|upper }}{{ b|default:"<x>" }}{{ c|join:", " }}'
+                  u'{{ d.e|add:f }}{{ "literal"|capfirst }}{{ 3 }}{{ missing.attr }}')
+        context = {'a': u'<a>', 'c': [u'<', mark_safe(u'&')], 'd': {'e': 1}, 'f': 2}
+        expected = Template(source).render(Context(context))
+        with override_settings(TEMPLATE_COMPILE=True):
+            t = Template(source)
+        self.assertEqual(t.render(Context(context)), expected)
+        self.assertEqual(t.render(Context(context, autoescape=False)),
+                         Template(source).render(Context(context, autoescape=False)))
+
+    def test_string_if_invalid(self):
+        with override_settings(TEMPLATE_COMPILE=True, TEMPLATE_STRING_IF_INVALID='INVALID'):
+            t = Template('{{ missing|upper }}')
+            self.assertEqual(t.render(Context()), u'INVALID')
+        self.assertEqual(t.render(Context()), u'')
+
+    def test_deeply_nested(self):
+        source = '{% if a %}' * 30 + 'deep' + '{% endif %}' * 30
+        with override_settings(TEMPLATE_COMPILE=True):
+            t = Template(source)
+        self.assertEqual(t.render(Context({'a': True})), u'deep')
+        self.assertEqual(t.render(Context({'a': False})), u'')
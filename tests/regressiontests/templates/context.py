@@ -1,8 +1,18 @@
 # coding: utf-8
-from django.template import Context
+from django.template import Context, Template
+from django.template.context import RenderContext
 from django.utils.unittest import TestCase
 
 
+class CountingContext(Context):
+    "A context counting the scopes pushed on it."
+    pushes = 0
+
+    def push(self):
+        self.pushes += 1
+        return super(CountingContext, self).push()
+
+
 class ContextTests(TestCase):
     def test_context(self):
         c = Context({"a": 1, "b": "xyzzy"})
@@ -14,3 +24,56 @@ class ContextTests(TestCase):
         self.assertEqual(c.pop(), {"a": 2})
         self.assertEqual(c["a"], 1)
         self.assertEqual(c.get("foo", 42), 42)
+
+    def test_scopes(self):
+        c = Context({"a": 1})
+        c.update({"b": 2})
+        c.push()
+        self.assertEqual(c["a"], 1)
+        self.assertEqual(c.get("b"), 2)
+        self.assertTrue("a" in c)
+        self.assertFalse("c" in c)
+        self.assertRaises(KeyError, c.__getitem__, "c")
+        c["a"] = 3
+        self.assertEqual(c["a"], 3)
+        self.assertTrue("a" in c)
+        c.pop()
+        self.assertEqual(c["a"], 1)
+
+    def test_render_context(self):
+        # Only the top of the render context stack is looked at.
+        c = RenderContext({"a": 1})
+        c.push()
+        self.assertFalse("a" in c)
+        self.assertEqual(c.get("a"), None)
+        c["a"] = 2
+        self.assertTrue("a" in c)
+        self.assertEqual(c.get("a"), 2)
+
+    def test_for_unpack(self):
+        # The loop variables which aren't set by an item aren't left over
+        # from the previous one.
+        t = Template(u'{% for a, b in items %}{{ a }}{{ b }},{% endfor %}{{ a }}{{ b }}')
+        c = Context({"a": u"x", "b": u"y", "items": [(1, 2), (3,), 4, (5, 6)]})
+        self.assertEqual(t.render(c), u"12,3y,xy,56,xy")
+        self.assertEqual(len(c.dicts), 1)
+
+    def test_for_scopes(self):
+        # A loop pushes a single scope, even when it unpacks its items, and
+        # its variables hide those of the outer scopes.
+        t = Template(u'{% for row in rows %}{% for name, value in row %}'
+                     u'{{ name }}={{ value }}{% if forloop.first %}{{ title }}'
+                     u'{% endif %},{% endfor %}{% endfor %}{{ name }}')
+        c = CountingContext({'title': u'!', 'name': u'outer'})
+        c.update({'rows': [[(u'a', 1), (u'b', 2)], [(u'c', 3)]]})
+        self.assertEqual(t.render(c), u'a=1!,b=2,c=3!,outer')
+        self.assertEqual(c.pushes, 3)
+        self.assertEqual(len(c.dicts), 2)
+
+    def test_for_body_variables(self):
+        # The values set by the tags of the loop body don't carry over to the
+        # next items.
+        t = Template(u"{% for i in items %}{% if i == 2 %}"
+                     u"{% cycle 'a' 'b' as x %}{% endif %}[{{ x }}],{% endfor %}")
+        c = Context({"items": [1, 2, 3]})
+        self.assertEqual(t.render(c), u"[],a[a],[],")
@@ -0,0 +1,170 @@
+from __future__ import with_statement, absolute_import
+
+from django.template import Context, Template, TemplateSyntaxError
+from django.template.defaulttags import ForNode
+from django.test import TestCase
+from django.test.utils import setup_test_template_loader, restore_template_loaders
+from django.utils import unittest
+
+from .models import Item
+
+
+class FakeQuerySet(object):
+    """
+    Looks like a queryset which hasn't been evaluated, and records how its
+    results are fetched.
+    """
+    def __init__(self, items, prefetch=False):
+        self.items = items
+        self.calls = []
+        self._result_cache = None
+        self._prefetch_related_lookups = prefetch and ['related'] or []
+
+    def __len__(self):
+        self.calls.append('len')
+        self._result_cache = list(self.items)
+        return len(self._result_cache)
+
+    def __getitem__(self, index):
+        return list(self.items)[index]
+
+    def __iter__(self):
+        self.calls.append('iter')
+        return iter(self.items)
+
+    def iterator(self):
+        self.calls.append('iterator')
+        return iter(self.items)
+
+    def count(self):
+        self.calls.append('count')
+        return len(self.items)
+
+class ForLoopTests(unittest.TestCase):
+
+    def setUp(self):
+        setup_test_template_loader({
+            'last.html': '{% if forloop.last %}last{% endif %}',
+        })
+
+    def tearDown(self):
+        restore_template_loaders()
+
+    def for_node(self, template_string):
+        return Template(template_string).nodelist.get_nodes_by_type(ForNode)[0]
+
+    def test_uses_length(self):
+        self.assertFalse(self.for_node(
+            '{% for i in items %}{{ forloop.counter }}{{ forloop.counter0 }}'
+            '{{ forloop.parentloop.first }}{% endfor %}{{ forloop.last }}').uses_length)
+        for body in ('{{ forloop.last }}', '{% if forloop.revcounter0 %}{% endif %}',
+                     '{{ forloop.parentloop.revcounter }}', '{{ forloop.parentloop }}',
+                     '{% with forloop as loop %}{% endwith %}',
+                     '{% for j in items %}{{ forloop.last }}{% endfor %}'):
+            self.assertTrue(self.for_node(
+                '{%% for i in items %%}%s{%% endfor %%}' % body).uses_length, body)
+        # Only the loop's own body is looked at, past nested loops and
+        # comments, and not its {% empty %} part.
+        for body in ('{% for j in items %}{% empty %}{% endfor %}{% endfor %}{{ forloop.last }}',
+                     '{% comment %}{% endfor %}{% endcomment %}{% endfor %}{{ forloop.last }}',
+                     '{% empty %}{{ forloop.last }}{% endfor %}'):
+            self.assertFalse(self.for_node(
+                '{%% for i in items %%}%s' % body).uses_length, body)
+        self.assertTrue(self.for_node(
+            '{% for i in items %}{% comment %}{% endfor %}{% endcomment %}'
+            '{{ forloop.last }}{% endfor %}').uses_length)
+
+    def test_lazy(self):
+        # The values the loop doesn't set are computed when they're looked
+        # up, here by an included template.
+        t = Template('{% for i in items %}{{ i }}{% include "last.html" %},{% endfor %}')
+        self.assertFalse(t.nodelist[0].uses_length)
+        self.assertEqual(t.render(Context({'items': [1, 2, 3]})), u'1,2,3last,')
+
+    def test_parentloop(self):
+        t = Template('{% for i in items %}{% for j in items %}'
+                     '{% if forloop.parentloop.last and forloop.last %}{{ i }}{{ j }}'
+                     '{% endif %}{% endfor %}{% endfor %}')
+        self.assertEqual(t.render(Context({'items': [1, 2]})), u'22')
+
+    def test_queryset(self):
+        # A queryset is iterated without caching its results when the loop
+        # asks for it.
+        items = FakeQuerySet([1, 2, 3])
+        t = Template('{% for i in items uncached %}{{ i }}{% if forloop.first %}f{% endif %}'
+                     '{% empty %}empty{% endfor %}')
+        self.assertEqual(t.render(Context({'items': items})), u'1f23')
+        self.assertEqual(items.calls, ['iterator'])
+        self.assertEqual(t.render(Context({'items': FakeQuerySet([])})), u'empty')
+
+    def test_queryset_length_lookup(self):
+        # The length is given by the rows fetched, not by another query.
+        items = FakeQuerySet([1, 2, 3])
+        t = Template('{% for i in items uncached %}{{ i }}{% include "last.html" %}{% endfor %}')
+        self.assertEqual(t.render(Context({'items': items})), u'123last')
+        self.assertEqual(items.calls, ['iterator'])
+
+    def test_queryset_length(self):
+        # Querysets are evaluated unless the loop asks otherwise, and when
+        # the loop uses their length or they prefetch related objects.
+        for template_string, prefetch in (
+                ('{% for i in items %}{{ i }}{% endfor %}', False),
+                ('{% for i in items uncached %}{{ i }}{{ forloop.revcounter }}{% endfor %}', False),
+                ('{% for i in items uncached %}{{ i }}{% endfor %}', True)):
+            items = FakeQuerySet([1, 2], prefetch)
+            Template(template_string).render(Context({'items': items}))
+            self.assertEqual(items.calls[0], 'len')
+            self.assertFalse('iterator' in items.calls)
+
+    def test_uncached_syntax(self):
+        self.assertTrue(self.for_node('{% for i in items uncached %}{% endfor %}').is_uncached)
+        self.assertFalse(self.for_node('{% for i in uncached %}{% endfor %}').is_uncached)
+        self.assertRaises(TemplateSyntaxError, Template,
+                          '{% for i in items reversed uncached %}{% endfor %}')
+
+
+class ForLoopQuerySetTests(TestCase):
+
+    def setUp(self):
+        for name in ('a', 'b', 'c'):
+            Item.objects.create(name=name)
+        setup_test_template_loader({
+            'last.html': '{% if forloop.last %}last{% endif %}',
+        })
+
+    def tearDown(self):
+        restore_template_loaders()
+
+    def test_reused(self):
+        items = Item.objects.order_by('name')
+        t = Template('{% for item in items %}{{ item.name }}{% endfor %}'
+                     '{% for item in items %}{{ item.name }}{% endfor %}{{ items|length }}')
+        with self.assertNumQueries(1):
+            self.assertEqual(t.render(Context({'items': items})), u'abcabc3')
+        with self.assertNumQueries(0):
+            self.assertEqual([item.name for item in items], [u'a', u'b', u'c'])
+
+    def test_uncached(self):
+        items = Item.objects.order_by('name')
+        t = Template('{% for item in items uncached %}{{ item.name }}'
+                     '{% include "last.html" %}{% endfor %}')
+        with self.assertNumQueries(1):
+            self.assertEqual(t.render(Context({'items': items})), u'abclast')
+        # The results weren't cached, so using the queryset again queries
+        # the database again.
+        with self.assertNumQueries(1):
+            self.assertEqual(len(items), 3)
+
+    def test_uncached_evaluated(self):
+        items = Item.objects.order_by('name')
+        list(items)
+        t = Template('{% for item in items uncached %}{{ item.name }}{% endfor %}')
+        with self.assertNumQueries(0):
+            self.assertEqual(t.render(Context({'items': items})), u'abc')
+
+    def test_uncached_length_used(self):
+        items = Item.objects.order_by('name')
+        t = Template('{% for item in items uncached %}{{ item.name }}'
+                     '{% if forloop.last %}last{% endif %}{% endfor %}{{ items|length }}')
+        with self.assertNumQueries(1):
+            self.assertEqual(t.render(Context({'items': items})), u'abclast3')
@@ -3,6 +3,7 @@ Test cases for the template loaders
 
 Note: This test requires setuptools!
 """
+from __future__ import with_statement
 
 from django.conf import settings
 
@@ -14,10 +15,18 @@ import pkg_resources
 import imp
 import StringIO
 import os.path
-
-from django.template import TemplateDoesNotExist, Context
+import shutil
+import tempfile
+import warnings
+
+from django.core.management import call_command
+from django.template import TemplateDoesNotExist, Context, Template
+from django.template.compiler import CompiledNodeList
+from django.template.loaders import bundle, cached, filesystem
 from django.template.loaders.eggs import Loader as EggLoader
 from django.template import loader
+from django.test.utils import (override_settings, get_warnings_state,
+    restore_warnings_state)
 from django.utils import unittest
 
 
@@ -118,6 +127,202 @@ class CachedLoader(unittest.TestCase):
         # The two templates should not have the same content
         self.assertNotEqual(t1.render(Context({})), t2.render(Context({})))
 
+class CountingLoader(loader.BaseLoader):
+    is_usable = True
+
+    def __init__(self, templates):
+        self.templates = templates
+        self.calls = 0
+
+    def load_template_source(self, template_name, template_dirs=None):
+        self.calls += 1
+        try:
+            return self.templates[template_name], template_name
+        except KeyError:
+            raise TemplateDoesNotExist(template_name)
+
+class CachedLoaderCachingTests(unittest.TestCase):
+    def setUp(self):
+        self.counting_loader = CountingLoader({
+            'item.html': '{{ item }}',
+            'list.html': '{% for item in items %}{% include name %}{% endfor %}',
+        })
+        self.cache_loader = cached.Loader(('',))
+        self.cache_loader._cached_loaders = (self.counting_loader,)
+        self.old_loaders = loader.template_source_loaders
+        loader.template_source_loaders = (self.cache_loader,)
+
+    def tearDown(self):
+        loader.template_source_loaders = self.old_loaders
+
+    def test_missing(self):
+        self.assertRaises(TemplateDoesNotExist, loader.get_template, 'missing.html')
+        self.assertRaises(TemplateDoesNotExist, loader.get_template, 'missing.html')
+        self.assertEqual(self.counting_loader.calls, 1)
+        self.cache_loader.reset()
+        self.assertRaises(TemplateDoesNotExist, loader.get_template, 'missing.html')
+        self.assertEqual(self.counting_loader.calls, 2)
+
+    @override_settings(TEMPLATE_CACHE_AUTO_RELOAD=True)
+    def test_missing_auto_reload(self):
+        self.assertRaises(TemplateDoesNotExist, loader.get_template, 'missing.html')
+        self.counting_loader.templates['missing.html'] = 'found'
+        self.assertEqual(loader.get_template('missing.html').render(Context()), 'found')
+
+    def test_missing_bounded(self):
+        old_max = cached.MAX_MISSING_TEMPLATES
+        cached.MAX_MISSING_TEMPLATES = 2
+        try:
+            for name in ('a.html', 'b.html', 'c.html'):
+                self.assertRaises(TemplateDoesNotExist, loader.get_template, name)
+            self.assertEqual(self.cache_loader.missing_templates, set(['c.html']))
+        finally:
+            cached.MAX_MISSING_TEMPLATES = old_max
+
+    def test_include(self):
+        # Even without the cached loader, the template included in the loop
+        # is loaded once per rendering.
+        loader.template_source_loaders = (self.counting_loader,)
+        t = Template('{% for name in names %}{% include name %}{% endfor %}')
+        context = Context({'names': ['item.html', 'item.html'], 'item': 'x'})
+        self.assertEqual(t.render(context), 'xx')
+        self.assertEqual(self.counting_loader.calls, 1)
+        self.assertEqual(t.render(context), 'xx')
+        self.assertEqual(self.counting_loader.calls, 2)
+
+    def test_include_in_included_template(self):
+        t = loader.get_template('list.html')
+        self.assertEqual(t.render(Context({'items': [1, 2], 'name': 'item.html'})), '12')
+        self.assertEqual(t.render(Context({'items': [3], 'name': 'item.html'})), '3')
+        self.assertEqual(self.counting_loader.calls, 2)
+
+class CachedLoaderAutoReloadTests(unittest.TestCase):
+    def setUp(self):
+        self.template_dir = tempfile.mkdtemp()
+        self.write_template('first', 1000)
+        self.cache_loader = cached.Loader(('',))
+        self.cache_loader._cached_loaders = (filesystem.Loader(),)
+
+    def tearDown(self):
+        shutil.rmtree(self.template_dir)
+
+    def write_template(self, content, mtime, name='test.html'):
+        path = os.path.join(self.template_dir, name)
+        f = open(path, 'w')
+        try:
+            f.write(content)
+        finally:
+            f.close()
+        os.utime(path, (mtime, mtime))
+
+    def render(self, name='test.html'):
+        template, origin = self.cache_loader.load_template(name, [self.template_dir])
+        return template.render(Context())
+
+    def test_not_reloaded(self):
+        self.assertEqual(self.render(), 'first')
+        self.write_template('second', 2000)
+        self.assertEqual(self.render(), 'first')
+
+    @override_settings(TEMPLATE_CACHE_AUTO_RELOAD=True)
+    def test_reloaded(self):
+        self.assertEqual(self.render(), 'first')
+        self.write_template('second', 2000)
+        self.assertEqual(self.render(), 'second')
+        os.remove(os.path.join(self.template_dir, 'test.html'))
+        self.assertRaises(TemplateDoesNotExist, self.render)
+
+    @override_settings(TEMPLATE_CACHE_AUTO_RELOAD=True)
+    def test_included_template_reloaded(self):
+        "Templates are reloaded when the templates they include are modified"
+        old_loaders = loader.template_source_loaders
+        loader.template_source_loaders = (self.cache_loader,)
+        try:
+            with override_settings(TEMPLATE_DIRS=(self.template_dir,)):
+                self.write_template('{% include "test.html" %}!', 1000, 'parent.html')
+                self.write_template('{% include "parent.html" %}', 1000, 'grandparent.html')
+                self.assertEqual(self.render('grandparent.html'), 'first!')
+                self.write_template('second', 2000)
+                self.assertEqual(self.render('grandparent.html'), 'second!')
+        finally:
+            loader.template_source_loaders = old_loaders
+
+class BundleLoaderTests(unittest.TestCase):
+    def setUp(self):
+        self.bundle_dir = tempfile.mkdtemp()
+        self.bundle_path = os.path.join(self.bundle_dir, 'templates.bundle')
+
+    def tearDown(self):
+        shutil.rmtree(self.bundle_dir)
+
+    def test_bundle(self):
+        source = ('{% load custom %}{% if a == 1 and not b %}{% one_param a %}{% endif %}'
+                  '{% for i in items %}{{ i|upper }}{% endfor %}')
+        unpicklable = Template('unpicklable')
+        unpicklable.nodelist[0].func = lambda: None
+        templates = {'test.html': Template(source), 'unpicklable.html': unpicklable}
+        self.assertEqual(bundle.write_bundle(templates, self.bundle_path),
+                         ['unpicklable.html'])
+        bundle_loader = bundle.Loader(self.bundle_path)
+        template, origin = bundle_loader('test.html')
+        context = Context({'a': 1, 'items': ['x', 'y']})
+        self.assertEqual(template.render(context), 'one_param - Expected result: 1XY')
+        self.assertRaises(TemplateDoesNotExist, bundle_loader, 'unpicklable.html')
+        self.assertRaises(TemplateDoesNotExist, bundle_loader, 'test.html', ['/templates'])
+
+    def test_compiled(self):
+        with override_settings(TEMPLATE_COMPILE=True):
+            bundle.write_bundle({'test.html': Template('{% for i in items %}{{ i }}{% endfor %}')},
+                                self.bundle_path)
+            template, origin = bundle.Loader(self.bundle_path)('test.html')
+        self.assertTrue(isinstance(template.nodelist, CompiledNodeList))
+        self.assertEqual(template.render(Context({'items': [1, 2]})), '12')
+        # Templates are compiled when loaded, as configured then.
+        template, origin = bundle.Loader(self.bundle_path)('test.html')
+        self.assertFalse(isinstance(template.nodelist, CompiledNodeList))
+        self.assertEqual(template.render(Context({'items': [1, 2]})), '12')
+
+    def test_debug(self):
+        # The templates are parsed again from their source when debugging or
+        # profiling them.
+        bundle.write_bundle({'test.html': Template('test')}, self.bundle_path)
+        bundle_loader = bundle.Loader(self.bundle_path)
+        for setting in ('TEMPLATE_DEBUG', 'TEMPLATE_PROFILE'):
+            with override_settings(**{setting: True}):
+                self.assertRaises(TemplateDoesNotExist, bundle_loader, 'test.html')
+        template, origin = bundle_loader('test.html')
+        self.assertEqual(template.render(Context()), 'test')
+
+    def test_other_version(self):
+        old_version = bundle.BUNDLE_VERSION
+        bundle.BUNDLE_VERSION = 0
+        try:
+            bundle.write_bundle({'test.html': Template('test')}, self.bundle_path)
+        finally:
+            bundle.BUNDLE_VERSION = old_version
+        warnings_state = get_warnings_state()
+        warnings.simplefilter('ignore')
+        try:
+            bundle_loader = bundle.Loader(self.bundle_path)
+        finally:
+            restore_warnings_state(warnings_state)
+        self.assertRaises(TemplateDoesNotExist, bundle_loader, 'test.html')
+
+    def test_command(self):
+        template_dir = os.path.join(os.path.dirname(__file__), 'templates')
+        stdout = StringIO.StringIO()
+        with override_settings(TEMPLATE_DIRS=(template_dir,), TEMPLATE_LOADERS=(
+                ('django.template.loaders.bundle.Loader', self.bundle_path),
+                ('django.template.loaders.cached.Loader', (
+                    'django.template.loaders.filesystem.Loader',
+                )))):
+            call_command('bundletemplates', extensions=['html'], verbosity=0,
+                         stdout=stdout)
+        templates = bundle.read_bundle(self.bundle_path)
+        self.assertTrue('first/test.html' in templates)
+        self.assertTrue('ssi include with spaces.html' in templates)
+        self.assertEqual(templates['first/test.html'].render(Context()), 'First template\n')
+
 class RenderToStringTest(unittest.TestCase):
 
     def setUp(self):
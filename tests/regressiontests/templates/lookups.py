@@ -0,0 +1,71 @@
+from django.template import Context, Template, Variable, VariableDoesNotExist
+from django.template import base as template_base
+from django.utils import unittest
+
+
+class Item(object):
+    def __init__(self, name, price):
+        self.name = name
+        self.price = price
+
+    def label(self):
+        return u'%s (%s)' % (self.name, self.price)
+
+class OldStyleItem:
+    pass
+
+class ItemDict(dict):
+    pass
+
+class LookupStrategyTests(unittest.TestCase):
+
+    def setUp(self):
+        template_base.lookup_strategies.clear()
+
+    def test_attribute(self):
+        self.assertEqual(Variable('item.name').resolve({'item': Item(u'a', 1)}), u'a')
+        self.assertEqual(template_base.lookup_strategies[(Item, 'name')],
+                         template_base.ATTRIBUTE_LOOKUP)
+        self.assertEqual(Variable('item.label').resolve({'item': Item(u'b', 2)}), u'b (2)')
+        # An object of the same type without the attribute.
+        item = Item(u'c', 3)
+        del item.name
+        self.assertRaises(VariableDoesNotExist, Variable('item.name').resolve, {'item': item})
+
+    def test_index(self):
+        self.assertEqual(Variable('items.1').resolve({'items': [u'a', u'b']}), u'b')
+        self.assertEqual(template_base.lookup_strategies[(list, '1')],
+                         template_base.INDEX_LOOKUP)
+        self.assertEqual(Variable('items.1').resolve({'items': [u'c', u'd']}), u'd')
+        self.assertRaises(VariableDoesNotExist, Variable('items.1').resolve, {'items': [u'e']})
+
+    def test_not_remembered(self):
+        # Dictionary lookups aren't skipped for subscriptable objects, nor
+        # for old-style instances, whose classes may define __getitem__.
+        d = ItemDict()
+        self.assertEqual(Variable('d.keys').resolve({'d': d}), [])
+        d['keys'] = u'a'
+        self.assertEqual(Variable('d.keys').resolve({'d': d}), u'a')
+        item = OldStyleItem()
+        item.name = u'b'
+        self.assertEqual(Variable('item.name').resolve({'item': item}), u'b')
+        self.assertEqual(template_base.lookup_strategies, {})
+
+    def test_max_strategies(self):
+        old_max = template_base.MAX_LOOKUP_STRATEGIES
+        template_base.MAX_LOOKUP_STRATEGIES = 1
+        try:
+            Variable('item.name').resolve({'item': Item(u'a', 1)})
+            Variable('item.price').resolve({'item': Item(u'a', 1)})
+            self.assertEqual(template_base.lookup_strategies.keys(), [(Item, 'price')])
+        finally:
+            template_base.MAX_LOOKUP_STRATEGIES = old_max
+
+    def test_template(self):
+        t = Template(u'{% for item in items %}{{ item.name }} {{ item.price }} '
+                     u'{{ item.label }} {{ item.name.upper }}{% endfor %}')
+        context = Context({'items': [Item(u'a', 1), Item(u'b', 2)]})
+        self.assertEqual(t.render(context), u'a 1 a (1) Ab 2 b (2) B')
+        for key in ((Item, 'name'), (Item, 'price'), (Item, 'label')):
+            self.assertEqual(template_base.lookup_strategies[key],
+                             template_base.ATTRIBUTE_LOOKUP)
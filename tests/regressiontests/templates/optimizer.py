@@ -0,0 +1,89 @@
+from __future__ import with_statement
+
+from django.template import Context, Template, TextNode, VariableNode
+from django.template.defaulttags import IfNode, WithNode
+from django.template.optimizer import optimize_nodelist
+from django.test.utils import override_settings
+from django.utils import translation
+from django.utils import unittest
+
+from .templatetags.custom import pure_upper
+
+
+class OptimizerTests(unittest.TestCase):
+
+    def optimize(self, template_string):
+        with override_settings(TEMPLATE_OPTIMIZE=True, TEMPLATE_DEBUG=False):
+            return Template(template_string)
+
+    def test_setting(self):
+        with override_settings(TEMPLATE_OPTIMIZE=False):
+            self.assertEqual(len(Template('a{{ "b" }}').nodelist), 2)
+        with override_settings(TEMPLATE_OPTIMIZE=True, TEMPLATE_DEBUG=True):
+            self.assertEqual(len(Template('a{{ "b" }}').nodelist), 2)
+        self.assertEqual(len(self.optimize('a{{ "b" }}').nodelist), 1)
+
+    def test_text(self):
+        t = self.optimize(u'a{{ "<b>" }}{{ "c"|lower|capfirst }}{{ "<d>"|force_escape }}')
+        self.assertEqual(len(t.nodelist), 1)
+        self.assertEqual(type(t.nodelist[0]), TextNode)
+        self.assertEqual(t.render(Context()), u'a<b>C&lt;d&gt;')
+
+    def test_folded_expression(self):
+        # The filters are applied once, but unsafe results are still escaped
+        # depending on the context.
+        t = self.optimize(u'{{ "<a>"|upper }}')
+        node = t.nodelist[0]
+        self.assertEqual(type(node), VariableNode)
+        self.assertEqual(node.filter_expression.var, u'<A>')
+        self.assertEqual(node.filter_expression.filters, [])
+        self.assertEqual(t.render(Context()), u'&lt;A&gt;')
+        self.assertEqual(t.render(Context(autoescape=False)), u'<A>')
+
+    def test_with(self):
+        t = self.optimize(u'{% with a="foo"|title b=value|title %}{{ a }}{{ b }}{% endwith %}')
+        node = t.nodelist.get_nodes_by_type(WithNode)[0]
+        self.assertEqual(node.extra_context['a'].var, u'Foo')
+        self.assertEqual(node.extra_context['a'].filters, [])
+        self.assertNotEqual(node.extra_context['b'].filters, [])
+        self.assertEqual(t.render(Context({'value': u'bar'})), u'FooBar')
+
+    def test_not_folded(self):
+        # Filters which aren't pure, or take variables as arguments, are
+        # applied when rendering, and so are translations.
+        t = self.optimize(u'{{ "a"|random }}{{ "a"|add:b }}{{ "x"|default:_("Yes") }}'
+                          u'{{ _("Yes")|lower }}{{ "a"|yesno }}')
+        for node in t.nodelist:
+            self.assertEqual(type(node), VariableNode)
+            self.assertNotEqual(node.filter_expression.filters, [])
+        translation.activate('de')
+        try:
+            self.assertEqual(self.optimize(u'{{ _("Yes")|lower }}').render(Context()), u'ja')
+        finally:
+            translation.deactivate()
+
+    def test_custom_filter(self):
+        t = self.optimize(u'{% load custom %}{{ "a"|pure_upper }}{{ "a"|upper }}')
+        self.assertTrue(pure_upper.is_pure)
+        self.assertEqual(t.nodelist[1].filter_expression.var, u'A')
+
+    def test_dead_branches(self):
+        t = self.optimize(u'a{% if 0 %}{{ x }}{% else %}b{% if "x" in "xy" and not "" %}c'
+                          u'{% endif %}{% endif %}{% if x %}d{% endif %}{% if x or 1 %}e{% endif %}')
+        self.assertEqual(t.nodelist[0].s, u'abc')
+        self.assertEqual([type(node) for node in t.nodelist], [TextNode, IfNode, IfNode])
+        self.assertEqual(t.render(Context({'x': True})), u'abcde')
+        self.assertEqual(t.render(Context()), u'abce')
+
+    def test_nested(self):
+        t = self.optimize(u'{% for i in items %}{{ "a"|upper }}{% if 1 %}{{ i }}{% endif %}'
+                          u'{% endfor %}')
+        self.assertEqual(len(t.nodelist[0].nodelist_loop), 2)
+        self.assertEqual(t.render(Context({'items': [1, 2]})), u'A1A2')
+
+    def test_unchanged(self):
+        nodelist = Template('{{ a }}').nodelist
+        with override_settings(TEMPLATE_DEBUG=True):
+            debug_nodelist = Template('{{ a }}').nodelist
+        self.assertEqual(list(optimize_nodelist(nodelist)), list(nodelist))
+        self.assertTrue(optimize_nodelist(debug_nodelist) is debug_nodelist)
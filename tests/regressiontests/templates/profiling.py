@@ -0,0 +1,88 @@
+from __future__ import with_statement
+
+from django.template import Context, Template, loader
+from django.template import profiling
+from django.template.profiling import ProfilingNodeList, RenderStats
+from django.test.utils import (override_settings, setup_test_template_loader,
+    restore_template_loaders)
+from django.utils import unittest
+
+
+class ProfilingTests(unittest.TestCase):
+
+    def setUp(self):
+        setup_test_template_loader({
+            'base.html': '<title>{% block title %}{% endblock %}</title>'
+                         '{% block content %}{% endblock %}',
+            'page.html': '{% extends "base.html" %}{% block title %}Page{% endblock %}'
+                         '{% block content %}{% for item in items %}'
+                         '{% include "item.html" %}{% endfor %}{% endblock %}',
+            'item.html': '<li>{{ item }}</li>',
+        })
+        profiling.stats.reset()
+
+    def tearDown(self):
+        restore_template_loaders()
+        profiling.stats.reset()
+
+    def counts(self, kind):
+        return dict([(name, count) for name, count, seconds
+                     in profiling.stats.items(kind)])
+
+    def render_page(self):
+        # The parent and included templates are loaded while rendering.
+        with override_settings(TEMPLATE_PROFILE=True, TEMPLATE_DEBUG=False):
+            t = loader.get_template('page.html')
+            return t.render(Context({'items': [1, 2]}))
+
+    def test_disabled(self):
+        with override_settings(TEMPLATE_PROFILE=False):
+            t = loader.get_template('page.html')
+        self.assertFalse(isinstance(t.nodelist, ProfilingNodeList))
+        t.render(Context({'items': [1, 2]}))
+        with override_settings(TEMPLATE_PROFILE=True, TEMPLATE_DEBUG=True):
+            t = loader.get_template('page.html')
+        self.assertFalse(isinstance(t.nodelist, ProfilingNodeList))
+        self.assertEqual(profiling.stats.items('templates'), [])
+
+    def test_render(self):
+        self.assertEqual(self.render_page(), u'<title>Page</title><li>1</li><li>2</li>')
+        self.assertEqual(self.counts('templates'),
+                         {'page.html': 1, 'base.html': 1, 'item.html': 2})
+        self.assertEqual(self.counts('blocks'), {'title': 1, 'content': 1})
+        tags = self.counts('tags')
+        self.assertEqual(tags['django.template.loader_tags.ExtendsNode'], 1)
+        self.assertEqual(tags['django.template.loader_tags.BlockNode'], 2)
+        self.assertEqual(tags['django.template.defaulttags.ForNode'], 1)
+        self.assertEqual(tags['django.template.loader_tags.ConstantIncludeNode'], 2)
+        self.assertEqual(tags['django.template.base.VariableNode'], 2)
+        self.assertFalse('django.template.base.TextNode' in tags)
+        for name, count, seconds in profiling.stats.items('tags'):
+            self.assertTrue(seconds >= 0)
+
+    def test_stream(self):
+        with override_settings(TEMPLATE_PROFILE=True, TEMPLATE_DEBUG=False):
+            t = loader.get_template('page.html')
+            output = u''.join(t.stream(Context({'items': [1, 2]})))
+        self.assertEqual(output, u'<title>Page</title><li>1</li><li>2</li>')
+        self.assertEqual(self.counts('templates'),
+                         {'page.html': 1, 'base.html': 1, 'item.html': 2})
+        self.assertEqual(self.counts('blocks'), {'title': 1, 'content': 1})
+
+    def test_string_template(self):
+        with override_settings(TEMPLATE_PROFILE=True, TEMPLATE_DEBUG=False):
+            t = Template('{% if a %}{{ a }}{% endif %}')
+        t.render(Context({'a': 1}))
+        self.assertEqual(self.counts('templates'), {'<Unknown Template>': 1})
+        self.assertEqual(self.counts('tags'), {'django.template.defaulttags.IfNode': 1,
+                                               'django.template.base.VariableNode': 1})
+
+    def test_stats(self):
+        stats = RenderStats()
+        stats.record('tags', 'a', 1.0)
+        stats.record('tags', 'b', 3.0)
+        stats.record('tags', 'a', 1.5)
+        self.assertEqual(stats.items('tags'), [('b', 1, 3.0), ('a', 2, 2.5)])
+        self.assertEqual(stats.items('templates'), [])
+        stats.reset()
+        self.assertEqual(stats.items('tags'), [])
@@ -7,11 +7,15 @@ from datetime import datetime
 
 from django.utils import unittest
 from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
 from django.conf import settings
+from django.core import signals
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import close_connection
 import django.template.context
 from django.template import Template, Context
 from django.template.response import (TemplateResponse, SimpleTemplateResponse,
-                                      ContentNotRenderedError)
+                                      StreamingTemplateResponse, ContentNotRenderedError)
 
 def test_processor(request):
     return {'processors': 'yes'}
@@ -300,6 +304,76 @@ class TemplateResponseTest(BaseTemplateResponseTest):
         repickled_response = pickle.dumps(unpickled_response)
 
 
+class StreamingTemplateResponseTest(BaseTemplateResponseTest):
+
+    def _response(self, template='foo', *args, **kwargs):
+        return StreamingTemplateResponse(self.factory.get('/'), Template(template),
+                                         *args, **kwargs)
+
+    def test_render(self):
+        response = self._response('{% for i in items %}{{ i }}{{ processors }}{% endfor %}',
+                                  {'items': [1, 2, 3]})
+        response.chunk_size = 4
+        response.render()
+        self.assertEqual(list(response), ['1yes', '2yes', '3yes'])
+
+    def test_content_access(self):
+        response = self._response(u'{{ foo }}\u20ac', {'foo': 'bar'}).render()
+        self.assertEqual(response.content, 'bar\xe2\x82\xac')
+        # The content can be iterated over afterwards.
+        self.assertEqual(''.join(response), 'bar\xe2\x82\xac')
+
+    def test_pickling(self):
+        response = StreamingTemplateResponse(self.factory.get('/'),
+            'first/test.html', {'value': 123})
+        response.render()
+        unpickled_response = pickle.loads(pickle.dumps(response))
+        self.assertEqual(unpickled_response.content, 'First template\n')
+        self.assertEqual(response.content, 'First template\n')
+
+class StreamingHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.finished = []
+        # The test database would be closed along with the connection.
+        signals.request_finished.disconnect(close_connection)
+        signals.request_finished.connect(self.request_finished)
+
+    def tearDown(self):
+        signals.request_finished.disconnect(self.request_finished)
+        signals.request_finished.connect(close_connection)
+
+    def request_finished(self, **kwargs):
+        self.finished.append(kwargs['sender'])
+
+    def start_response(self, status, headers):
+        self.status = status
+
+    @override_settings(ROOT_URLCONF='regressiontests.templates.urls',
+                       MIDDLEWARE_CLASSES=('django.middleware.locale.LocaleMiddleware',))
+    def test_request_finished_on_close(self):
+        "The request finishes once the response was rendered and sent"
+        environ = RequestFactory()._base_environ(PATH_INFO='/streaming/',
+                                                 HTTP_ACCEPT_LANGUAGE='fr')
+        response = WSGIHandler()(environ, self.start_response)
+        self.assertEqual(self.status, '200 OK')
+        self.assertEqual(self.finished, [])
+        # The middleware deactivated the language of the request, which the
+        # template is still rendered with.
+        self.assertEqual(''.join(response), 'fr Oui')
+        self.assertEqual(self.finished, [])
+        response.close()
+        self.assertEqual(self.finished, [WSGIHandler])
+        response.close()
+        self.assertEqual(self.finished, [WSGIHandler])
+
+    @override_settings(ROOT_URLCONF='regressiontests.templates.alternate_urls')
+    def test_request_finished(self):
+        "Other responses finish the request before they're sent"
+        environ = RequestFactory()._base_environ(PATH_INFO='/template_response_view/')
+        WSGIHandler()(environ, self.start_response)
+        self.assertEqual(self.finished, [WSGIHandler])
+
 class CustomURLConfTest(TestCase):
     urls = 'regressiontests.templates.urls'
 
@@ -0,0 +1,51 @@
+from django.template import Context, Template
+from django.test.utils import setup_test_template_loader, restore_template_loaders
+from django.utils import unittest
+
+
+class StreamingTests(unittest.TestCase):
+
+    def setUp(self):
+        setup_test_template_loader({
+            'base.html': '<head>{% block head %}{% endblock %}</head>'
+                         '<body>{% block body %}{% endblock %}</body>',
+            'item.html': '<li>{{ item }}</li>',
+        })
+        self.calls = []
+
+    def tearDown(self):
+        restore_template_loaders()
+
+    def value(self, name):
+        def get_value():
+            self.calls.append(name)
+            return name
+        return get_value
+
+    def test_incremental(self):
+        t = Template('{% extends "base.html" %}'
+                     '{% block head %}{{ head }}{% endblock %}'
+                     '{% block body %}{% for item in items %}{% include "item.html" %}'
+                     '{% endfor %}{% endblock %}')
+        context = Context({'head': self.value('head'),
+                           'items': [self.value('first'), self.value('second')]})
+        stream = t.stream(context)
+        output = u''
+        # The page is sent up to the first item before it's rendered.
+        while not output.endswith(u'<body>'):
+            output += stream.next()
+        self.assertEqual(self.calls, ['head'])
+        output += u''.join(stream)
+        self.assertEqual(self.calls, ['head', 'first', 'second'])
+        self.assertEqual(output, t.render(context))
+        self.assertEqual(len(context.dicts), 1)
+        self.assertEqual(len(context.render_context.dicts), 1)
+
+    def test_if(self):
+        t = Template('{% if a %}{{ b }}{{ c }}{% else %}x{% endif %}')
+        context = Context({'a': True, 'b': self.value('b'), 'c': self.value('c')})
+        stream = t.stream(context)
+        self.assertEqual(stream.next(), u'b')
+        self.assertEqual(self.calls, ['b'])
+        self.assertEqual(list(stream), [u'c'])
+        self.assertEqual(list(t.stream(Context({'a': False}))), [u'x'])
@@ -11,6 +11,11 @@ register = template.Library()
 def trim(value, num):
     return value[:num]
 
+@register.filter(is_pure=True)
+@stringfilter
+def pure_upper(value):
+    return value.upper()
+
 @register.simple_tag
 def no_params():
     """Expected no_params __doc__"""
@@ -31,17 +31,25 @@ from django.utils.safestring import mark_safe
 from django.utils.tzinfo import LocalTimezone
 
 from .callables import CallableVariablesTests
+from .compiler import CompilerTests
 from .context import ContextTests
+from .forloop import ForLoopTests, ForLoopQuerySetTests
+from .optimizer import OptimizerTests
+from .profiling import ProfilingTests
+from .lookups import LookupStrategyTests
 from .custom import CustomTagTests, CustomFilterTests
 from .parser import ParserTests
 from .unicode import UnicodeTests
 from .nodelist import NodelistTest, ErrorIndexTest
 from .smartif import SmartIfTests
+from .streaming import StreamingTests
 from .response import (TemplateResponseTest, BaseTemplateResponseTest,
-    CacheMiddlewareTest, SimpleTemplateResponseTest, CustomURLConfTest)
+    CacheMiddlewareTest, SimpleTemplateResponseTest, CustomURLConfTest,
+    StreamingTemplateResponseTest, StreamingHandlerTest)
 
 try:
-    from .loaders import RenderToStringTest, EggLoaderTest
+    from .loaders import (RenderToStringTest, EggLoaderTest,
+        CachedLoaderCachingTests, CachedLoaderAutoReloadTests, BundleLoaderTests)
 except ImportError, e:
     if "pkg_resources" in e.message:
         pass # If setuptools isn't installed, that's fine. Just move on.
@@ -504,10 +512,43 @@ class Templates(unittest.TestCase):
         self.assertEqual(failures, [], "Tests failed:\n%s\n%s" %
             ('-'*70, ("\n%s\n" % ('-'*70)).join(failures)))
 
+    def test_templates_compiled(self):
+        "Compiled templates render the same output"
+        with override_settings(TEMPLATE_COMPILE=True):
+            self.test_templates()
+
+    def test_templates_optimized(self):
+        "Optimized templates render the same output"
+        with override_settings(TEMPLATE_OPTIMIZE=True):
+            self.test_templates()
+        with override_settings(TEMPLATE_OPTIMIZE=True, TEMPLATE_COMPILE=True):
+            self.test_templates()
+
+    def test_templates_profiled(self):
+        "Profiled templates render the same output"
+        with override_settings(TEMPLATE_PROFILE=True):
+            self.test_templates()
+            self.stream = True
+            try:
+                self.test_templates()
+            finally:
+                self.stream = False
+
+    def test_templates_streamed(self):
+        "Streamed templates render the same output"
+        self.stream = True
+        try:
+            self.test_templates()
+        finally:
+            self.stream = False
+
     def render(self, test_template, vals):
         context = template.Context(vals[1])
         before_stack_size = len(context.dicts)
-        output = test_template.render(context)
+        if getattr(self, 'stream', False):
+            output = u''.join(test_template.stream(context))
+        else:
+            output = test_template.render(context)
         if len(context.dicts) != before_stack_size:
             raise ContextStackException
         return output
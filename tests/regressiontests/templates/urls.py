@@ -13,6 +13,7 @@ urlpatterns = patterns('',
     (r'^client/(?P<id>\d+)/(?P<action>[^/]+)/$', views.client_action),
     (r'^client/(?P<client_id>\d+)/(?P<action>[^/]+)/$', views.client_action),
     url(r'^named-client/(\d+)/$', views.client2, name="named.client"),
+    (r'^streaming/$', views.streaming_view),
 
     # Unicode strings are permitted everywhere.
     url(ur'^Юникод/(\w+)/$', views.client2, name=u"метка_оператора"),
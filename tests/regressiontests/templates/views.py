@@ -1,6 +1,7 @@
 # Fake views for testing url reverse lookup
 from django.http import HttpResponse
-from django.template.response import TemplateResponse
+from django.template import Template
+from django.template.response import TemplateResponse, StreamingTemplateResponse
 
 
 def index(request):
@@ -20,3 +21,7 @@ def template_response_view(request):
 
 def snark(request):
     return HttpResponse('Found him!')
+
+def streaming_view(request):
+    return StreamingTemplateResponse(request, Template(
+        '{% load i18n %}{% get_current_language as language %}{{ language }} {% trans "Yes" %}'))
@@ -1,5 +1,5 @@
 from django.utils import unittest
-from django.utils.functional import lazy, lazy_property
+from django.utils.functional import allow_lazy, lazy, lazy_property
 
 
 class FunctionalTestCase(unittest.TestCase):
@@ -37,3 +37,19 @@ class FunctionalTestCase(unittest.TestCase):
 
         self.assertRaises(NotImplementedError, lambda: A().do)
         self.assertEqual(B().do, 'DO IT')
+
+    def test_allow_lazy(self):
+        calls = []
+        def join(a, b=u''):
+            calls.append(1)
+            return u'%s%s' % (a, b)
+        join = allow_lazy(join, unicode)
+        lazy_b = lazy(lambda: u'b', unicode)()
+        self.assertEqual(join(u'a', b=u'c'), u'ac')
+        self.assertEqual(len(calls), 1)
+        # Lazy arguments, positional or not, postpone the call.
+        first, second = join(lazy_b, u'c'), join(u'a', b=lazy_b)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(unicode(first), u'bc')
+        self.assertEqual(unicode(second), u'ab')
+        self.assertEqual(len(calls), 3)
@@ -1,6 +1,8 @@
 import unittest
 
 from django.utils import html
+from django.utils.functional import lazy
+from django.utils.safestring import SafeUnicode, mark_safe
 
 class TestUtilsHtml(unittest.TestCase):
 
@@ -31,6 +33,10 @@ class TestUtilsHtml(unittest.TestCase):
             self.check_output(f, value * 2, output * 2)
         # Verify it doesn't double replace &.
         self.check_output(f, '<&', '&lt;&amp;')
+        # The result is safe unicode, whatever the value.
+        for value in ('<&', u'<&', mark_safe(u'<&'), 1):
+            self.assertTrue(isinstance(f(value), SafeUnicode))
+        self.assertEqual(f(lazy(lambda: u'<&', unicode)()), u'&lt;&amp;')
 
     def test_linebreaks(self):
         f = html.linebreaks
@@ -51,3 +51,18 @@ class TestUtilsHttp(unittest.TestCase):
             'position=Developer&name=Adrian&name=Simon'
         ]
         self.assertTrue(result in acceptable_results)
+
+    def test_parse_range_header(self):
+        self.assertEqual(http.parse_range_header('bytes=0-499', 1000), [(0, 499)])
+        self.assertEqual(http.parse_range_header('bytes=500-', 1000), [(500, 999)])
+        self.assertEqual(http.parse_range_header('bytes=-100', 1000), [(900, 999)])
+        self.assertEqual(http.parse_range_header('bytes=0-0,-1', 1000), [(0, 0), (999, 999)])
+        # The last position is limited to the size of the entity.
+        self.assertEqual(http.parse_range_header('bytes=900-2000', 1000), [(900, 999)])
+        self.assertEqual(http.parse_range_header('bytes=-2000', 1000), [(0, 999)])
+        # Unsatisfiable ranges.
+        self.assertEqual(http.parse_range_header('bytes=1000-', 1000), [])
+        self.assertEqual(http.parse_range_header('bytes=-0', 1000), [])
+        # Malformed headers.
+        for header in ('bytes=', 'bytes=a-b', 'bytes=5-1', 'bytes=1', 'items=0-1'):
+            self.assertEqual(http.parse_range_header(header, 1000), None)
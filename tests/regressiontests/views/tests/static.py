@@ -90,6 +90,59 @@ class StaticTests(TestCase):
         self.assertEqual(len(response.content),
                           int(response['Content-Length']))
 
+    def test_range(self):
+        file_name = 'file.txt'
+        response = self.client.get('/views/%s/%s' % (self.prefix, file_name),
+                                   HTTP_RANGE='bytes=3-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, 'example')
+        self.assertEqual(response['Content-Length'], '7')
+        self.assertEqual(response['Content-Range'], 'bytes 3-9/22')
+
+    def test_multiple_ranges(self):
+        file_name = 'file.txt'
+        response = self.client.get('/views/%s/%s' % (self.prefix, file_name),
+                                   HTTP_RANGE='bytes=0-1,-5')
+        self.assertEqual(response.status_code, 206)
+        content_type, boundary = response['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+        self.assertEqual(response.content,
+            '--%(b)s\r\nContent-Type: text/plain\r\nContent-Range: bytes 0-1/22\r\n\r\nAn\r\n'
+            '--%(b)s\r\nContent-Type: text/plain\r\nContent-Range: bytes 17-21/22\r\n\r\nfile.\r\n'
+            '--%(b)s--\r\n' % {'b': boundary})
+        self.assertEqual(len(response.content), int(response['Content-Length']))
+
+    def test_unsatisfiable_range(self):
+        file_name = 'file.txt'
+        response = self.client.get('/views/%s/%s' % (self.prefix, file_name),
+                                   HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */22')
+        self.assertEqual(response.content, '')
+
+    def test_invalid_range(self):
+        file_name = 'file.txt'
+        for range in ('bytes=9-3', 'bytes=0-21,0-21'):
+            response = self.client.get('/views/%s/%s' % (self.prefix, file_name),
+                                       HTTP_RANGE=range)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, open(path.join(media_dir, file_name)).read())
+
+    def test_if_range(self):
+        file_name = 'file.txt'
+        url = '/views/%s/%s' % (self.prefix, file_name)
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_RANGE='bytes=3-9',
+                                   HTTP_IF_RANGE=last_modified)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, 'example')
+        # The file changed since the client got the first part of it.
+        for if_range in ('Thu, 1 Jan 1970 00:00:00 GMT', '"etag"'):
+            response = self.client.get(url, HTTP_RANGE='bytes=3-9',
+                                       HTTP_IF_RANGE=if_range)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.content), 22)
+
 
 class StaticHelperTest(StaticTests):
     """